@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BookPost, BookImage, BookRequest
+from .models import BookPost, BookImage, BookRequest, IsbnRecord
 
 @admin.register(BookPost)
 class BookPostAdmin(admin.ModelAdmin):
@@ -38,3 +38,8 @@ class BookRequestAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     readonly_fields = ('created_at', 'updated_at')
     list_editable = ('status',)
+
+@admin.register(IsbnRecord)
+class IsbnRecordAdmin(admin.ModelAdmin):
+    list_display = ('isbn', 'title', 'author', 'edition', 'published_year')
+    search_fields = ('title', 'author')
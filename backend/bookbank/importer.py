@@ -0,0 +1,126 @@
+"""
+Bulk import of book posts from CSV or JSON lines, for department
+libraries listing donated books.
+
+Rows are read one at a time and checked with BookPostSerializer, the same
+rules as a single post (ISBN normalization, catalog autofill, duplicate
+ISBNs). Valid rows are collected into batches of ``batch_size``, and each
+batch is inserted with one bulk_create in its own transaction, indexed for
+search, and published by bumping the BookPost generation. Memory stays
+flat whatever the file size: at most one batch of posts and the first
+BOOK_IMPORT_MAX_ERRORS row errors are held at a time. A failed row
+does not stop the import; it is reported with its line number.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from core.cache import bump_generation
+from search.index import index_created
+from .models import BookPost
+from .serializers import BookPostSerializer
+
+
+class ImportReport:
+    def __init__(self, max_errors):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def fail(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'created': self.created, 'failed': self.failed, 'errors': self.errors,
+            # Only the first max_errors failures are listed
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def clean_row(row, user):
+    """The row as serializer input: blank cells left out, contact email defaulted."""
+    data = {
+        key.strip(): value.strip() if isinstance(value, str) else value
+        for key, value in row.items() if key and value not in ('', None)
+    }
+    data.setdefault('contact_email', user.email)
+    return data
+
+
+def import_books(rows, user, request=None, batch_size=500, log=None):
+    """
+    Create a BookPost for every valid row (dicts of BookPostSerializer
+    fields) posted by user. rows are the (line number, row) pairs of
+    isbn.read_dump(..., on_error='yield'). Returns the ImportReport.
+    """
+    report = ImportReport(settings.BOOK_IMPORT_MAX_ERRORS)
+    # One serializer validates every row: building its fields costs more than validating
+    serializer = BookPostSerializer(context={'request': request})
+    batch = []
+    # ISBNs in the pending batch; earlier batches are caught by validate_isbn
+    pending_isbns = set()
+    for line, row in rows:
+        if isinstance(row, ValueError):
+            report.fail(line, {'non_field_errors': [f'Invalid JSON: {row}']})
+            continue
+        if not isinstance(row, dict):
+            report.fail(line, {'non_field_errors': ['Expected an object of book fields.']})
+            continue
+        try:
+            data = serializer.run_validation(clean_row(row, user))
+        except serializers.ValidationError as error:
+            report.fail(line, serializers.as_serializer_error(error))
+            continue
+        # Images are added to each post afterwards
+        data.pop('image', None)
+        if data.get('isbn') and data['isbn'] in pending_isbns:
+            report.fail(line, {'isbn': ['This ISBN appears earlier in the file.']})
+            continue
+        pending_isbns.add(data.get('isbn'))
+        batch.append((line, BookPost(posted_by=user, **data)))
+        if len(batch) >= batch_size:
+            save_batch(batch, report, log)
+            batch, pending_isbns = [], set()
+    save_batch(batch, report, log)
+    return report
+
+
+def save_batch(batch, report, log=None):
+    """Insert a batch of (line, post); rows that fail to insert are reported."""
+    if not batch:
+        return
+    posts = [post for _, post in batch]
+    try:
+        with transaction.atomic():
+            BookPost.objects.bulk_create(posts)
+            # bulk_create skips the signals that index posts for search
+            index_created(posts)
+    except IntegrityError:
+        # A post saved since the rows were validated took one of their ISBNs
+        posts = save_rows(batch, report)
+        with transaction.atomic():
+            index_created(posts)
+    bump_generation(BookPost)
+    report.created += len(posts)
+    if log:
+        log(f'Imported {report.created} book(s)')
+
+
+def save_rows(batch, report):
+    """Insert a batch of (line, post) one row at a time; returns the posts saved."""
+    saved = []
+    for line, post in batch:
+        try:
+            with transaction.atomic():
+                BookPost.objects.bulk_create([post])
+        except IntegrityError as error:
+            if post.isbn:
+                report.fail(line, {'isbn': ['A book with this ISBN already exists.']})
+            else:
+                report.fail(line, {'non_field_errors': [str(error)]})
+        else:
+            saved.append(post)
+    return saved
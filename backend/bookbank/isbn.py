@@ -0,0 +1,112 @@
+"""
+ISBN normalization and the offline catalog lookups behind book autofill.
+
+Every ISBN is stored and compared as its 13-digit form: ISBN-10s get the
+978 prefix and a new check digit, hyphens and spaces are dropped, and bad
+check digits are rejected. IsbnRecord keys the catalog on that number as
+an integer primary key, which SQLite keeps as the rowid: the table is its
+own index, with no separate index to store or search.
+
+lookup_isbn() answers from an in-process LRU cache, keyed by the ISBN and
+the IsbnRecord generation counter (core.cache), so reloading the catalog
+retires the cached answers; with the counters in a shared cache
+(CACHE_REDIS_URL) that holds for every worker.
+"""
+import csv
+import json
+from functools import lru_cache
+from django.conf import settings
+from core.cache import get_generations
+
+# Catalog fields a dump may carry, besides the ISBN
+RECORD_FIELDS = ('title', 'author', 'edition', 'publisher', 'published_year')
+
+
+class InvalidIsbn(ValueError):
+    pass
+
+
+def isbn13_check_digit(digits):
+    total = sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def isbn10_check_digit(digits):
+    total = sum(int(digit) * (10 - index) for index, digit in enumerate(digits[:9]))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def normalize_isbn(text):
+    """The 13-digit form of an ISBN-10 or ISBN-13; raises InvalidIsbn."""
+    value = ''.join(char for char in str(text or '') if char not in ' -').upper()
+    if len(value) == 10 and value[:9].isdigit() and (value[9].isdigit() or value[9] == 'X'):
+        if isbn10_check_digit(value) != value[9]:
+            raise InvalidIsbn('The ISBN-10 check digit is wrong.')
+        value = '978' + value[:9]
+        return value + isbn13_check_digit(value)
+    if len(value) == 13 and value.isdigit() and value[:3] in ('978', '979'):
+        if isbn13_check_digit(value) != value[12]:
+            raise InvalidIsbn('The ISBN-13 check digit is wrong.')
+        return value
+    raise InvalidIsbn('Enter a 10 or 13 digit ISBN.')
+
+
+def isbn10_of(isbn13):
+    """The ISBN-10 form of a 978 ISBN-13, or None (979 ISBNs have none)."""
+    if not isbn13.startswith('978'):
+        return None
+    digits = isbn13[3:12]
+    return digits + isbn10_check_digit(digits)
+
+
+def record_data(record):
+    return {
+        'isbn': str(record.isbn), 'isbn10': isbn10_of(str(record.isbn)),
+        **{field: getattr(record, field) for field in RECORD_FIELDS},
+    }
+
+
+@lru_cache(maxsize=settings.ISBN_LOOKUP_CACHE_SIZE)
+def cached_record(isbn, generation):
+    from .models import IsbnRecord
+
+    record = IsbnRecord.objects.filter(isbn=int(isbn)).first()
+    return None if record is None else record_data(record)
+
+
+def lookup_isbn(text):
+    """
+    Catalog metadata for an ISBN in any accepted form, or None when it is
+    not in the catalog. Raises InvalidIsbn.
+    """
+    from .models import IsbnRecord
+
+    isbn = normalize_isbn(text)
+    generation, = get_generations([IsbnRecord])
+    return cached_record(isbn, generation)
+
+
+def read_dump(file, dump_format, on_error='raise'):
+    """
+    Yield (line number, row) per row of a CSV (with a header row) or JSON
+    lines file, such as a catalog dump or a book import. A line that is not
+    valid JSON raises ValueError naming it, or with on_error='yield' is
+    yielded as (line number, that ValueError) and reading goes on.
+    """
+    if dump_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            if on_error != 'yield':
+                raise ValueError(f'Line {line}: {error}')
+            yield line, error
+            continue
+        yield line, row
@@ -0,0 +1,41 @@
+import csv
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from bookbank.importer import import_books
+from bookbank.isbn import read_dump
+
+
+class Command(BaseCommand):
+    help = (
+        'Create book posts from a CSV (with a header row) or JSON lines file of BookPost fields, '
+        'validated like single posts and inserted in batches. Rows that fail are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Email of the user who posts the books')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=settings.BOOK_IMPORT_BATCH_SIZE, help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}.")
+        dump_format = options['format'] or ('csv' if options['path'].lower().endswith('.csv') else 'jsonl')
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as file:
+                report = import_books(
+                    read_dump(file, dump_format, on_error='yield'), user,
+                    batch_size=options['batch_size'], log=self.stdout.write
+                )
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(f"Cannot read {options['path']}: {error}")
+
+        for failure in report.errors:
+            self.stdout.write(self.style.WARNING(f"Line {failure['line']}: {failure['errors']}"))
+        if report.failed > len(report.errors):
+            self.stdout.write(f'... and {report.failed - len(report.errors)} more failed row(s)')
+        self.stdout.write(self.style.SUCCESS(f'{report.created} book(s) created, {report.failed} row(s) failed'))
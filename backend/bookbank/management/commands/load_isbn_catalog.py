@@ -0,0 +1,67 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from bookbank.isbn import RECORD_FIELDS, InvalidIsbn, normalize_isbn, read_dump
+from bookbank.models import IsbnRecord
+from core.cache import bump_generation
+
+
+class Command(BaseCommand):
+    help = (
+        'Load an ISBN catalog dump (JSON lines or CSV with isbn, title, author, edition, publisher '
+        'and published_year) into the offline catalog. Rows already there are updated; rows with '
+        'an invalid ISBN or no title are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        dump_format = options['format'] or ('csv' if options['path'].lower().endswith('.csv') else 'jsonl')
+        if not os.path.exists(options['path']):
+            raise CommandError(f"{options['path']} does not exist.")
+        loaded = skipped = 0
+        batch = {}
+        with open(options['path'], newline='', encoding='utf-8') as dump, transaction.atomic():
+            try:
+                for _, row in read_dump(dump, dump_format):
+                    record = self.make_record(row)
+                    if record is None:
+                        skipped += 1
+                        continue
+                    # A later row for the same ISBN wins
+                    batch[record.isbn] = record
+                    if len(batch) >= options['batch_size']:
+                        loaded += self.save(batch)
+                        batch = {}
+            except ValueError as error:
+                raise CommandError(str(error))
+            loaded += self.save(batch)
+        bump_generation(IsbnRecord)
+        self.stdout.write(self.style.SUCCESS(f'{loaded} record(s) loaded, {skipped} skipped'))
+
+    def make_record(self, row):
+        if not isinstance(row, dict):
+            return None
+        try:
+            isbn = normalize_isbn(row.get('isbn'))
+        except InvalidIsbn:
+            return None
+        values = {field: str(row.get(field) or '').strip() for field in RECORD_FIELDS}
+        if not values['title']:
+            return None
+        year = values.pop('published_year')
+        for field in ('title', 'author', 'edition', 'publisher'):
+            values[field] = values[field][:IsbnRecord._meta.get_field(field).max_length]
+        return IsbnRecord(
+            isbn=int(isbn), published_year=int(year) if year.isdigit() and int(year) < 32768 else None, **values
+        )
+
+    def save(self, batch):
+        IsbnRecord.objects.bulk_create(
+            batch.values(), update_conflicts=True, unique_fields=['isbn'],
+            update_fields=list(RECORD_FIELDS)
+        )
+        return len(batch)
@@ -0,0 +1,44 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_primary_image(apps, schema_editor):
+    """Point every BookPost at its primary image, picking the oldest image when none is flagged."""
+    BookPost = apps.get_model('bookbank', 'BookPost')
+    BookImage = apps.get_model('bookbank', 'BookImage')
+    images = BookImage.objects.order_by('book_id', '-is_primary', 'uploaded_at', 'pk')
+    current = None
+    for image_id, book_id in images.values_list('pk', 'book_id'):
+        if book_id == current:
+            continue
+        current = book_id
+        BookPost.objects.filter(pk=book_id).update(primary_image_id=image_id)
+        BookImage.objects.filter(book_id=book_id).exclude(pk=image_id).update(is_primary=False)
+        BookImage.objects.filter(pk=image_id).update(is_primary=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookbank', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='bookimage',
+            options={'ordering': ['-is_primary', 'uploaded_at'], 'verbose_name': 'Book Image', 'verbose_name_plural': 'Book Images'},
+        ),
+        migrations.AddField(
+            model_name='bookpost',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bookbank.bookimage'),
+        ),
+        migrations.AlterField(
+            model_name='bookimage',
+            name='image',
+            field=models.ImageField(upload_to='bookbank/'),
+        ),
+        migrations.RunPython(backfill_primary_image, migrations.RunPython.noop),
+    ]
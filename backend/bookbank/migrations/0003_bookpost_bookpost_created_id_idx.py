@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookbank', '0002_bookpost_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookpost',
+            index=models.Index(fields=['created_at', 'id'], name='bookpost_created_id_idx'),
+        ),
+    ]
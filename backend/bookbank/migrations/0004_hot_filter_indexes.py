@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookbank', '0003_bookpost_bookpost_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookpost',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['department', 'created_at', 'id'], name='bookpost_available_dept_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookbank', '0005_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookrequest',
+            index=models.Index(fields=['requested_by', '-created_at'], name='bookrequest_outbox_idx'),
+        ),
+    ]
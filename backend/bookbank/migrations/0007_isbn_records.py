@@ -0,0 +1,27 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookbank', '0006_book_request_outbox_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IsbnRecord',
+            fields=[
+                ('isbn', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ISBN')),
+                ('title', models.CharField(max_length=300)),
+                ('author', models.CharField(blank=True, max_length=300)),
+                ('edition', models.CharField(blank=True, max_length=50)),
+                ('publisher', models.CharField(blank=True, max_length=200)),
+                ('published_year', models.PositiveSmallIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'ISBN record',
+            },
+        ),
+    ]
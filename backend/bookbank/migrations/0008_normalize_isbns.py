@@ -0,0 +1,44 @@
+import sys
+from django.db import migrations
+
+
+def normalize_isbns(apps, schema_editor):
+    """
+    Store existing ISBNs in their 13-digit form, as new posts are. ISBNs
+    that are not valid, or whose 13 digits another post already has, are
+    left as they are and listed for someone to fix by hand.
+    """
+    from bookbank.isbn import InvalidIsbn, normalize_isbn
+
+    BookPost = apps.get_model('bookbank', 'BookPost')
+    BookPost.objects.filter(isbn='').update(isbn=None)
+    posts = list(BookPost.objects.exclude(isbn=None).order_by('created_at', 'pk').values_list('pk', 'isbn'))
+    taken = {isbn for _, isbn in posts}
+    problems = []
+    for pk, isbn in posts:
+        try:
+            normalized = normalize_isbn(isbn)
+        except InvalidIsbn as error:
+            problems.append(f'{pk}: {isbn!r} is not a valid ISBN ({error})')
+            continue
+        if normalized == isbn:
+            continue
+        if normalized in taken:
+            problems.append(f'{pk}: {isbn!r} is the same book as another post\'s {normalized}')
+            continue
+        BookPost.objects.filter(pk=pk).update(isbn=normalized)
+        taken.discard(isbn)
+        taken.add(normalized)
+    if problems:
+        sys.stdout.write('\n  Book post ISBNs left as they were:\n' + ''.join(f'    {line}\n' for line in problems))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookbank', '0007_isbn_records'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_isbns, migrations.RunPython.noop),
+    ]
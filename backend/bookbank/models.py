@@ -2,6 +2,7 @@ import uuid
 from django.db import models
 from django.utils import timezone
 from accounts.models import User
+from core.models import ImageDerivativesMixin, PrimaryImageMixin
 
 class BookPost(models.Model):
     CONDITION_CHOICES = [
@@ -31,6 +32,13 @@ class BookPost(models.Model):
     contact_email = models.EmailField()
     contact_phone = models.CharField(max_length=15, blank=True, null=True)
     is_available = models.BooleanField(default=True)
+    primary_image = models.ForeignKey(
+        'BookImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -38,6 +46,16 @@ class BookPost(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Book Post'
         verbose_name_plural = 'Book Posts'
+        indexes = [
+            # Keyset pagination walks (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='bookpost_created_id_idx'),
+            # Available books by department, newest first (see advise_indexes). Partial
+            # because SQLite cannot seek on Django's bare boolean WHERE terms
+            models.Index(
+                fields=['department', 'created_at', 'id'], name='bookpost_available_dept_idx',
+                condition=models.Q(is_available=True)
+            ),
+        ]
     
     def __str__(self):
         price_info = f" - ${self.price}" if self.price and self.transaction_type == 'sell' else ''
@@ -48,7 +66,9 @@ class BookPost(models.Model):
             self.contact_email = self.posted_by.email
         super().save(*args, **kwargs)
 
-class BookImage(models.Model):
+class BookImage(PrimaryImageMixin, ImageDerivativesMixin):
+    parent_field = 'book'
+
     book = models.ForeignKey(BookPost, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='bookbank/')
     is_primary = models.BooleanField(default=False)
@@ -61,12 +81,6 @@ class BookImage(models.Model):
     
     def __str__(self):
         return f"Image for {self.book.title}"
-    
-    def save(self, *args, **kwargs):
-        # If this is the first image for the book, set it as primary
-        if not self.pk and not self.book.images.exists():
-            self.is_primary = True
-        super().save(*args, **kwargs)
 
 class BookRequest(models.Model):
     STATUS_CHOICES = [
@@ -87,6 +101,10 @@ class BookRequest(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['book', 'requested_by']
+        indexes = [
+            # A user's outbox, newest first
+            models.Index(fields=['requested_by', '-created_at'], name='bookrequest_outbox_idx'),
+        ]
     
     def __str__(self):
         return f"{self.requested_by.name}'s request for {self.book.title}"
@@ -97,3 +115,23 @@ class BookRequest(models.Model):
             self.book.is_available = False
             self.book.save()
         super().save(*args, **kwargs)
+
+
+class IsbnRecord(models.Model):
+    """
+    One book of the offline ISBN catalog (see bookbank/isbn.py), used to
+    autofill book posts. Loaded in bulk by `manage.py load_isbn_catalog`.
+    """
+    # The ISBN-13 as a number, so SQLite stores the table keyed by its rowid
+    isbn = models.BigIntegerField('ISBN', primary_key=True)
+    title = models.CharField(max_length=300)
+    author = models.CharField(max_length=300, blank=True)
+    edition = models.CharField(max_length=50, blank=True)
+    publisher = models.CharField(max_length=200, blank=True)
+    published_year = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'ISBN record'
+
+    def __str__(self):
+        return f'{self.isbn}: {self.title}'
@@ -1,11 +1,16 @@
 from rest_framework import serializers
+from .isbn import InvalidIsbn, lookup_isbn, normalize_isbn
 from .models import BookPost, BookImage, BookRequest
 from accounts.serializers import UserSerializer
+from core.images import ImageSizesField, ImageSrcsetField
 
 class BookImageSerializer(serializers.ModelSerializer):
+    sizes = ImageSizesField()
+    srcset = ImageSrcsetField()
+
     class Meta:
         model = BookImage
-        fields = ['id', 'image', 'is_primary', 'uploaded_at']
+        fields = ['id', 'image', 'sizes', 'srcset', 'is_primary', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at', 'is_primary']
 
 class BookPostSerializer(serializers.ModelSerializer):
@@ -35,14 +40,51 @@ class BookPostSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'posted_by']
         extra_kwargs = {
-            'isbn': {'required': False, 'allow_blank': True, 'allow_null': True},
+            # Filled in from the ISBN catalog when left out
+            'title': {'required': False},
+            'author': {'required': False},
+            # Room for hyphens; validate_isbn stores the 13 digits and checks
+            # those, not the spelling sent, are unique
+            'isbn': {
+                'required': False, 'allow_blank': True, 'allow_null': True, 'max_length': 17, 'validators': [],
+            },
             'description': {'required': False, 'allow_blank': True},
             'contact_phone': {'required': False, 'allow_blank': True, 'allow_null': True},
         }
     
+    def validate_isbn(self, value):
+        """Store ISBNs in their 13-digit form, so each book has one spelling."""
+        if not value:
+            return None
+        try:
+            value = normalize_isbn(value)
+        except InvalidIsbn as error:
+            raise serializers.ValidationError(str(error))
+        duplicates = BookPost.objects.filter(isbn=value)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError('A book with this ISBN already exists.')
+        return value
+
+    def validate(self, data):
+        if self.instance is None:
+            record = lookup_isbn(data['isbn']) if data.get('isbn') else None
+            missing = {}
+            for field in ('title', 'author'):
+                if not data.get(field):
+                    if record and record[field]:
+                        # The catalog allows longer values than a post
+                        data[field] = record[field][:BookPost._meta.get_field(field).max_length]
+                    else:
+                        missing[field] = ['This field is required.']
+            if missing:
+                raise serializers.ValidationError(missing)
+        return data
+
     def get_primary_image(self, obj):
         """Get the URL of the primary image if it exists."""
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = obj.primary_image
         if primary_image and primary_image.image:
             request = self.context.get('request')
             if request is not None:
@@ -74,11 +116,8 @@ class BookPostSerializer(serializers.ModelSerializer):
         # Update the book
         book = super().update(instance, validated_data)
         
-        # Add new image if provided
+        # Add new image if provided; it replaces the current primary image
         if image_file:
-            # Mark existing primary image as not primary
-            book.images.filter(is_primary=True).update(is_primary=False)
-            # Create new primary image
             BookImage.objects.create(book=book, image=image_file, is_primary=True)
             
         return book
@@ -86,12 +125,13 @@ class BookPostSerializer(serializers.ModelSerializer):
 class BookRequestSerializer(serializers.ModelSerializer):
     requested_by = UserSerializer(read_only=True)
     book = serializers.PrimaryKeyRelatedField(queryset=BookPost.objects.all())
+    book_title = serializers.CharField(source='book.title', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
         model = BookRequest
         fields = [
-            'id', 'book', 'requested_by', 'message', 'status', 'status_display',
+            'id', 'book', 'book_title', 'requested_by', 'message', 'status', 'status_display',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
@@ -1,9 +1,23 @@
-from django.test import TestCase
+import importlib
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
-from .models import BookPost, BookImage, BookRequest
+from core.cache import bump_generation
+from search.index import search
+from .importer import import_books
+from .isbn import InvalidIsbn, lookup_isbn, normalize_isbn
+from .models import BookPost, BookImage, BookRequest, IsbnRecord
+from .serializers import BookPostSerializer
 
 User = get_user_model()
 
@@ -104,3 +118,338 @@ class BookPostTests(APITestCase):
         
         self.assertEqual(request.status, 'rejected')
         self.assertTrue(self.book.is_available)
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class BookPrimaryImageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            name='Owner',
+            mobile='1234567890',
+            password='testpass123'
+        )
+        self.book = BookPost.objects.create(
+            title='Test Book',
+            author='Test Author',
+            department='Physics',
+            posted_by=self.user,
+            contact_email='owner@example.com'
+        )
+
+    def add_image(self, **kwargs):
+        upload = SimpleUploadedFile('cover.gif', b'GIF89a', content_type='image/gif')
+        return BookImage.objects.create(book=self.book, image=upload, **kwargs)
+
+    def test_first_image_becomes_primary(self):
+        first = self.add_image()
+        second = self.add_image()
+        self.book.refresh_from_db()
+        self.assertTrue(first.is_primary)
+        self.assertFalse(second.is_primary)
+        self.assertEqual(self.book.primary_image, first)
+
+    def test_make_primary_repoints_book(self):
+        first = self.add_image()
+        second = self.add_image()
+        second.make_primary()
+        first.refresh_from_db()
+        self.book.refresh_from_db()
+        self.assertFalse(first.is_primary)
+        self.assertEqual(self.book.primary_image, second)
+
+    def test_unsetting_primary_promotes_next_image(self):
+        first = self.add_image()
+        second = self.add_image()
+        # A stale copy of the book that doesn't know first is its primary image
+        first.book = BookPost.objects.get(pk=self.book.pk)
+        first.book.primary_image = None
+        first.is_primary = False
+        first.save()
+        second.refresh_from_db()
+        self.book.refresh_from_db()
+        self.assertTrue(second.is_primary)
+        self.assertEqual(self.book.primary_image, second)
+
+        # The last image of a gallery leaves it without one
+        second.delete()
+        first.refresh_from_db()
+        first.is_primary = False
+        first.save()
+        self.book.refresh_from_db()
+        self.assertIsNone(self.book.primary_image)
+
+    def test_deleting_primary_promotes_next_image(self):
+        first = self.add_image()
+        second = self.add_image()
+        first.delete()
+        second.refresh_from_db()
+        self.book.refresh_from_db()
+        self.assertTrue(second.is_primary)
+        self.assertEqual(self.book.primary_image, second)
+
+        second.delete()
+        self.book.refresh_from_db()
+        self.assertIsNone(self.book.primary_image)
+
+    def test_list_resolves_primary_image_without_per_row_queries(self):
+        self.add_image()
+        other = BookPost.objects.create(
+            title='Other Book',
+            author='Other Author',
+            department='Physics',
+            posted_by=self.user,
+            contact_email='owner@example.com'
+        )
+        BookImage.objects.create(
+            book=other,
+            image=SimpleUploadedFile('other.gif', b'GIF89a', content_type='image/gif')
+        )
+        client = APIClient()
+        # Page count, page rows and images; the ETag needs no query of its own
+        with self.assertNumQueries(3):
+            response = client.get(reverse('book-list'))
+        for book in response.data['results']:
+            self.assertTrue(book['primary_image'].endswith('.gif'))
+
+
+class BookRequestMailboxTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email='owner@example.com', name='Owner', mobile='1234567890', password='testpass123'
+        )
+        self.readers = [
+            User.objects.create_user(
+                email=f'reader{i}@example.com', name=f'Reader {i}', mobile=f'555000000{i}', password='testpass123'
+            )
+            for i in range(3)
+        ]
+        self.books = [
+            BookPost.objects.create(
+                title=f'Book {i}', author='Author', department='Physics',
+                posted_by=self.owner, contact_email='owner@example.com'
+            )
+            for i in range(2)
+        ]
+        for reader, book, request_status in [
+            (self.readers[0], self.books[0], 'pending'),
+            (self.readers[1], self.books[0], 'pending'),
+            (self.readers[2], self.books[1], 'rejected'),
+        ]:
+            BookRequest.objects.create(book=book, requested_by=reader, status=request_status)
+        # The owner asks a reader for a book too
+        self.readers_book = BookPost.objects.create(
+            title='Reader book', author='Author', department='Physics',
+            posted_by=self.readers[0], contact_email='reader0@example.com'
+        )
+        BookRequest.objects.create(book=self.readers_book, requested_by=self.owner)
+        self.client.force_authenticate(user=self.owner)
+
+    def test_incoming(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('book-request-incoming'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['counts'], {'pending': 2, 'accepted': 0, 'rejected': 1, 'completed': 0})
+        self.assertEqual({row['book_title'] for row in response.data['results']}, {'Book 0', 'Book 1'})
+
+    def test_outgoing_and_status_filter(self):
+        response = self.client.get(reverse('book-request-outgoing'))
+        self.assertEqual([row['book_title'] for row in response.data['results']], ['Reader book'])
+        self.assertEqual(response.data['counts']['pending'], 1)
+
+        response = self.client.get(reverse('book-request-incoming'), {'status': 'pending'})
+        self.assertEqual(response.data['count'], 2)
+        # The badges still count every status
+        self.assertEqual(response.data['counts']['rejected'], 1)
+        response = self.client.get(reverse('book-request-incoming'), {'status': 'lost'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class IsbnCatalogTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='seller@example.com', name='Seller', mobile='1234567890', password='testpass123'
+        )
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.load('catalog.jsonl', '\n'.join([
+            '{"isbn": "978-0-321-88407-7", "title": "Calculus", "author": "Spivak", "edition": "4th"}',
+            '{"isbn": "0131103628", "title": "The C Programming Language", "author": "Kernighan, Ritchie"}',
+            '{"isbn": "12345", "title": "Not a book"}',
+        ]))
+
+    def tearDown(self):
+        # Rolled back records must not linger in the lookup cache
+        bump_generation(IsbnRecord)
+
+    def load(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as dump:
+            dump.write(content)
+        out = io.StringIO()
+        call_command('load_isbn_catalog', path, stdout=out)
+        return out.getvalue()
+
+    def test_normalize_isbn(self):
+        self.assertEqual(normalize_isbn('0-13-110362-8'), '9780131103627')
+        self.assertEqual(normalize_isbn('978 0131103627'), '9780131103627')
+        self.assertEqual(normalize_isbn('080442957x'), '9780804429573')
+        for bad in ['0131103629', '9780131103620', '12345', '']:
+            with self.assertRaises(InvalidIsbn):
+                normalize_isbn(bad)
+
+    def test_lookup(self):
+        url = reverse('isbn-lookup', args=['0-13-110362-8'])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['isbn'], '9780131103627')
+        self.assertEqual(response.data['isbn10'], '0131103628')
+        self.assertEqual(response.data['author'], 'Kernighan, Ritchie')
+        # Answered from the process's cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('isbn-lookup', args=['9780131103620'])).status_code, 400)
+        self.assertEqual(self.client.get(reverse('isbn-lookup', args=['9780262033848'])).status_code, 404)
+
+    def test_reload_updates_lookups(self):
+        self.assertEqual(lookup_isbn('9780321884077')['edition'], '4th')
+        out = self.load('update.csv', 'isbn,title,author,edition,published_year\n9780321884077,Calculus,Spivak,5th,2024\n')
+        self.assertIn('1 record(s) loaded, 0 skipped', out)
+        self.assertEqual(lookup_isbn('9780321884077')['edition'], '5th')
+        self.assertEqual(IsbnRecord.objects.count(), 2)
+
+    def test_book_post_autofill(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('book-list'), {
+            'isbn': '0-13-110362-8', 'department': 'Computer Science', 'contact_email': 'seller@example.com',
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['isbn'], '9780131103627')
+        self.assertEqual(response.data['title'], 'The C Programming Language')
+        self.assertEqual(response.data['author'], 'Kernighan, Ritchie')
+
+        # Another spelling of the same ISBN is the same book
+        response = self.client.post(reverse('book-list'), {
+            'isbn': '9780131103627', 'department': 'Computer Science', 'contact_email': 'seller@example.com',
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('isbn', response.data)
+        response = self.client.post(reverse('book-list'), {
+            'isbn': '9780262033848', 'department': 'Computer Science', 'contact_email': 'seller@example.com',
+        }, format='multipart')
+        self.assertEqual(set(response.data), {'title', 'author'})
+
+    def test_autofill_fits_the_post(self):
+        IsbnRecord.objects.filter(isbn=9780131103627).update(title='C' * 300)
+        bump_generation(IsbnRecord)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('book-list'), {
+            'isbn': '0131103628', 'department': 'Computer Science', 'contact_email': 'seller@example.com',
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(len(response.data['title']), BookPost._meta.get_field('title').max_length)
+
+    def test_bad_dump_lines_are_named(self):
+        for content, line in [('not json\n', 1), ('{"isbn": "0131103628", "title": "C"}\n\n{oops\n', 3)]:
+            with self.assertRaisesMessage(CommandError, f'Line {line}:'):
+                self.load('bad.jsonl', content)
+
+    def test_existing_isbns_are_normalized(self):
+        migration = importlib.import_module('bookbank.migrations.0008_normalize_isbns')
+
+        def post(isbn):
+            return BookPost.objects.create(
+                title='Book', author='Author', department='Physics', posted_by=self.user,
+                contact_email='seller@example.com', isbn=isbn
+            )
+
+        old, spelled, clash, bad = post('0-13-110362-8'), post('978-0-321-88407-7'), post('9780321884077'), post('123')
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+            migration.normalize_isbns(apps, None)
+        isbns = dict(BookPost.objects.values_list('pk', 'isbn'))
+        self.assertEqual(isbns[old.pk], '9780131103627')
+        # The 13 digits are taken, so both odd spellings are reported
+        self.assertEqual(isbns[spelled.pk], '978-0-321-88407-7')
+        self.assertEqual(isbns[clash.pk], '9780321884077')
+        self.assertEqual(isbns[bad.pk], '123')
+        self.assertIn(str(spelled.pk), out.getvalue())
+        self.assertIn(str(bad.pk), out.getvalue())
+
+
+class BookImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='library@example.com', name='Library', mobile='1234567890', password='testpass123'
+        )
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def test_import_endpoint(self):
+        content = (
+            'title,author,isbn,department,price,condition\n'
+            'Linear Algebra,Strang,978-0-980232-77-6,Mathematics,250,good\n'
+            'No author,,,Mathematics,,\n'
+            'Bad ISBN,Someone,9780131103620,Mathematics,,\n'
+            'Thermodynamics,Cengel,,Mechanical,,new\n'
+        )
+        upload = SimpleUploadedFile('donations.csv', content.encode(), content_type='text/csv')
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('book-bulk-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4])
+        self.assertIn('author', response.data['errors'][0]['errors'])
+        self.assertIn('isbn', response.data['errors'][1]['errors'])
+
+        book = BookPost.objects.get(title='Linear Algebra')
+        self.assertEqual(book.isbn, '9780980232776')
+        self.assertEqual(book.posted_by, self.user)
+        self.assertEqual(book.contact_email, 'library@example.com')
+        # Bulk inserted rows are searchable straight away
+        counts, _ = search('strang')
+        self.assertEqual(counts, {'book': 1})
+
+    def test_import_command_batches(self):
+        path = os.path.join(self.tmpdir, 'donations.jsonl')
+        with open(path, 'w') as dump:
+            dump.write('\n'.join([
+                '{"title": "Book 1", "author": "A", "department": "Physics", "isbn": "0131103628"}',
+                '{"title": "Book 2", "author": "A", "department": "Physics"}',
+                'not json',
+                '{"title": "Book 3", "author": "A", "department": "Physics", "isbn": "9780131103627"}',
+                '{"title": "Book 4", "author": "A", "department": "Physics"}',
+                '["not", "an", "object"]',
+            ]))
+        out = io.StringIO()
+        call_command('import_books', path, '--user', 'library@example.com', '--batch-size', '2', stdout=out)
+        self.assertIn('3 book(s) created, 3 row(s) failed', out.getvalue())
+        self.assertEqual(set(BookPost.objects.values_list('title', flat=True)), {'Book 1', 'Book 2', 'Book 4'})
+        # Book 3 repeats Book 1's ISBN, imported in the previous batch
+        self.assertIn('Line 4', out.getvalue())
+
+    def test_isbns_taken_during_the_import_are_reported(self):
+        rows = [
+            (2, {'title': 'Book 1', 'author': 'A', 'department': 'Physics', 'isbn': '0131103628'}),
+            (3, {'title': 'Book 2', 'author': 'A', 'department': 'Physics'}),
+        ]
+        # As if another request posted the book after the rows were validated
+        skip_duplicates = mock.patch.object(
+            BookPostSerializer, 'validate_isbn', lambda self, value: normalize_isbn(value)
+        )
+        with skip_duplicates:
+            BookPost.objects.create(
+                title='Book 0', author='A', department='Physics', posted_by=self.user,
+                contact_email='library@example.com', isbn='9780131103627'
+            )
+            report = import_books(rows, self.user)
+        self.assertEqual((report.created, report.failed), (1, 1))
+        self.assertEqual(report.errors, [{'line': 2, 'errors': {'isbn': ['A book with this ISBN already exists.']}}])
+        self.assertTrue(BookPost.objects.filter(title='Book 2').exists())
@@ -1,14 +1,27 @@
+import csv
+import io
+from django.conf import settings
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
+from .importer import import_books
+from .isbn import InvalidIsbn, lookup_isbn, read_dump
 from .models import BookPost, BookImage, BookRequest
 from .serializers import BookPostSerializer, BookImageSerializer, BookRequestSerializer
 from accounts.permissions import IsOwnerOrReadOnly
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.galleries import GalleryUploadMixin
+from core.pagination import KeysetPagination
 
-class BookImageViewSet(viewsets.ModelViewSet):
+class BookImageViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing book images.
     Allows adding and removing images from books.
@@ -16,6 +29,8 @@ class BookImageViewSet(viewsets.ModelViewSet):
     serializer_class = BookImageSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     parser_classes = [MultiPartParser, FormParser]
+    last_modified_field = 'uploaded_at'
+    cache_dependencies = ['bookbank.BookImage']
 
     def get_queryset(self):
         # Only return images for books owned by the current user
@@ -25,7 +40,7 @@ class BookImageViewSet(viewsets.ModelViewSet):
         book = get_object_or_404(BookPost, id=self.request.data.get('book'))
         if book.posted_by != self.request.user:
             raise permissions.PermissionDenied("You don't have permission to add images to this book.")
-        serializer.save()
+        serializer.save(book=book)
 
     @action(detail=True, methods=['post'])
     def set_primary(self, request, pk=None):
@@ -37,24 +52,30 @@ class BookImageViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Set all images for this book as not primary
-        BookImage.objects.filter(book=image.book).update(is_primary=False)
-        # Set this image as primary
-        image.is_primary = True
-        image.save()
+        # Clears the other images' flags and repoints the book's primary_image
+        image.make_primary()
         
         return Response({'status': 'primary image set'})
 
 
-class BookPostViewSet(viewsets.ModelViewSet):
+class BookPostViewSet(CachedResponseMixin, ConditionalGetMixin, GalleryUploadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing book posts.
     Handles CRUD operations for books, including image uploads.
     """
-    queryset = BookPost.objects.all()
+    queryset = BookPost.objects.select_related(
+        'posted_by', 'primary_image'
+    ).prefetch_related('images')
     serializer_class = BookPostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['is_available', 'department']
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
+    cursor_ordering = '-created_at'
+    cache_dependencies = ['bookbank.BookPost', 'bookbank.BookImage', 'accounts.User']
+    gallery_image_model = BookImage
+    gallery_image_serializer = BookImageSerializer
     
     def get_serializer_context(self):
         """
@@ -67,6 +88,33 @@ class BookPostViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(posted_by=self.request.user)
 
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        permission_classes=[permissions.IsAuthenticated], parser_classes=[MultiPartParser]
+    )
+    def bulk_import(self, request):
+        """
+        Create a book post, owned by the user, for every row of the uploaded
+        ``file`` (.csv with a header row, or JSON lines). Returns how many
+        were created and the errors of the rows that were not.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['Upload a CSV or JSON lines file.']}, status=status.HTTP_400_BAD_REQUEST)
+        dump_format = 'csv' if upload.name.lower().endswith('.csv') else 'jsonl'
+        rows = read_dump(
+            io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''), dump_format, on_error='yield'
+        )
+        try:
+            report = import_books(rows, request.user, request, settings.BOOK_IMPORT_BATCH_SIZE)
+        except (UnicodeDecodeError, csv.Error) as error:
+            # Batches before the unreadable part stay imported
+            return Response({'file': [f'Cannot read the file: {error}']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            report.as_dict(),
+            status=status.HTTP_201_CREATED if report.created else status.HTTP_400_BAD_REQUEST
+        )
+
     @action(detail=True, methods=['post'])
     def request_book(self, request, pk=None):
         book = self.get_object()
@@ -98,18 +146,51 @@ class BookPostViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class BookRequestViewSet(viewsets.ModelViewSet):
+class BookRequestViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = BookRequestSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    cache_dependencies = ['bookbank.BookRequest', 'accounts.User']
 
     def get_queryset(self):
+        queryset = BookRequest.objects.select_related('book', 'requested_by')
+        # The inbox and outbox each filter on one indexed column
+        if self.action == 'incoming':
+            return queryset.filter(book__posted_by=self.request.user)
+        if self.action == 'outgoing':
+            return queryset.filter(requested_by=self.request.user)
         # Users can see requests they made or received
-        return BookRequest.objects.filter(
-            requested_by=self.request.user
-        ) | BookRequest.objects.filter(
-            book__posted_by=self.request.user
-        )
+        return queryset.filter(Q(requested_by=self.request.user) | Q(book__posted_by=self.request.user))
+
+    def mailbox(self, request):
+        """
+        One page of the inbox or outbox, optionally of one ?status=, with
+        the number of requests in each status for the badges.
+        """
+        queryset = self.get_queryset()
+        statuses = [choice for choice, _ in BookRequest.STATUS_CHOICES]
+        counts = dict.fromkeys(statuses, 0)
+        counts.update(queryset.order_by().values_list('status').annotate(total=Count('pk')))
+
+        status_filter = request.query_params.get('status')
+        if status_filter:
+            if status_filter not in statuses:
+                raise ValidationError({'status': [f"Must be one of: {', '.join(statuses)}."]})
+            queryset = queryset.filter(status=status_filter)
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['counts'] = counts
+        return response
+
+    @action(detail=False, methods=['get'])
+    def incoming(self, request):
+        """Requests for the user's books, newest first."""
+        return self.mailbox(request)
+
+    @action(detail=False, methods=['get'])
+    def outgoing(self, request):
+        """Requests the user made, newest first."""
+        return self.mailbox(request)
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -136,3 +217,23 @@ class BookRequestViewSet(viewsets.ModelViewSet):
         book_request.status = 'rejected'
         book_request.save()
         return Response({'status': 'request rejected'})
+
+
+class IsbnLookupView(APIView):
+    """
+    GET /api/bookbank/isbn/<isbn>/
+
+    Title, author and edition of a book in the offline ISBN catalog, for
+    filling in a new book post. Takes ISBN-10 or ISBN-13, with or without
+    hyphens.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, isbn):
+        try:
+            record = lookup_isbn(isbn)
+        except InvalidIsbn as error:
+            return Response({'isbn': [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+        if record is None:
+            return Response({'detail': 'This ISBN is not in the catalog.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(record)
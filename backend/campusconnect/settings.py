@@ -44,14 +44,18 @@ INSTALLED_APPS = [
     'django_filters',
     
     # Local apps
+    'core',
     'accounts',
+    'locations',
     'lostfound',
     'roommate',
     'bookbank',
     'noticeboard',
+    'search',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -217,7 +221,99 @@ AUTH_USER_MODEL = 'accounts.User'
 # Media files (user uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Uploads are stored once per distinct content under media/blobs/ (see core/storage.py)
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Media is served by core.media.serve_media in every environment. Files other
+# than content-addressed blobs (which are immutable) are cached this long
+MEDIA_CACHE_MAX_AGE = 3600
+# 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, lighttpd) to let the
+# front proxy send the file after Django has checked access; None sends it here
+MEDIA_SENDFILE_HEADER = os.getenv('MEDIA_SENDFILE_HEADER') or None
+# nginx `internal` location aliased to MEDIA_ROOT, for X-Accel-Redirect
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Signed URLs of private media (lost & found photos) are valid for at least
+# PRIVATE_MEDIA_URL_MAX_AGE seconds; expiries are rounded up to
+# PRIVATE_MEDIA_URL_BUCKET so URLs stay the same, and cacheable, for a while
+PRIVATE_MEDIA_URL_MAX_AGE = 6 * 3600
+PRIVATE_MEDIA_URL_BUCKET = 3600
 
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Resumable chunked uploads (see core/uploads.py): staging directory, largest
+# chunk per PUT, largest file, and how long an idle session is kept
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'upload_sessions')
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024  # 50MB
+CHUNKED_UPLOAD_EXPIRY = timedelta(hours=24)
+# Most files one upload_images request may add to a gallery
+GALLERY_BATCH_MAX_FILES = 10
+
+# Resized copies of uploaded images (see core/images.py): the longest edge in
+# pixels of each size, their format and quality
+IMAGE_DERIVATIVE_SIZES = {'thumb': 200, 'card': 640, 'full': 1600}
+IMAGE_DERIVATIVE_FORMAT = 'WEBP'
+IMAGE_DERIVATIVE_QUALITY = 80
+# Background threads making them; 0 makes them inline once the upload commits
+IMAGE_DERIVATIVE_WORKERS = 2
+# Jobs that may wait for a thread; beyond that uploads are left for
+# `manage.py generate_image_derivatives`
+IMAGE_DERIVATIVE_QUEUE_SIZE = 64
+
+# ISBN lookups kept per process by bookbank.isbn.lookup_isbn
+ISBN_LOOKUP_CACHE_SIZE = 4096
+
+# Bulk book imports (see bookbank/importer.py): rows per INSERT, and failed
+# rows listed in the report (the rest are only counted)
+BOOK_IMPORT_BATCH_SIZE = 500
+BOOK_IMPORT_MAX_ERRORS = 100
+
+# Lost & found photo matching (see lostfound/similarity.py): the default and
+# largest Hamming distance between perceptual hashes, and most matches returned
+LOSTFOUND_SIMILAR_IMAGES_RADIUS = 10
+LOSTFOUND_SIMILAR_IMAGES_MAX_RADIUS = 15
+LOSTFOUND_SIMILAR_IMAGES_LIMIT = 20
+# Default and largest number of description matches (see lostfound/matching.py)
+LOSTFOUND_MATCHES_LIMIT = 10
+LOSTFOUND_MATCHES_MAX_LIMIT = 50
+# ?fuzzy= on the lost & found list (see lostfound/fuzzy.py): the least trigram
+# similarity a name, brand or colour needs, and most items returned
+LOSTFOUND_FUZZY_THRESHOLD = 0.2
+LOSTFOUND_FUZZY_LIMIT = 100
+# Resolved lost & found items untouched this long are moved to the archive
+# table by `manage.py archive_lostfound` (see lostfound/archive.py)
+LOSTFOUND_ARCHIVE_AFTER = timedelta(days=365)
+
+# Per-request SQL instrumentation (query count/time headers, duplicate query warnings)
+QUERY_INSTRUMENTATION = DEBUG
+
+# Caches. 'default' holds the generation counters (see core/cache.py) that
+# retire cached responses, the location gazetteer and ISBN lookups, and the
+# hit/miss stats; 'responses' holds rendered anonymous responses.
+# The counters must be shared by every worker process: with more than one,
+# set CACHE_REDIS_URL (e.g. redis://localhost:6379/0, needs the redis
+# package). Without it they live in process memory, which is only right for
+# a single process such as runserver. Responses stay per process either way,
+# since their keys carry the shared counters.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL') or None
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+        # Far above the two counters per versioned model, so none is culled
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+}
+RESPONSE_CACHE_ENABLED = True
+# Larger responses are not cached; with MAX_ENTRIES this bounds memory to ~64 MB
+RESPONSE_CACHE_MAX_BYTES = 128 * 1024
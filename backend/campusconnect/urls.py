@@ -16,7 +16,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from core.media import serve_media
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -37,8 +37,10 @@ urlpatterns = [
     path('api/lostfound/', include('lostfound.urls')),
     path('api/roommate/', include('roommate.urls')),
     path('api/noticeboard/', include('noticeboard.urls')),
-]
+    path('api/search/', include('search.urls')),
+    path('api/locations/', include('locations.urls')),
+    path('api/core/', include('core.urls')),
 
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Media files, with Range, caching headers and signed private URLs
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", serve_media, name='media'),
+]
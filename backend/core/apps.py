@@ -0,0 +1,26 @@
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_delete
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        from .cache import connect_generation_signals
+        from .images import connect_derivative_signals
+        from .models import PrimaryImageMixin, promote_next_primary_image
+        from .storage import connect_media_signals
+
+        connect_generation_signals()
+        connect_derivative_signals()
+        connect_media_signals()
+
+        # Hand the primary flag on when a gallery loses its primary image
+        for model in apps.get_models():
+            if issubclass(model, PrimaryImageMixin):
+                post_delete.connect(
+                    promote_next_primary_image,
+                    sender=model,
+                    dispatch_uid=f'promote_next_primary_image_{model._meta.label_lower}'
+                )
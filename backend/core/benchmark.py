@@ -0,0 +1,274 @@
+"""
+In-process HTTP benchmark for the /api/ endpoints.
+
+Requests are passed straight to the project's WSGI application, so the
+numbers cover routing, middleware, authentication, views, serializers and
+the ORM without a web server or network in the way.
+"""
+import io
+import json
+import math
+import random
+import time
+from urllib.parse import urlsplit
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from bookbank.models import BookPost
+from lostfound.fuzzy import rebuild_trigram_index
+from lostfound.matching import rebuild_index as rebuild_match_index
+from lostfound.models import LostFoundItem
+from noticeboard.models import Event
+from roommate.models import RoommatePost
+from search.index import rebuild_index
+from .queries import record_queries
+from .seeding import CampusSeeder
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = 'benchmark-pass-123'
+
+# Settings a run is timed under: no debug query log, no response cache
+# answering every request after the first, and no query instrumentation
+# middleware wrapping the benchmark's own recorder
+BENCHMARK_SETTINGS = {
+    'DEBUG': False,
+    'ALLOWED_HOSTS': ['localhost'],
+    'RESPONSE_CACHE_ENABLED': False,
+    'QUERY_INSTRUMENTATION': False,
+}
+
+DEFAULT_SIZES = {
+    'users': 50,
+    'books': 200,
+    'events': 50,
+    'registrations': 500,
+    'items': 200,
+    'posts': 100,
+}
+
+SEARCH_TERMS = ['calculus', 'textbook', 'workshop', 'library', 'wallet', 'room', 'computer']
+
+
+class WSGIClient:
+    """
+    Calls a WSGI application in-process and returns (status code, body).
+    The headers of the last response are kept in last_headers.
+    """
+    def __init__(self, application=None):
+        self.application = application or get_wsgi_application()
+        self.last_headers = {}
+
+    def request(self, method, path, data=None, token=None):
+        url = urlsplit(path)
+        body = encode_multipart(BOUNDARY, data) if data is not None else b''
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if data is not None:
+            environ['CONTENT_TYPE'] = MULTIPART_CONTENT
+        if token:
+            environ['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+        status = {}
+
+        def start_response(status_line, headers, exc_info=None):
+            status['code'] = int(status_line.split(' ', 1)[0])
+            self.last_headers = dict(headers)
+
+        chunks = self.application(environ, start_response)
+        try:
+            content = b''.join(chunks)
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        return status['code'], content
+
+
+def populate_dataset(sizes, seed=0):
+    """
+    Create the benchmark rows with core.seeding.CampusSeeder. All users share
+    BENCHMARK_PASSWORD. Returns the staff and member users used to authenticate.
+    """
+    seeder = CampusSeeder(seed=seed, password=BENCHMARK_PASSWORD)
+    seeder.run(**sizes)
+    # bulk_create skips the signals that keep the search, matching and trigram indexes in sync
+    rebuild_index()
+    rebuild_match_index()
+    rebuild_trigram_index()
+    staff = User.objects.get(pk=seeder.staff_ids[0])
+    member = User.objects.get(pk=seeder.user_ids[-1])
+    return staff, member
+
+
+def obtain_token(client, email):
+    status, content = client.request('POST', '/api/token/', {
+        'email': email, 'password': BENCHMARK_PASSWORD
+    })
+    if status != 200:
+        raise RuntimeError(f'Could not log in as {email} (HTTP {status})')
+    return json.loads(content)['access']
+
+
+def build_scenarios(client, staff, member, seed=0):
+    """
+    Return (name, callable) pairs. Each callable returns the
+    (method, path, data, token) of the next request to send.
+    """
+    rng = random.Random(seed)
+    staff_token = obtain_token(client, staff.email)
+    member_token = obtain_token(client, member.email)
+    refresh = json.loads(client.request('POST', '/api/token/', {
+        'email': member.email, 'password': BENCHMARK_PASSWORD
+    })[1])['refresh']
+
+    book_ids = [str(pk) for pk in BookPost.objects.values_list('pk', flat=True)]
+    event_ids = [str(pk) for pk in Event.objects.values_list('pk', flat=True)]
+    item_ids = [str(pk) for pk in LostFoundItem.objects.values_list('pk', flat=True)]
+    post_ids = [str(pk) for pk in RoommatePost.objects.values_list('pk', flat=True)]
+    counter = iter(range(10 ** 9))
+
+    def pick(ids):
+        return rng.choice(ids) if ids else '00000000-0000-0000-0000-000000000000'
+
+    return [
+        ('auth.token', lambda: ('POST', '/api/token/', {
+            'email': member.email, 'password': BENCHMARK_PASSWORD}, None)),
+        ('auth.login', lambda: ('POST', '/api/accounts/login/', {
+            'email': member.email, 'password': BENCHMARK_PASSWORD}, None)),
+        ('auth.token_refresh', lambda: ('POST', '/api/token/refresh/', {'refresh': refresh}, None)),
+        ('auth.token_verify', lambda: ('POST', '/api/token/verify/', {'token': member_token}, None)),
+        ('accounts.check_auth', lambda: ('GET', '/api/accounts/check-auth/', None, member_token)),
+        ('accounts.profile', lambda: ('GET', '/api/accounts/profile/', None, member_token)),
+        ('books.list', lambda: ('GET', '/api/bookbank/books/', None, None)),
+        ('books.list_cursor', lambda: ('GET', '/api/bookbank/books/?pagination=cursor', None, None)),
+        ('books.detail', lambda: ('GET', f'/api/bookbank/books/{pick(book_ids)}/', None, None)),
+        ('books.create', lambda: ('POST', '/api/bookbank/books/', {
+            'title': f'Bench Book {next(counter)}', 'author': 'Bench Author',
+            'department': 'Physics', 'price': '100.00', 'contact_email': 'bench@example.com'
+        }, member_token)),
+        ('book_requests.list', lambda: ('GET', '/api/bookbank/book-requests/', None, member_token)),
+        ('events.list', lambda: ('GET', '/api/noticeboard/events/', None, None)),
+        ('events.detail', lambda: ('GET', f'/api/noticeboard/events/{pick(event_ids)}/', None, None)),
+        ('events.comments', lambda: (
+            'GET', f'/api/noticeboard/events/{pick(event_ids)}/comments/', None, None)),
+        ('events.create', lambda: ('POST', '/api/noticeboard/events/', {
+            'title': f'Bench Event {next(counter)}', 'description': 'Benchmark event',
+            'start_datetime': '2030-01-01T10:00:00Z', 'end_datetime': '2030-01-01T12:00:00Z',
+            'location': 'Main Hall'
+        }, staff_token)),
+        ('admin_events.list', lambda: ('GET', '/api/noticeboard/admin/events/', None, staff_token)),
+        ('lostfound.list', lambda: ('GET', '/api/lostfound/items/', None, None)),
+        ('lostfound.detail', lambda: ('GET', f'/api/lostfound/items/{pick(item_ids)}/', None, None)),
+        ('lostfound.create', lambda: ('POST', '/api/lostfound/items/', {
+            'item_name': f'Bench Item {next(counter)}', 'status': 'lost', 'location': 'Library'
+        }, member_token)),
+        ('roommate.list', lambda: ('GET', '/api/roommate/posts/', None, None)),
+        ('roommate.detail', lambda: ('GET', f'/api/roommate/posts/{pick(post_ids)}/', None, None)),
+        ('roommate.create', lambda: ('POST', '/api/roommate/posts/', {
+            'title': f'Bench Room {next(counter)}', 'description': 'Benchmark room',
+            'location': 'North Campus', 'rent': '5000', 'available_from': '2030-01-01',
+            'lease_duration': '6', 'room_type': 'shared', 'contact_number': '9999999999',
+            'contact_email': 'bench@example.com'
+        }, member_token)),
+        ('search', lambda: ('GET', f'/api/search/?q={rng.choice(SEARCH_TERMS)}', None, None)),
+        ('events.search', lambda: ('GET', f'/api/noticeboard/events/?search={rng.choice(SEARCH_TERMS)}', None, None)),
+    ]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def run_scenario(client, next_request, iterations, warmup=0):
+    for _ in range(warmup):
+        client.request(*next_request())
+
+    latencies, queries, errors = [], 0, 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        method, path, data, token = next_request()
+        with record_queries() as recorder:
+            request_start = time.perf_counter()
+            status, _ = client.request(method, path, data, token)
+            latencies.append(time.perf_counter() - request_start)
+        queries += recorder.count
+        if status >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': iterations,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'throughput_rps': round(iterations / elapsed, 2) if elapsed else 0.0,
+        'queries_per_request': round(queries / iterations, 2) if iterations else 0.0,
+    }
+
+
+def run_benchmark(scenarios, iterations, warmup=0, client=None, only=None):
+    """Run each scenario and return {scenario name: stats}."""
+    client = client or WSGIClient()
+    results = {}
+    for name, next_request in scenarios:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = run_scenario(client, next_request, iterations, warmup)
+    return results
+
+
+def format_results(results):
+    lines = [
+        f"{'endpoint':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'req/s':>9} {'queries':>8} {'errors':>6}"
+    ]
+    for name, stats in results.items():
+        lines.append(
+            f"{name:<22} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} "
+            f"{stats['throughput_rps']:>9.1f} {stats['queries_per_request']:>8.1f} {stats['errors']:>6}"
+        )
+    return '\n'.join(lines)
+
+
+def format_comparison(baseline, current):
+    """Table of p50/p95 latency and query count changes between two result sets."""
+    def change(old, new):
+        return f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+
+    lines = [
+        f"{'endpoint':<22} {'p50 old':>9} {'p50 new':>9} {'p50 Δ':>8} "
+        f"{'p95 Δ':>8} {'queries old':>11} {'queries new':>11}"
+    ]
+    for name, new in current.items():
+        old = baseline.get(name)
+        if old is None:
+            lines.append(f'{name:<22} (not in baseline)')
+            continue
+        lines.append(
+            f"{name:<22} {old['p50_ms']:>9.2f} {new['p50_ms']:>9.2f} "
+            f"{change(old['p50_ms'], new['p50_ms']):>8} {change(old['p95_ms'], new['p95_ms']):>8} "
+            f"{old['queries_per_request']:>11.1f} {new['queries_per_request']:>11.1f}"
+        )
+    return '\n'.join(lines)
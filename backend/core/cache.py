@@ -0,0 +1,196 @@
+"""
+Versioned response cache for anonymous reads.
+
+Every model a cached endpoint renders has a generation counter in the
+default cache. Saving or deleting a row bumps its model's counter, and the
+counters are part of each response's cache key, so a write makes every
+dependent entry unreachable at once instead of waiting for a TTL. Rendered
+responses live in the bounded 'responses' cache; entries larger than
+RESPONSE_CACHE_MAX_BYTES are not stored.
+
+Writes that bypass signals (queryset.update(), bulk_create()) must call
+bump_generation() themselves.
+"""
+import hashlib
+import time
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+RESPONSE_CACHE_ALIAS = 'responses'
+
+# Models whose rows appear in cached responses and ETags (core.conditional)
+VERSIONED_MODELS = [
+    'accounts.User',
+    'bookbank.BookPost',
+    'bookbank.BookImage',
+    'bookbank.BookRequest',
+    'bookbank.IsbnRecord',
+    'lostfound.LostFoundItem',
+    'lostfound.ArchivedLostFoundItem',
+    'roommate.RoommatePost',
+    'roommate.RoommateImage',
+    'noticeboard.Event',
+    'noticeboard.EventImage',
+    'noticeboard.EventComment',
+    'noticeboard.EventRegistration',
+    'locations.Place',
+    'locations.PlaceAlias',
+]
+
+STATS = ('hits', 'misses', 'oversized')
+
+# Response headers replayed on a cache hit (the validators set by core.conditional)
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Vary')
+
+
+def _generation_key(label):
+    return f'generation:{label.lower()}'
+
+
+def _changed_key(label):
+    return f'generation-changed:{label.lower()}'
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label
+
+
+def get_generations(models):
+    """Current generation of each model, initialising missing counters."""
+    keys = [_generation_key(_label(model)) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Start from the clock rather than 0, so a counter that was evicted
+            # never comes back with a value an older entry was stored under
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def get_change_times(models):
+    """Unix time of each model's last bump; unknown times count as now."""
+    keys = [_changed_key(_label(model)) for model in models]
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, timeout=None)
+            found[key] = cache.get(key, now)
+    return tuple(found[key] for key in keys)
+
+
+def bump_generation(*models):
+    """Invalidate every cached response that depends on these models."""
+    now = time.time()
+    for model in models:
+        key = _generation_key(_label(model))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+        cache.set(_changed_key(_label(model)), now, timeout=None)
+
+
+def bump_on_change(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which no response shows
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    # Bump now, and again once the transaction commits in case a concurrent
+    # request re-cached the old rows in between
+    bump_generation(sender)
+    transaction.on_commit(lambda: bump_generation(sender))
+
+
+def connect_generation_signals():
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        uid = f'bump_generation_{label.lower()}'
+        post_save.connect(bump_on_change, sender=model, dispatch_uid=uid)
+        post_delete.connect(bump_on_change, sender=model, dispatch_uid=uid)
+
+
+def record(stat):
+    key = f'response-cache:{stat}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_stats():
+    values = cache.get_many([f'response-cache:{stat}' for stat in STATS])
+    stats = {stat: values.get(f'response-cache:{stat}', 0) for stat in STATS}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+    return stats
+
+
+def response_cache_key(request, dependencies):
+    """Key on the URL with sorted query params, the renderer and the dependency generations."""
+    params = sorted((name, value) for name in request.query_params for value in request.query_params.getlist(name))
+    parts = [
+        request.scheme, request.get_host(), request.path, repr(params),
+        request.accepted_renderer.format, repr(get_generations(dependencies)),
+    ]
+    return 'response:' + hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    Serves list and retrieve for anonymous users from the response cache.
+
+    Set cache_dependencies to every model the endpoint's serializers read.
+    List it before ConditionalGetMixin so a hit skips the validator work.
+    """
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        self.response_cache_key = None
+        if not getattr(settings, 'RESPONSE_CACHE_ENABLED', False) or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache_key(request, self.cache_dependencies)
+        entry = caches[RESPONSE_CACHE_ALIAS].get(key)
+        if entry is not None:
+            record('hits')
+            content, content_type, headers = entry
+            response = HttpResponse(content, content_type=content_type)
+            for name, value in headers.items():
+                response[name] = value
+            response['X-Cache'] = 'HIT'
+            # Stored validators stay valid for as long as the entry is reachable
+            return get_conditional_response(
+                request, etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(headers.get('Last-Modified')), response=response
+            )
+
+        record('misses')
+        self.response_cache_key = key
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, 'response_cache_key', None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            if len(response.content) <= settings.RESPONSE_CACHE_MAX_BYTES:
+                headers = {name: response[name] for name in STORED_HEADERS if name in response}
+                caches[RESPONSE_CACHE_ALIAS].set(key, (response.content, response['Content-Type'], headers))
+            else:
+                record('oversized')
+            response['X-Cache'] = 'MISS'
+        return response
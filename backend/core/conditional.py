@@ -0,0 +1,192 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF viewsets.
+
+Validators are built without serializing rows. A list page is identified
+by the pks and newest <last_modified_field> of the rows it serves (and the
+total count of a page-number page); a detail by the row's
+<last_modified_field>. A plain GET takes them from the rows the view loads
+anyway, and a revalidating request reads just those columns of the
+requested page, so a keyset page never pays for a scan of the whole table.
+The generation counters from core.cache are mixed in too, so changes to
+related rows (images, comments, the embedded user) change the ETag even
+though they do not touch the parent's updated_at. Models with private media add the
+expiry their signed URLs are made with, so a copy is replaced by one with
+fresh URLs while its own still work.
+"""
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Window
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.pagination import PageNumberPagination
+from .cache import get_change_times, get_generations
+from .pagination import KeysetPagination
+from .storage import PrivateMediaStorage, signing_expiry, signing_started
+
+
+def has_validators(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def signs_media(model):
+    """True when the model's files are served through expiring signed URLs."""
+    return any(isinstance(getattr(field, 'storage', None), PrivateMediaStorage) for field in model._meta.fields)
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified headers to list and retrieve, and answers
+    If-None-Match / If-Modified-Since with 304 Not Modified before the
+    serializers run.
+
+    Set last_modified_field if the model has no updated_at, and
+    cache_dependencies to every model the serializers read. Override
+    get_conditional_queryset() when get_queryset() carries annotations that
+    would make the validator queries expensive.
+    """
+    last_modified_field = 'updated_at'
+    cache_dependencies = ()
+
+    def get_conditional_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        self.conditional_page = None
+        validators = None
+        if self.paginator is None:
+            # An unpaginated list loads every row anyway
+            stats = self.get_conditional_queryset().order_by().aggregate(
+                count=Count('pk'), last_modified=Max(self.last_modified_field)
+            )
+            validators = self.get_validators(request, stats['last_modified'], stats['count'])
+        elif has_validators(request):
+            # Only clients revalidating a copy pay for a validator query
+            page = self.get_revalidation_page(request)
+            if page is not None:
+                validators = self.get_page_validators(request, *page)
+        if validators is not None:
+            not_modified = get_conditional_response(request, etag=validators[0], last_modified=validators[1])
+            if not_modified is not None:
+                return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        if validators is None:
+            if response.status_code != 200 or self.conditional_page is None:
+                return response
+            validators = self.get_page_validators(request, *self.conditional_page)
+        return self.set_validators(response, *validators)
+
+    def paginate_queryset(self, queryset):
+        rows = super().paginate_queryset(queryset)
+        if rows is not None:
+            page = None if getattr(self.paginator, 'keyset', False) else getattr(self.paginator, 'page', None)
+            self.conditional_page = rows, page.paginator.count if page is not None else None
+        return rows
+
+    def get_revalidation_page(self, request):
+        """
+        (rows, total count or None) of the page list() would serve, with
+        only the pk and last_modified_field loaded, in one query bounded by
+        the page size. None when the page is left for list() to work out
+        ('last', out of range).
+        """
+        queryset = self.get_conditional_queryset().select_related(None).prefetch_related(None).only(
+            self.last_modified_field
+        )
+        if isinstance(self.paginator, KeysetPagination) and self.paginator.keyset_requested(request):
+            return self.paginator.paginate_queryset(queryset, request, view=self), None
+        if not isinstance(self.paginator, PageNumberPagination):
+            return None
+        page_size = self.paginator.get_page_size(request)
+        try:
+            number = int(request.query_params.get(self.paginator.page_query_param) or 1)
+        except ValueError:
+            return None
+        if not page_size or number < 1:
+            return None
+        # The window count is taken before LIMIT, so it is the total the page reports
+        rows = list(queryset.annotate(conditional_total=Window(Count('pk')))[
+            (number - 1) * page_size:number * page_size
+        ])
+        if not rows:
+            return ([], 0) if number == 1 else None
+        return rows, rows[0].conditional_total
+
+    def get_page_validators(self, request, rows, count):
+        modified = [getattr(row, self.last_modified_field) for row in rows]
+        updated_at = max((value for value in modified if value is not None), default=None)
+        return self.get_validators(request, updated_at, (count, [str(row.pk) for row in rows]))
+
+    def retrieve(self, request, *args, **kwargs):
+        # Only clients revalidating a copy pay for the validator query; a
+        # plain GET takes updated_at from the object the view loads anyway
+        self.conditional_object = None
+        if has_validators(request):
+            updated_at = self.get_detail_last_modified()
+            if updated_at is not None:
+                etag, last_modified = self.get_validators(request, updated_at)
+                not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if not_modified is not None:
+                    return not_modified
+
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if self.conditional_object is not None:
+            updated_at = getattr(self.conditional_object, self.last_modified_field)
+        else:
+            # Served from the response cache, so no object was loaded
+            updated_at = self.get_detail_last_modified()
+        if updated_at is None:
+            return response
+        return self.set_validators(response, *self.get_validators(request, updated_at))
+
+    def get_object(self):
+        obj = super().get_object()
+        self.conditional_object = obj
+        return obj
+
+    def get_detail_last_modified(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_conditional_queryset().filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+            values = list(queryset.order_by().values_list(self.last_modified_field, flat=True)[:1])
+        except (TypeError, ValueError, ValidationError):
+            # Malformed pk; let retrieve() answer with its usual 404
+            return None
+        return values[0] if values else None
+
+    def get_validators(self, request, updated_at, rows=None):
+        """
+        Return (weak ETag, Last-Modified as a Unix timestamp) for the current
+        request; rows identifies the rows a list covers.
+        """
+        generations = get_generations(self.cache_dependencies)
+        user = request.user.pk if request.user.is_authenticated else ''
+        parts = [
+            request.get_full_path(), request.accepted_renderer.format, str(user),
+            updated_at.isoformat() if updated_at else '', repr(rows), repr(generations),
+        ]
+        timestamps = list(get_change_times(self.cache_dependencies))
+        if updated_at is not None:
+            timestamps.append(updated_at.timestamp())
+        if signs_media(self.get_queryset().model):
+            # The signed URLs in the body change with each expiry bucket
+            expires = signing_expiry()
+            parts.append(str(expires))
+            timestamps.append(signing_started(expires))
+        etag = 'W/"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+        last_modified = int(max(timestamps)) if timestamps else None
+        return etag, last_modified
+
+    def set_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Responses differ per user (visibility, ownership filters)
+            patch_vary_headers(response, ['Authorization'])
+        return response
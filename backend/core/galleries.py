@@ -0,0 +1,98 @@
+"""
+Batch uploads to image galleries (BookImage, EventImage, RoommateImage).
+
+GalleryUploadMixin adds ``POST <detail>/upload_images/`` to a parent
+viewset. Every file in the multipart ``images`` list is validated on its
+own, and the valid ones are inserted with one bulk_create in a single
+transaction. The primary image is decided once for the batch, from the
+parent's ``primary_image`` pointer. Files that fail validation are
+reported by index without failing the rest.
+"""
+from collections import Counter
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.fields import get_error_detail
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
+from .cache import bump_generation
+from .images import queue_derivatives
+from .storage import referenced_blobs, update_references
+
+
+def validate_images(uploads):
+    """Split uploads into the valid files and an error entry per invalid one."""
+    field = serializers.ImageField()
+    valid, errors = [], []
+    for index, upload in enumerate(uploads):
+        try:
+            valid.append(field.run_validation(upload))
+        except serializers.ValidationError as error:
+            errors.append({'index': index, 'name': upload.name, 'errors': error.detail})
+        except DjangoValidationError as error:
+            # Pillow's checks run in Django's form field, outside any serializer
+            errors.append({'index': index, 'name': upload.name, 'errors': get_error_detail(error)})
+    return valid, errors
+
+
+def add_gallery_images(parent, image_model, uploads):
+    """
+    Create one image_model row per upload in one transaction. The first
+    becomes primary when the gallery has none.
+    """
+    parent_model = type(parent)
+    with transaction.atomic():
+        # Read the pointer inside the transaction, not from a possibly stale parent
+        primary_id = parent_model._default_manager.filter(pk=parent.pk).values_list(
+            'primary_image_id', flat=True
+        ).first()
+        images = [image_model(**{image_model.parent_field: parent}, image=upload) for upload in uploads]
+        if primary_id is None:
+            images[0].is_primary = True
+        # FileField.pre_save stores each file as the rows are inserted
+        image_model._default_manager.bulk_create(images)
+        if primary_id is None:
+            parent_model._default_manager.filter(pk=parent.pk).update(primary_image=images[0])
+            parent.primary_image = images[0]
+
+        # bulk_create skips post_save: count the blobs and queue the derivatives here
+        update_references(Counter(), sum((referenced_blobs(image) for image in images), Counter()))
+        for image in images:
+            queue_derivatives(image_model, image)
+        bump_generation(image_model, parent_model)
+    return images
+
+
+class GalleryUploadMixin:
+    """
+    Viewset mixin for gallery parents. Subclasses set gallery_image_model
+    and gallery_image_serializer; the usual object permissions decide who
+    may upload.
+    """
+    gallery_image_model = None
+    gallery_image_serializer = None
+
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def upload_images(self, request, pk=None):
+        """Add every file in the multipart ``images`` list to the gallery."""
+        parent = self.get_object()
+        uploads = request.FILES.getlist('images')
+        if not uploads:
+            return Response(
+                {'images': ['Attach one or more files as "images".']}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(uploads) > settings.GALLERY_BATCH_MAX_FILES:
+            return Response(
+                {'images': [f'At most {settings.GALLERY_BATCH_MAX_FILES} files per request.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        valid, errors = validate_images(uploads)
+        images = add_gallery_images(parent, self.gallery_image_model, valid) if valid else []
+        serializer = self.gallery_image_serializer(images, many=True, context=self.get_serializer_context())
+        return Response(
+            {'created': serializer.data, 'errors': errors},
+            status=status.HTTP_201_CREATED if images else status.HTTP_400_BAD_REQUEST
+        )
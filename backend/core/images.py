@@ -0,0 +1,220 @@
+"""
+Resized derivatives of uploaded images.
+
+Every model with ImageDerivativesMixin gets thumb/card/full copies of its
+image in IMAGE_DERIVATIVE_FORMAT (WebP by default), each no larger than
+IMAGE_DERIVATIVE_SIZES[size] pixels on its longest edge. They are made
+after the upload's transaction commits, on a pool of
+IMAGE_DERIVATIVE_WORKERS threads (0 makes them inline), and recorded in
+the row's ``derivatives`` field together with the original they were made
+from. Until then, or when the original changes, ImageSizesField serves
+the original's URL for every size. An original that cannot be read is
+recorded the same way, with an error instead of sizes, and left alone
+until the image changes.
+
+When more than IMAGE_DERIVATIVE_QUEUE_SIZE jobs are waiting, new uploads
+are skipped and left to ``manage.py generate_image_derivatives``.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+from .cache import bump_generation
+from .storage import referenced_blobs, update_references
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def derivative_models():
+    from .models import ImageDerivativesMixin
+    return [model for model in apps.get_models() if issubclass(model, ImageDerivativesMixin)]
+
+
+def derivatives_ready(instance):
+    """True when the stored derivatives were made from the current image."""
+    image = instance.get_derivative_source()
+    return bool(image) and instance.derivatives.get('source') == image.name and 'sizes' in instance.derivatives
+
+
+def derivatives_settled(instance):
+    """True when the current image was processed, whether or not it could be read."""
+    image = instance.get_derivative_source()
+    return bool(image) and instance.derivatives.get('source') == image.name
+
+
+def render(original, max_edge, image_format, quality):
+    """One resized copy of an opened PIL image, as encoded bytes and its size."""
+    image = original.copy()
+    image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    mode = 'RGBA' if has_alpha and image_format != 'JPEG' else 'RGB'
+    if image.mode != mode:
+        image = image.convert(mode)
+    options = {'quality': quality}
+    if image_format == 'WEBP':
+        options['method'] = 4
+    output = io.BytesIO()
+    image.save(output, image_format, **options)
+    return output.getvalue(), image.size
+
+
+def generate_derivatives(instance):
+    """
+    Write the resized copies of instance's image to its storage and return
+    the ``derivatives`` value describing them.
+    """
+    image = instance.get_derivative_source()
+    image_format = settings.IMAGE_DERIVATIVE_FORMAT
+    extension = EXTENSIONS[image_format]
+    stem = os.path.splitext(image.name)[0]
+    try:
+        with image.open('rb') as source:
+            original = Image.open(source)
+            # Phone photos are stored sideways with an EXIF rotation
+            original = ImageOps.exif_transpose(original)
+            original.load()
+    except (UnidentifiedImageError, OSError) as error:
+        logger.warning('Cannot read %s for derivatives: %s', image.name, error)
+        return {'source': image.name, 'error': 'unreadable'}
+
+    sizes = {}
+    for size, max_edge in settings.IMAGE_DERIVATIVE_SIZES.items():
+        content, (width, height) = render(original, max_edge, image_format, settings.IMAGE_DERIVATIVE_QUALITY)
+        name = image.storage.save(f'derivatives/{stem}_{size}.{extension}', ContentFile(content))
+        sizes[size] = {'name': name, 'width': width, 'height': height}
+    return {'source': image.name, 'sizes': sizes}
+
+
+def process(model_label, pk, force=False):
+    """Make and record the derivatives of one row, unless its image changed meanwhile."""
+    model = apps.get_model(model_label)
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None or not instance.get_derivative_source():
+        return
+    if derivatives_settled(instance) and not force:
+        return
+    stored = referenced_blobs(instance)
+    derivatives = generate_derivatives(instance)
+    field = instance.derivative_source_field
+    with transaction.atomic():
+        updated = model._default_manager.filter(
+            pk=pk, **{field: derivatives['source']}
+        ).update(derivatives=derivatives)
+        if updated:
+            # update() skips the reference counting signals too
+            instance.derivatives = derivatives
+            update_references(stored, referenced_blobs(instance))
+    if updated:
+        # update() skips post_save, and the serialized URLs just changed
+        bump_generation(model)
+
+
+def _run(model_label, pk):
+    try:
+        process(model_label, pk)
+    except Exception:
+        logger.exception('Generating derivatives for %s %s failed', model_label, pk)
+    finally:
+        # Worker threads hold their own connections; don't leave them open between jobs
+        connections.close_all()
+        _slots.release()
+
+
+def get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_DERIVATIVE_WORKERS, thread_name_prefix='image-derivatives'
+            )
+            # Jobs running or waiting; bounds the memory held by queued work
+            _slots = threading.BoundedSemaphore(
+                settings.IMAGE_DERIVATIVE_WORKERS + settings.IMAGE_DERIVATIVE_QUEUE_SIZE
+            )
+    return _executor
+
+
+def schedule(model_label, pk):
+    if settings.IMAGE_DERIVATIVE_WORKERS <= 0:
+        process(model_label, pk)
+        return
+    executor = get_executor()
+    if not _slots.acquire(blocking=False):
+        logger.warning('Derivative queue is full; skipped %s %s', model_label, pk)
+        return
+    executor.submit(_run, model_label, pk)
+
+
+def queue_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or not instance.get_derivative_source() or derivatives_settled(instance):
+        return
+    label, pk = sender._meta.label, instance.pk
+    transaction.on_commit(lambda: schedule(label, pk))
+
+
+def connect_derivative_signals():
+    for model in derivative_models():
+        post_save.connect(
+            queue_derivatives, sender=model, dispatch_uid=f'queue_derivatives_{model._meta.label_lower}'
+        )
+
+
+def derivative_urls(instance, request=None):
+    """{size: URL} for each derivative size; the original's URL until they are ready."""
+    image = instance.get_derivative_source()
+    if not image:
+        return None
+
+    def absolute(url):
+        return request.build_absolute_uri(url) if request is not None else url
+
+    if derivatives_ready(instance):
+        storage = image.storage
+        return {
+            size: absolute(storage.url(entry['name']))
+            for size, entry in instance.derivatives['sizes'].items()
+        }
+    original = absolute(image.url)
+    return {size: original for size in settings.IMAGE_DERIVATIVE_SIZES}
+
+
+def derivative_srcset(instance, request=None):
+    """An <img srcset> value listing the derivatives by width, or None until they are ready."""
+    if not derivatives_ready(instance):
+        return None
+    urls = derivative_urls(instance, request)
+    candidates = {}
+    # A small original gives several sizes the same width; list each width once
+    for size, entry in instance.derivatives['sizes'].items():
+        candidates.setdefault(entry['width'], urls[size])
+    return ', '.join(f'{url} {width}w' for width, url in sorted(candidates.items()))
+
+
+class ImageSizesField(serializers.Field):
+    """Read-only {size: URL} of the instance's image derivatives (see derivative_urls)."""
+    def __init__(self, **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return derivative_urls(instance, self.context.get('request'))
+
+
+class ImageSrcsetField(ImageSizesField):
+    """Read-only srcset string of the instance's image derivatives (see derivative_srcset)."""
+    def to_representation(self, instance):
+        return derivative_srcset(instance, self.context.get('request'))
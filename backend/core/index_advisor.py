@@ -0,0 +1,462 @@
+"""
+Index advisor driven by SQLite's EXPLAIN QUERY PLAN.
+
+A workload of GET requests is replayed through the WSGI application and
+every SELECT it runs is recorded. Each distinct statement (by
+core.queries.fingerprint) is explained once; plan steps that scan a whole
+table, walk an index while filtering on other columns, or sort through a
+temporary B-tree are flagged. For a flagged table the advisor proposes one
+index: the columns the statement compares for equality (most used across
+the workload first), followed by its ORDER BY columns, or else its first
+range column. Proposals already covered by an existing index, or by a
+longer proposal, are dropped, and evaluate() keeps only the indexes that
+remove a finding once created.
+
+Django renders filter(flag=True) as a bare "flag" term (NOT "flag" for
+False). SQLite cannot seek an index on such a term, but it can match it
+against a partial index's WHERE clause, so boolean filters become the
+index condition rather than a key column.
+
+The column extraction reads the SQL Django generates ("table"."column"
+references) and is not a general SQL parser.
+"""
+import re
+import statistics
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+from django.apps import apps
+from django.db import connection, models
+from django.db.backends.utils import names_digest
+from .benchmark import WSGIClient
+from .queries import fingerprint, record_queries
+
+# Rows to seed: large enough that plan differences outweigh timing noise
+DEFAULT_SIZES = {
+    'users': 5000,
+    'books': 20000,
+    'events': 1000,
+    'registrations': 20000,
+    'items': 20000,
+    'posts': 5000,
+}
+
+# Hot read paths of the apps: (name, role, path); role is 'anonymous', 'member' or 'staff'
+DEFAULT_WORKLOAD = [
+    ('books.list', 'anonymous', '/api/bookbank/books/'),
+    ('books.available', 'anonymous', '/api/bookbank/books/?is_available=true'),
+    ('books.department', 'anonymous', '/api/bookbank/books/?is_available=true&department=Physics'),
+    ('books.department_cursor', 'anonymous',
+     '/api/bookbank/books/?is_available=true&department=Mathematics&pagination=cursor'),
+    ('lostfound.list', 'anonymous', '/api/lostfound/items/'),
+    ('lostfound.lost', 'anonymous', '/api/lostfound/items/?status=lost'),
+    ('lostfound.open', 'anonymous', '/api/lostfound/items/?status=found&is_resolved=false'),
+    ('lostfound.category', 'anonymous',
+     '/api/lostfound/items/?status=lost&is_resolved=false&category=electronics'),
+    ('roommate.list', 'anonymous', '/api/roommate/posts/'),
+    ('roommate.active', 'anonymous', '/api/roommate/posts/?is_active=true'),
+    ('events.list', 'anonymous', '/api/noticeboard/events/'),
+    ('events.upcoming', 'anonymous', '/api/noticeboard/events/?is_upcoming=true'),
+    ('admin_events.pending', 'staff', '/api/noticeboard/admin/events/?is_approved=false'),
+    ('admin_events.upcoming_approved', 'staff',
+     '/api/noticeboard/admin/events/?is_approved=true&ordering=start_datetime'),
+]
+
+# One request per line: "GET /api/...", a bare path, or a common/combined log line
+REQUEST_LINE = re.compile(r'(?:^|")(?:(GET|HEAD)\s+)?(/\S*)')
+
+TABLE_REF = re.compile(r'(?:FROM|JOIN)\s+"(\w+)"(?:\s+([A-Z]\d+)\b)?')
+COLUMN_REF = re.compile(
+    r'(?:"(\w+)"|\b([A-Z]\d+))\."(\w+)"'
+    r'(?:\s*(=|!=|<>|<=|>=|<|>|IN\s*\(|IS\s+NOT\b|IS\b|BETWEEN\b|LIKE\b|GLOB\b))?'
+    r'(\s+(?:ASC|DESC)\b)?'
+)
+EQUALITY_OPS = {'=', 'IN', 'IS'}
+RANGE_OPS = {'<', '>', '<=', '>=', 'BETWEEN'}
+CLAUSE_END = re.compile(r' (?:GROUP BY|ORDER BY|HAVING|LIMIT|UNION|EXCEPT|INTERSECT) ')
+
+PLAN_SCAN = re.compile(r'^SCAN (\w+)(.*)$')
+PLAN_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+PLAN_TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT|RIGHT PART OF ORDER BY)')
+
+# An index must take at least this share off its queries' time to be kept
+MIN_GAIN = 0.1
+
+FULL_SCAN = 'full scan'
+INDEX_SCAN = 'filtered index scan'
+TEMP_SORT = 'temp b-tree'
+
+
+def parse_workload(lines):
+    """(name, role, path) entries for each GET request found in the lines."""
+    workload = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        match = REQUEST_LINE.search(line)
+        if match:
+            path = match.group(2)
+            workload.append((urlsplit(path).path, 'anonymous', path))
+    return workload
+
+
+def clause(sql, start):
+    """Text from start up to the end of the clause at the same parenthesis depth."""
+    depth = 0
+    for position in range(start, len(sql)):
+        char = sql[position]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return sql[start:position]
+        elif depth == 0 and char == ' ' and CLAUSE_END.match(sql, position):
+            return sql[start:position]
+    return sql[start:]
+
+
+def top_level_order_by(sql):
+    depth, found = 0, None
+    for position, char in enumerate(sql):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and sql.startswith(' ORDER BY ', position):
+            found = position + len(' ORDER BY ')
+    return clause(sql, found) if found is not None else ''
+
+
+def table_aliases(sql):
+    """{alias or table name: table name} for every table the statement reads."""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+class StatementShape:
+    """The columns one SELECT compares and sorts on, per table."""
+    def __init__(self, sql):
+        self.aliases = table_aliases(sql)
+        self.equality = defaultdict(list)
+        self.flags = defaultdict(dict)
+        self.range = defaultdict(list)
+        self.order = []
+        for match in re.finditer(r' WHERE ', sql):
+            self.read_predicates(clause(sql, match.end()))
+        for quoted, alias, column, op, direction in COLUMN_REF.findall(top_level_order_by(sql)):
+            table = self.aliases.get(quoted or alias)
+            if table:
+                self.order.append((table, column))
+
+    def read_predicates(self, where):
+        for match in COLUMN_REF.finditer(where):
+            quoted, alias, column, op, _ = match.groups()
+            table = self.aliases.get(quoted or alias)
+            if not table:
+                continue
+            op = op.split()[0].rstrip('(') if op else ''
+            rest = where[match.end():].lstrip()
+            if not op and (not rest or rest[0] == ')' or rest.startswith(('AND', 'OR'))):
+                # A bare boolean column: "t"."is_active" or NOT "t"."is_resolved"
+                self.flags[table][column] = not where[:match.start()].rstrip().endswith('NOT')
+                continue
+            if op in EQUALITY_OPS:
+                columns = self.equality[table]
+            elif op in RANGE_OPS:
+                columns = self.range[table]
+            else:
+                continue
+            if column not in columns:
+                columns.append(column)
+
+    def tail(self, table):
+        """Columns after the equality prefix: the ORDER BY, else the first range column."""
+        if self.order and all(order_table == table for order_table, _ in self.order):
+            return [column for _, column in self.order if column not in self.equality[table]]
+        return self.range[table][:1]
+
+
+class AnalyzedQuery:
+    """A distinct statement from the workload with its plan and findings."""
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = params
+        self.calls = 0
+        self.requests = set()
+        self.plan = []
+        self.findings = []
+        self.shape = None
+
+    @property
+    def fingerprint(self):
+        return fingerprint(self.sql)
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def partial_indexes():
+    """Names of the partial indexes in the database."""
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        names = set()
+        for table in tables:
+            cursor.execute(f'PRAGMA index_list({connection.ops.quote_name(table)})')
+            # Rows are (seq, name, unique, origin, partial)
+            names.update(row[1] for row in cursor.fetchall() if row[4])
+    return names
+
+
+def find_problems(plan, shape, partial=frozenset()):
+    """(kind, table, plan step) for every table or filtered index scan and temp B-tree sort."""
+    findings = []
+    main_table = next(iter(shape.aliases.values()), None)
+    for step in plan:
+        scan = PLAN_SCAN.match(step)
+        if scan and 'VIRTUAL TABLE' not in scan.group(2):
+            table = shape.aliases.get(scan.group(1), scan.group(1))
+            index = PLAN_INDEX.search(scan.group(2))
+            if not index:
+                findings.append((FULL_SCAN, table, step))
+            elif shape.equality[table] or (shape.flags[table] and index.group(1) not in partial):
+                # Walks the whole index (usually for the ORDER BY) and filters row by row;
+                # a partial index has already filtered on the flags
+                findings.append((INDEX_SCAN, table, step))
+        elif PLAN_TEMP_SORT.search(step):
+            findings.append((TEMP_SORT, main_table, step))
+    return findings
+
+
+def replay(workload, tokens, client=None, iterations=1):
+    """
+    Send every request iterations times. Returns the median latency in ms
+    per request name and, for the first pass, every SELECT with its params.
+    """
+    client = client or WSGIClient()
+    timings, statements = {}, []
+    for name, role, path in workload:
+        latencies = []
+        for iteration in range(iterations):
+            with record_queries(keep_sql=iteration == 0) as recorder:
+                started = time.perf_counter()
+                client.request('GET', path, token=tokens.get(role))
+                latencies.append(time.perf_counter() - started)
+            statements.extend((name, sql, params) for sql, params in recorder.statements)
+        timings[name] = round(statistics.median(latencies) * 1000, 3)
+    return timings, statements
+
+
+def analyze(statements):
+    """Explain each distinct SELECT once; returns AnalyzedQuery objects in first-seen order."""
+    queries = {}
+    partial = partial_indexes()
+    for name, sql, params in statements:
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        key = fingerprint(sql)
+        query = queries.get(key)
+        if query is None:
+            query = queries[key] = AnalyzedQuery(sql, params)
+            query.plan = explain(sql, params)
+            query.shape = StatementShape(sql)
+            query.findings = find_problems(query.plan, query.shape, partial)
+        query.calls += 1
+        query.requests.add(name)
+    return list(queries.values())
+
+
+def model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table and not model._meta.proxy:
+            return model
+    return None
+
+
+def existing_indexes(table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        constraint['columns'] for constraint in constraints.values()
+        if constraint['index'] or constraint['unique'] or constraint['primary_key']
+    ]
+
+
+def index_name(model, fields, condition):
+    parts = [model._meta.model_name, *fields]
+    parts += [column if value else f'not_{column}' for column, value in condition.items()]
+    name = '_'.join(parts + ['idx'])
+    if len(name) <= models.Index.max_name_length:
+        return name
+    # Same shape as Django's generated names, with the condition in the digest
+    return f"{model._meta.db_table[:11]}_{fields[0][:7]}_{names_digest(name, length=6)}_idx"
+
+
+class Recommendation:
+    def __init__(self, model, columns, condition, queries):
+        self.model = model
+        self.columns = columns
+        self.queries = queries
+        # Summed query time in ms without and with the index, set by evaluate()
+        self.before_ms = self.after_ms = None
+        column_fields = {field.column: field.name for field in model._meta.concrete_fields}
+        self.fields = [column_fields[column] for column in columns]
+        self.condition = {column_fields[column]: value for column, value in condition.items()}
+        self.index = models.Index(
+            fields=self.fields, name=index_name(model, self.fields, self.condition),
+            condition=models.Q(**self.condition) if self.condition else None,
+        )
+
+    @property
+    def app_label(self):
+        return self.model._meta.app_label
+
+    def definition(self):
+        """The models.Index(...) line for the model's Meta.indexes."""
+        condition = ''
+        if self.condition:
+            terms = ', '.join(f'{name}={value}' for name, value in self.condition.items())
+            condition = f', condition=models.Q({terms})'
+        return f'models.Index(fields={self.fields!r}, name={self.index.name!r}{condition})'
+
+    def __str__(self):
+        where = ' WHERE ' + ' AND '.join(
+            name if value else f'NOT {name}' for name, value in self.condition.items()
+        ) if self.condition else ''
+        return f"{self.model._meta.label}({', '.join(self.fields)}){where}"
+
+
+def recommend(queries):
+    """Composite (and partial) indexes that would serve the flagged queries."""
+    flagged = defaultdict(list)
+    for query in queries:
+        for kind, table, step in query.findings:
+            if query not in flagged[table]:
+                flagged[table].append(query)
+
+    recommendations = []
+    for table, table_queries in flagged.items():
+        model = model_for_table(table)
+        if model is None:
+            continue
+        usage = Counter(
+            column for query in table_queries for column in query.shape.equality[table]
+        )
+        candidates = {}
+        for query in table_queries:
+            equality = query.shape.equality[table]
+            flags = query.shape.flags[table]
+            # Columns most of the workload filters on go first so more queries share the prefix
+            ordered = sorted(equality, key=lambda column: (-usage[column], equality.index(column)))
+            columns = tuple(ordered + [
+                column for column in query.shape.tail(table) if column not in flags
+            ])
+            if not columns or not (equality or flags) or (columns == (model._meta.pk.column,) and not flags):
+                continue
+            condition = tuple(sorted(flags.items()))
+            candidates.setdefault((columns, condition), []).append(query)
+
+        existing = [tuple(columns) for columns in existing_indexes(table)]
+        for (columns, condition), served in candidates.items():
+            if not condition and any(other[:len(columns)] == columns for other in existing):
+                continue
+            # A longer proposal with the same condition serves these queries too
+            longer = [
+                key for key in candidates
+                if key[1] == condition and key[0] != columns and key[0][:len(columns)] == columns
+            ]
+            if longer:
+                candidates[longer[0]].extend(query for query in served if query not in candidates[longer[0]])
+                continue
+            recommendations.append(Recommendation(model, list(columns), dict(condition), served))
+    return recommendations
+
+
+def time_query(query, iterations):
+    """Fastest of iterations runs in ms; the minimum is the least noisy estimate."""
+    latencies = []
+    with connection.cursor() as cursor:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            cursor.execute(query.sql, query.params)
+            cursor.fetchall()
+            latencies.append(time.perf_counter() - started)
+    return round(min(latencies) * 1000, 3)
+
+
+def gather_statistics():
+    """Refresh sqlite_stat1 so the planner can weigh the indexes by selectivity."""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def apply_indexes(recommendations):
+    with connection.schema_editor() as editor:
+        for recommendation in recommendations:
+            editor.add_index(recommendation.model, recommendation.index)
+    gather_statistics()
+
+
+def evaluate(recommendations, statements, iterations):
+    """
+    Create the recommended indexes and explain and time the workload's
+    queries again. Indexes are dropped again unless they remove a finding
+    from one of the queries they were meant for and cut those queries'
+    total time by at least MIN_GAIN. Returns (kept, dropped, {fingerprint: ms before},
+    queries re-analyzed with the kept indexes in place).
+    """
+    served = {query.fingerprint: query for recommendation in recommendations for query in recommendation.queries}
+    before = {key: time_query(query, iterations) for key, query in served.items()}
+    apply_indexes(recommendations)
+    current = {query.fingerprint: query for query in analyze(statements)}
+    after = {key: time_query(current[key], iterations) for key in served}
+
+    kept, dropped = [], []
+    for recommendation in recommendations:
+        keys = [query.fingerprint for query in recommendation.queries]
+        recommendation.before_ms = round(sum(before[key] for key in keys), 3)
+        recommendation.after_ms = round(sum(after[key] for key in keys), 3)
+        improved = any(len(current[key].findings) < len(served[key].findings) for key in keys)
+        faster = recommendation.after_ms <= recommendation.before_ms * (1 - MIN_GAIN)
+        (kept if improved and faster else dropped).append(recommendation)
+    with connection.schema_editor() as editor:
+        for recommendation in dropped:
+            editor.remove_index(recommendation.model, recommendation.index)
+    return kept, dropped, before, analyze(statements)
+
+
+def write_migrations(recommendations):
+    """Write one AddIndex migration per app; returns the written paths."""
+    from django.db import migrations
+    from django.db.migrations.autodetector import MigrationAutodetector
+    from django.db.migrations.loader import MigrationLoader
+    from django.db.migrations.writer import MigrationWriter
+
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    by_app = defaultdict(list)
+    for recommendation in recommendations:
+        by_app[recommendation.app_label].append(recommendation)
+
+    paths = []
+    for app_label, app_recommendations in by_app.items():
+        leaves = loader.graph.leaf_nodes(app_label)
+        number = max((MigrationAutodetector.parse_number(name) or 0 for _, name in leaves), default=0) + 1
+        migration = migrations.Migration(f'{number:04d}_advised_indexes', app_label)
+        migration.dependencies = leaves
+        migration.operations = [
+            migrations.AddIndex(model_name=recommendation.model._meta.model_name, index=recommendation.index)
+            for recommendation in app_recommendations
+        ]
+        writer = MigrationWriter(migration)
+        with open(writer.path, 'w') as output:
+            output.write(writer.as_string())
+        paths.append(writer.path)
+    return paths
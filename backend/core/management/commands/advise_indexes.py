@@ -0,0 +1,126 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from core.benchmark import WSGIClient, obtain_token, populate_dataset
+from core.index_advisor import (
+    DEFAULT_SIZES,
+    DEFAULT_WORKLOAD,
+    analyze,
+    evaluate,
+    gather_statistics,
+    parse_workload,
+    recommend,
+    replay,
+    time_query,
+    write_migrations,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a workload of GET requests against a throwaway seeded database, explain every '
+        'distinct query, flag full scans and temp B-tree sorts, and recommend composite indexes '
+        'with their before/after timings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workload',
+            help='File with one request per line ("GET /api/...", a path or an access log line); '
+                 'defaults to the built-in list of hot read paths'
+        )
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=default, help=f'Number of {name} to create')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per request and per query')
+        parser.add_argument(
+            '--write-migrations', action='store_true',
+            help='Write an AddIndex migration for the recommended indexes in each app'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('advise_indexes reads SQLite query plans; the database is '
+                               f'{connection.vendor}.')
+        if options['workload']:
+            with open(options['workload']) as lines:
+                workload = parse_workload(lines)
+            if not workload:
+                raise CommandError(f"No GET requests found in {options['workload']}.")
+        else:
+            workload = DEFAULT_WORKLOAD
+
+        sizes = {name: options[name] for name in DEFAULT_SIZES}
+        iterations = options['iterations']
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # The response cache would answer repeated requests without touching the database
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=['localhost'], RESPONSE_CACHE_ENABLED=False):
+                staff, member = populate_dataset(sizes, options['seed'])
+                gather_statistics()
+                client = WSGIClient()
+                tokens = {
+                    'staff': obtain_token(client, staff.email),
+                    'member': obtain_token(client, member.email),
+                }
+                before, statements = replay(workload, tokens, client, iterations)
+                queries = analyze(statements)
+                flagged = [query for query in queries if query.findings]
+                recommendations = recommend(queries)
+
+                dropped, after, query_before, query_after = [], {}, {}, {}
+                if recommendations:
+                    recommendations, dropped, query_before, requeried = evaluate(
+                        recommendations, statements, iterations
+                    )
+                    after, _ = replay(workload, tokens, client, iterations)
+                    for query in requeried:
+                        if query.fingerprint in query_before:
+                            query_after[query.fingerprint] = (time_query(query, iterations), query.findings)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f'{len(statements)} queries, {len(queries)} distinct, {len(flagged)} with full scans '
+            f'or temp B-tree sorts'
+        )
+        for query in flagged:
+            self.stdout.write('')
+            self.stdout.write(f"[{', '.join(sorted(query.requests))}] x{query.calls}")
+            self.stdout.write(f'  {query.fingerprint[:200]}')
+            for kind, table, step in query.findings:
+                self.stdout.write(self.style.WARNING(f'  {kind}: {step}'))
+            if query.fingerprint in query_after:
+                ms, findings = query_after[query.fingerprint]
+                remaining = f"{len(findings)} finding(s) left" if findings else 'resolved'
+                self.stdout.write(f'  {query_before[query.fingerprint]:.3f} ms -> {ms:.3f} ms ({remaining})')
+
+        if dropped:
+            self.stdout.write('\nTried and dropped (no finding removed, or too little time saved):')
+            for recommendation in dropped:
+                self.stdout.write(
+                    f'  {recommendation}  {recommendation.before_ms:.3f} ms -> {recommendation.after_ms:.3f} ms'
+                )
+        if not recommendations:
+            self.stdout.write(self.style.SUCCESS('\nNo new indexes recommended.'))
+            return
+
+        self.stdout.write('\nRecommended indexes:')
+        for recommendation in recommendations:
+            self.stdout.write(
+                f'  {recommendation}  {recommendation.before_ms:.3f} ms -> {recommendation.after_ms:.3f} ms'
+            )
+            self.stdout.write(f'    {recommendation.definition()}')
+
+        self.stdout.write(f"\n{'request':<32} {'before ms':>10} {'after ms':>10} {'change':>8}")
+        for name, ms in before.items():
+            change = f'{(after[name] - ms) / ms * 100:+.1f}%' if ms else 'n/a'
+            self.stdout.write(f'{name:<32} {ms:>10.3f} {after[name]:>10.3f} {change:>8}')
+
+        if options['write_migrations']:
+            self.stdout.write('')
+            for path in write_migrations(recommendations):
+                self.stdout.write(self.style.SUCCESS(f'Wrote {path}'))
+            self.stdout.write('Add the models.Index lines above to each model\'s Meta.indexes so '
+                              'makemigrations stays in step with the migrations.')
@@ -0,0 +1,79 @@
+import json
+import platform
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from core.benchmark import (
+    BENCHMARK_SETTINGS,
+    DEFAULT_SIZES,
+    WSGIClient,
+    build_scenarios,
+    format_comparison,
+    format_results,
+    populate_dataset,
+    run_benchmark,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the /api/ endpoints in-process through the WSGI application, '
+        'against a throwaway database filled with a dataset of the given size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint')
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=default, help=f'Number of {name} to create')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset and request mix')
+        parser.add_argument(
+            '--only', nargs='+', metavar='PREFIX',
+            help='Only run endpoints whose name starts with one of these prefixes (e.g. books events.list)'
+        )
+        parser.add_argument('--output', help='Write the results as JSON to this path')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] for name in DEFAULT_SIZES}
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(**BENCHMARK_SETTINGS):
+                staff, member = populate_dataset(sizes, options['seed'])
+                client = WSGIClient()
+                scenarios = build_scenarios(client, staff, member, options['seed'])
+                results = run_benchmark(
+                    scenarios, options['iterations'], options['warmup'],
+                    client=client, only=options['only']
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(format_results(results))
+
+        if options['output']:
+            report = {
+                'meta': {
+                    'created_at': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                    'iterations': options['iterations'],
+                    'warmup': options['warmup'],
+                    'seed': options['seed'],
+                    'sizes': sizes,
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                baseline_results = json.load(baseline)['results']
+            self.stdout.write('')
+            self.stdout.write(format_comparison(baseline_results, results))
@@ -0,0 +1,121 @@
+import json
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.media_gc import reconcile
+from core.models import MediaBlob
+from core.storage import is_blob
+
+STATE_FILE = '.gc_media_state.json'
+QUARANTINE_DIR = '.quarantine'
+
+
+class Command(BaseCommand):
+    help = (
+        'Find media files no row refers to (orphans) and referenced files that are gone (missing) '
+        'by merging a sorted walk of MEDIA_ROOT with sorted database queries. Reports by default; '
+        '--quarantine or --delete acts on orphans. --max-files makes a run stop part way and the '
+        'next run resume there, so it can be scheduled nightly on a large volume.'
+    )
+
+    def add_arguments(self, parser):
+        action = parser.add_mutually_exclusive_group()
+        action.add_argument('--delete', action='store_true', help='Delete orphans')
+        action.add_argument(
+            '--quarantine', action='store_true',
+            help=f'Move orphans to MEDIA_ROOT/{QUARANTINE_DIR}/, keeping their paths'
+        )
+        parser.add_argument(
+            '--max-files', type=int,
+            help='Stop after this many files and resume after the last one next time'
+        )
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Leave orphans modified more recently than this (uploads still committing)'
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore the saved position and start over')
+        parser.add_argument('--show', type=int, default=20, help='Orphans and missing files to list')
+
+    def handle(self, *args, **options):
+        root = settings.MEDIA_ROOT
+        if not os.path.isdir(root):
+            raise CommandError(f'MEDIA_ROOT {root} does not exist.')
+        action = 'delete' if options['delete'] else 'quarantine' if options['quarantine'] else 'report'
+        if options['max_files'] is not None and options['max_files'] < 1:
+            raise CommandError('--max-files must be at least 1.')
+        state_path = os.path.join(root, STATE_FILE)
+        # Each action keeps its own position, so report runs never make a
+        # --delete run skip files
+        cursors = self.load_state(state_path)
+        cursor = '' if options['restart'] else cursors.get(action, '')
+        cutoff = time.time() - options['grace_hours'] * 3600
+
+        counts = {'ok': 0, 'orphan': 0, 'recent': 0, 'missing': 0}
+        orphan_bytes = 0
+        shown = {'orphan': [], 'missing': []}
+        last = cursor
+        scanned = 0
+        for kind, name, path, stat in reconcile(root, cursor, options['max_files']):
+            if kind != 'missing':
+                last = name
+                scanned += 1
+            if kind == 'orphan' and stat.st_mtime > cutoff:
+                kind = 'recent'
+            counts[kind] += 1
+            if kind in shown and len(shown[kind]) < options['show']:
+                shown[kind].append(name)
+            if kind == 'orphan':
+                orphan_bytes += stat.st_size
+                if action != 'report':
+                    self.remove(root, name, path, action)
+            if kind != 'missing' and scanned % 1000 == 0:
+                # Checkpoint as we go, so a killed run loses little work
+                cursors[action] = last
+                self.save_state(state_path, cursors)
+
+        complete = options['max_files'] is None or scanned < options['max_files']
+        cursors[action] = '' if complete else last
+        self.save_state(state_path, cursors)
+
+        for kind, label in (('orphan', 'Orphan'), ('missing', 'Missing')):
+            for name in shown[kind]:
+                self.stdout.write(f'{label}: {name}')
+        start = f' after {cursor}' if cursor else ''
+        self.stdout.write(
+            f"Scanned {scanned} file(s){start}: "
+            f"{counts['ok']} referenced, {counts['orphan']} orphaned ({orphan_bytes} bytes), "
+            f"{counts['recent']} too recent to judge, {counts['missing']} referenced but missing"
+        )
+        verb = {'report': 'Nothing changed', 'delete': 'Deleted the orphans',
+                'quarantine': f'Moved the orphans to {QUARANTINE_DIR}/'}[action]
+        position = 'finished the media tree' if complete else f'next run resumes after {last}'
+        self.stdout.write(self.style.SUCCESS(f'{verb}; {position}.'))
+
+    def load_state(self, state_path):
+        """{action: name the last run of that action stopped after}."""
+        try:
+            with open(state_path) as state:
+                return json.load(state).get('cursors', {})
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            raise CommandError(f'{state_path} is not valid JSON; remove it.')
+
+    def save_state(self, state_path, cursors):
+        temp_path = state_path + '.tmp'
+        with open(temp_path, 'w') as state:
+            json.dump({'cursors': cursors, 'saved_at': timezone.now().isoformat()}, state)
+        os.replace(temp_path, state_path)
+
+    def remove(self, root, name, path, action):
+        if action == 'delete':
+            os.remove(path)
+        else:
+            target = os.path.join(root, QUARANTINE_DIR, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        if is_blob(name):
+            # Its row only counts references; nothing refers to it any more
+            MediaBlob.objects.filter(name=name, refcount__lte=0).delete()
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.images import derivative_models, derivatives_settled, process
+
+
+class Command(BaseCommand):
+    help = (
+        'Make the missing thumb/card/full derivatives of uploaded images, e.g. for uploads made '
+        'before the derivative pipeline or skipped while its queue was full.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', metavar='APP.MODEL',
+            help='Only this model (repeatable), e.g. bookbank.BookImage'
+        )
+        parser.add_argument(
+            '--force', action='store_true', help='Remake derivatives that are up to date, and retry unreadable images'
+        )
+
+    def handle(self, *args, **options):
+        models = {model._meta.label_lower: model for model in derivative_models()}
+        if options['model']:
+            unknown = [label for label in options['model'] if label.lower() not in models]
+            if unknown:
+                raise CommandError(f"No image derivatives on {', '.join(unknown)}; choose from {', '.join(models)}.")
+            models = {label: models[label] for label in (name.lower() for name in options['model'])}
+
+        for label, model in models.items():
+            field = model.derivative_source_field
+            rows = model._default_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            made = 0
+            for instance in rows.only('pk', field, 'derivatives').iterator():
+                if options['force'] or not derivatives_settled(instance):
+                    process(model._meta.label, instance.pk, force=options['force'])
+                    made += 1
+            self.stdout.write(f'{model._meta.label}: {made} image(s) processed')
@@ -0,0 +1,153 @@
+import hashlib
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.cache import bump_generation
+from core.models import ImageDerivativesMixin
+from core.storage import (
+    ContentAddressedStorage,
+    file_fields,
+    is_blob,
+    normalized_extension,
+    referenced_blobs,
+    update_references,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Move media files saved before content-addressed storage (or under another storage '
+        'prefix) into their field storage\'s blobs/, storing identical files once, and point the '
+        'rows (and their image derivatives) at the new names.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved')
+        parser.add_argument(
+            '--keep-originals', action='store_true',
+            help='Leave the old files in place once every row points at its blob'
+        )
+
+    def handle(self, *args, **options):
+        models = [model for model in apps.get_models() if file_fields(model)]
+        for model in models:
+            for field in file_fields(model):
+                if not isinstance(field.storage, ContentAddressedStorage):
+                    raise CommandError(
+                        f'{model._meta.label}.{field.name} is not stored by ContentAddressedStorage; '
+                        'set DEFAULT_FILE_STORAGE to core.storage.ContentAddressedStorage.'
+                    )
+
+        self.dry_run = options['dry_run']
+        # Old name -> (storage, blob name, size), shared across models so a
+        # file referenced by several rows is read once; None when it is missing
+        self.moved = {}
+        # Old names some row now points away from, and those a skipped row still uses
+        self.switched, self.pinned = set(), set()
+        for model in models:
+            rows = self.migrate_model(model)
+            self.stdout.write(f'{model._meta.label}: {rows} row(s) updated')
+
+        originals = {name: entry for name, entry in self.moved.items() if entry is not None}
+        for name in sorted(name for name, entry in self.moved.items() if entry is None):
+            self.stdout.write(self.style.WARNING(f'Missing file, rows left unchanged: {name}'))
+        if not self.dry_run and not options['keep_originals']:
+            for name, (storage, _, _) in originals.items():
+                # A blob copied into another prefix may still back other rows;
+                # its reference count covers it
+                if name in self.switched and name not in self.pinned and not is_blob(name):
+                    storage.delete(name)
+
+        blob_sizes = {blob: size for _, blob, size in originals.values()}
+        saved = sum(size for _, _, size in originals.values()) - sum(blob_sizes.values())
+        verb = 'would move' if self.dry_run else 'moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(originals)} file(s) {verb} into {len(blob_sizes)} blob(s); '
+            f'deduplication saves {saved} byte(s)'
+        ))
+
+    def move(self, storage, name):
+        """The blob name for a legacy file name, storing the file on first sight."""
+        if name not in self.moved:
+            if not storage.exists(name):
+                self.moved[name] = None
+            else:
+                size = storage.size(name)
+                if self.dry_run:
+                    blob = self.digest_name(storage, name)
+                else:
+                    with storage.open(name, 'rb') as original:
+                        blob = storage.save(name, original)
+                self.moved[name] = (storage, blob, size)
+        entry = self.moved[name]
+        return entry[1] if entry is not None else None
+
+    def digest_name(self, storage, name):
+        """The name saving the file would give it, without writing it."""
+        digest = hashlib.sha256()
+        with storage.open(name, 'rb') as original:
+            for chunk in original.chunks():
+                digest.update(chunk)
+        return storage.blob_name(digest.hexdigest(), normalized_extension(name))
+
+    def migrate_model(self, model):
+        fields = file_fields(model)
+        derived = issubclass(model, ImageDerivativesMixin)
+        tracked = [field.attname for field in fields] + (['derivatives'] if derived else [])
+        updated_rows = 0
+        for instance in model._default_manager.only(*tracked).iterator():
+            # Old names this row's update replaces
+            updates, expected, replaced = {}, {}, set()
+            for field in fields:
+                name = getattr(instance, field.attname).name
+                if name and not field.storage.holds(name):
+                    blob = self.move(field.storage, name)
+                    if blob is not None:
+                        updates[field.attname] = blob
+                        expected[field.attname] = name
+                        replaced.add(name)
+
+            if derived and 'sizes' in instance.derivatives:
+                updates.update(self.migrate_derivatives(instance, updates, replaced))
+
+            if not updates:
+                continue
+            if self.dry_run:
+                updated_rows += 1
+                continue
+            stored = referenced_blobs(instance)
+            with transaction.atomic():
+                # Skip rows whose files changed since they were read
+                if model._default_manager.filter(pk=instance.pk, **expected).update(**updates):
+                    for attname, value in updates.items():
+                        setattr(instance, attname, value)
+                    update_references(stored, referenced_blobs(instance))
+                    updated_rows += 1
+                    self.switched |= replaced
+                else:
+                    self.pinned |= replaced
+
+        if updated_rows and not self.dry_run:
+            # update() skips post_save, and the serialized URLs changed
+            bump_generation(model)
+        return updated_rows
+
+    def migrate_derivatives(self, instance, updates, replaced):
+        """
+        {'derivatives': value} naming the moved derivatives and source, or {}
+        if unchanged. The old names of moved derivatives are added to replaced.
+        """
+        derivatives = instance.derivatives
+        storage = instance.get_derivative_source().storage
+        sizes = {}
+        for size, entry in derivatives['sizes'].items():
+            name = entry['name']
+            if not storage.holds(name):
+                blob = self.move(storage, name)
+                if blob is not None:
+                    replaced.add(name)
+                    name = blob
+            sizes[size] = dict(entry, name=name)
+        source_field = instance._meta.get_field(instance.derivative_source_field).attname
+        renamed = dict(derivatives, sizes=sizes, source=updates.get(source_field, derivatives['source']))
+        return {'derivatives': renamed} if renamed != derivatives else {}
@@ -0,0 +1,76 @@
+import argparse
+import re
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from core.seeding import CampusSeeder
+from locations.gazetteer import resolve_all
+from lostfound.fuzzy import rebuild_trigram_index
+from lostfound.matching import rebuild_index as rebuild_match_index
+from search.index import index_available, rebuild_index
+
+SUFFIXES = {'': 1, 'k': 1000, 'm': 1000000}
+COUNT_RE = re.compile(r'(\d+(?:\.\d+)?)([km]?)', re.IGNORECASE)
+
+
+def row_count(value):
+    """argparse type for a number of rows, with an optional k or M suffix (50k, 1M, 2.5k)."""
+    match = COUNT_RE.fullmatch(value.strip())
+    if match is None:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a row count (e.g. 5000, 50k, 1M)')
+    number, suffix = match.groups()
+    # Decimal, so 1.1M is exactly 1100000
+    count = Decimal(number) * SUFFIXES[suffix.lower()]
+    if count != int(count):
+        raise argparse.ArgumentTypeError(f'{value!r} is not a whole number of rows')
+    return int(count)
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with a deterministic synthetic campus: users, books, book requests, '
+        'events, registrations, comments, lost & found items and roommate posts. '
+        'Row counts take k and M suffixes (50k, 1M).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=row_count, default=1000)
+        parser.add_argument('--books', type=row_count, default=2000)
+        parser.add_argument('--book-requests', type=row_count, help='Defaults to a quarter of --books')
+        parser.add_argument('--events', type=row_count, default=100)
+        parser.add_argument('--registrations', type=row_count, default=5000)
+        parser.add_argument('--comments', type=row_count, help='Defaults to a tenth of --registrations')
+        parser.add_argument('--items', type=row_count, default=2000, help='Lost & found items')
+        parser.add_argument('--posts', type=row_count, default=500, help='Roommate posts')
+        parser.add_argument('--seed', type=int, default=0, help='Same seed, same rows')
+        parser.add_argument('--batch-size', type=row_count, default=5000, help='Rows per bulk INSERT')
+        parser.add_argument(
+            '--password', default='campus-pass-123',
+            help='Password shared by every seeded user (hashed once)'
+        )
+
+    def handle(self, *args, **options):
+        seeder = CampusSeeder(
+            seed=options['seed'], batch_size=options['batch_size'],
+            password=options['password'], log=self.stdout.write
+        )
+        started = time.perf_counter()
+        summary = seeder.run(
+            users=options['users'], books=options['books'], book_requests=options['book_requests'],
+            events=options['events'], registrations=options['registrations'],
+            comments=options['comments'], items=options['items'], posts=options['posts']
+        )
+        if index_available():
+            # The rows were bulk inserted, bypassing the search index signals
+            rebuild_index(log=self.stdout.write)
+        items, postings = rebuild_match_index()
+        self.stdout.write(f'Indexed {items} open lost & found item(s) for matching ({postings} postings)')
+        items, terms = rebuild_trigram_index()
+        self.stdout.write(f'Indexed {items} lost & found item(s) for fuzzy lookups ({terms} distinct terms)')
+        linked = resolve_all()
+        self.stdout.write(f'Linked {sum(linked.values())} location(s) to gazetteer places')
+        elapsed = time.perf_counter() - started
+        rows = sum(summary.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
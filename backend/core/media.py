@@ -0,0 +1,170 @@
+"""
+Production media serving.
+
+serve_media answers GET/HEAD for files under MEDIA_ROOT without reading
+them in Python beyond the bytes sent:
+
+* Validators come from stat() (or, for content-addressed blobs, the digest
+  in the name), and a matching If-None-Match/If-Modified-Since gets a 304.
+* Blobs never change, so they are sent with ``Cache-Control: immutable``;
+  other files get MEDIA_CACHE_MAX_AGE and are revalidated.
+* A single ``Range: bytes=`` range gets a 206 (honouring If-Range); whole
+  files go through FileResponse, which servers send with sendfile().
+* Private files (PrivateMediaStorage, e.g. lost & found photos) need the
+  signature their URL was issued with; checking it is an HMAC, not a
+  database query or a file read.
+* With MEDIA_SENDFILE_HEADER set to 'X-Accel-Redirect' (nginx) or
+  'X-Sendfile' (Apache, lighttpd), the response carries only headers and the
+  front proxy sends the file, ranges included.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from .storage import BLOB_PREFIX, INCOMING_DIR, blob_digest, check_signature, is_private
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+READ_SIZE = 64 * 1024
+
+# Blobs are named after their content, so a URL's response never changes
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single ``bytes=`` range, None to send the
+    whole file (no header, or several ranges), or 'unsatisfiable'.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return 'unsatisfiable'
+    return start, end
+
+
+def iter_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(READ_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def range_applies(request, etag, last_modified):
+    """False when If-Range names a different version than the one on disk."""
+    condition = request.META.get('HTTP_IF_RANGE')
+    if not condition:
+        return True
+    if condition.startswith('"') or condition.startswith('W/'):
+        return condition == etag
+    return parse_http_date_safe(condition) == last_modified
+
+
+def sendfile_response(name, path, content_type):
+    header = settings.MEDIA_SENDFILE_HEADER
+    response = HttpResponse(content_type=content_type)
+    if header == 'X-Accel-Redirect':
+        response[header] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + name
+    else:
+        response[header] = path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    # Dotfiles and half-written uploads are never served
+    if name.startswith('.') or f'/{BLOB_PREFIX}/{INCOMING_DIR}/' in f'/{name}':
+        raise Http404
+    private = is_private(name)
+    digest = blob_digest(name)
+    if private and not check_signature(name, request.GET.get('expires'), request.GET.get('signature')):
+        if not digest:
+            # A legacy name is the uploaded filename; don't confirm it exists
+            raise Http404
+        return HttpResponseForbidden('This link has expired or is not valid.')
+
+    try:
+        full_path = default_storage.path(name)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = f'"{digest}"' if digest else f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or 'application/octet-stream'
+        response = build_response(request, name, full_path, stat.st_size, content_type, etag, last_modified)
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if digest:
+        patch_cache_control(
+            response, private=private, public=not private, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, private=private, public=not private, max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
+    return response
+
+
+def build_response(request, name, path, size, content_type, etag, last_modified):
+    if settings.MEDIA_SENDFILE_HEADER:
+        return sendfile_response(name, path, content_type)
+
+    byte_range = None
+    if range_applies(request, etag, last_modified):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        start, end, status = 0, size - 1, 200
+    else:
+        (start, end), status = byte_range, 206
+    length = end - start + 1 if size else 0
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, status=status)
+    elif status == 200:
+        # FileResponse hands the open file to the server's wsgi.file_wrapper (sendfile)
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        response = StreamingHttpResponse(iter_range(path, start, length), content_type=content_type, status=206)
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    if status == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,137 @@
+"""
+Reconciling MEDIA_ROOT with the database.
+
+Both sides are read as streams sorted the same way (byte order of the
+storage name) and merged like a sorted merge join, so neither the file
+list nor the referenced names are ever held in memory:
+
+* walk_media() yields the files under MEDIA_ROOT in name order. Sorting a
+  directory's entries with a trailing '/' on subdirectories makes the
+  depth-first walk come out in plain string order.
+* referenced_names() merges one ``ORDER BY`` query per file field (plus
+  the referenced MediaBlob rows, which cover image derivatives) with
+  heapq.merge.
+
+A file no stream names is an orphan and a name with no file is missing.
+Every stream can start after a cursor, so a run can stop after a number of
+files and the next one carry on from there (see the gc_media command).
+"""
+import heapq
+import os
+from django.apps import apps
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Collate
+from .models import ImageDerivativesMixin, MediaBlob
+from .storage import file_fields, is_blob
+
+# Collations comparing names byte by byte, like Python compares the walked paths
+BINARY_COLLATIONS = {'postgresql': 'C', 'mysql': 'utf8mb4_bin'}
+
+CHUNK_SIZE = 2000
+
+
+def walk_media(root, after=''):
+    """
+    Yield (name, path, stat) for every file under root whose name sorts after
+    ``after``, in name order. Dot entries (the GC's own state and quarantine)
+    are skipped.
+    """
+    def walk(directory, prefix):
+        try:
+            with os.scandir(directory) as scan:
+                entries = [entry for entry in scan if not entry.name.startswith('.')]
+        except FileNotFoundError:
+            return
+        keyed = []
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            keyed.append((prefix + entry.name + ('/' if is_dir else ''), is_dir, entry))
+        keyed.sort(key=lambda item: item[0])
+        for key, is_dir, entry in keyed:
+            if is_dir:
+                # Skip subtrees that sort wholly before the cursor
+                if key > after or after.startswith(key):
+                    yield from walk(entry.path, key)
+            elif key > after and entry.is_file(follow_symlinks=False):
+                yield key, entry.path, entry.stat(follow_symlinks=False)
+
+    yield from walk(root, '')
+
+
+def _ordered_names(queryset, field, after):
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    key = Collate(F(field), collation) if collation else F(field)
+    rows = queryset.annotate(gc_key=key).filter(gc_key__gt=after).order_by('gc_key')
+    return rows.values_list('gc_key', flat=True).iterator(chunk_size=CHUNK_SIZE)
+
+
+def legacy_derivative_names():
+    """
+    Sorted names of derivatives stored before content-addressed storage.
+    These live only in the JSON column, so they are collected in memory;
+    migrate_media_storage turns them into blobs, which MediaBlob covers.
+    """
+    names = set()
+    for model in apps.get_models():
+        if not issubclass(model, ImageDerivativesMixin):
+            continue
+        for derivatives in model._default_manager.values_list('derivatives', flat=True).iterator(
+            chunk_size=CHUNK_SIZE
+        ):
+            for entry in (derivatives or {}).get('sizes', {}).values():
+                if not is_blob(entry['name']):
+                    names.add(entry['name'])
+    return sorted(names)
+
+
+def referenced_names(after=''):
+    """Every stored name the database refers to, sorted, without duplicates."""
+    streams = []
+    for model in apps.get_models():
+        for field in file_fields(model):
+            rows = model._default_manager.exclude(**{field.attname: ''}).exclude(
+                **{f'{field.attname}__isnull': True}
+            )
+            streams.append(_ordered_names(rows, field.attname, after))
+    streams.append(_ordered_names(MediaBlob.objects.filter(refcount__gt=0), 'name', after))
+    streams.append(name for name in legacy_derivative_names() if name > after)
+
+    previous = None
+    for name in heapq.merge(*streams):
+        if name != previous:
+            yield name
+            previous = name
+
+
+def reconcile(root, after='', limit=None):
+    """
+    Merge the files under root with the referenced names, both after the
+    cursor ``after``, and yield ('orphan', name, path, stat), ('missing',
+    name, None, None) and ('ok', name, path, stat) in name order.
+
+    With ``limit``, stops after that many files; names past the last file
+    are then left for the next run rather than reported missing.
+    """
+    files = walk_media(root, after)
+    names = referenced_names(after)
+    file = next(files, None)
+    name = next(names, None)
+    seen = 0
+    while file is not None or name is not None:
+        if file is not None and (name is None or file[0] < name):
+            if limit is not None and seen >= limit:
+                return
+            seen += 1
+            yield ('orphan',) + file
+            file = next(files, None)
+        elif file is None or name < file[0]:
+            yield 'missing', name, None, None
+            name = next(names, None)
+        else:
+            if limit is not None and seen >= limit:
+                return
+            seen += 1
+            yield ('ok',) + file
+            file = next(files, None)
+            name = next(names, None)
@@ -0,0 +1,39 @@
+import logging
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .queries import record_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the SQL each request runs.
+
+    The query count, total SQL time and number of duplicated queries are
+    returned in X-Query-Count / X-Query-Time / X-Query-Duplicates headers
+    and in a Server-Timing entry (visible in the browser dev tools).
+    Duplicated query fingerprints, which usually point at an N+1, are
+    logged as warnings. Enabled by settings.QUERY_INSTRUMENTATION.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as recorder:
+            response = self.get_response(request)
+
+        duration_ms = recorder.duration * 1000
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time'] = f'{duration_ms:.2f}'
+        response['X-Query-Duplicates'] = str(recorder.duplicate_count)
+        response['Server-Timing'] = f'db;dur={duration_ms:.2f};desc="{recorder.count} queries"'
+
+        for sql, count in recorder.duplicates.items():
+            logger.warning(
+                'Duplicated query (%d times) on %s %s: %s',
+                count, request.method, request.path, sql
+            )
+        return response
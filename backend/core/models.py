@@ -0,0 +1,159 @@
+import uuid
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from .cache import bump_generation
+
+
+class MediaBlob(models.Model):
+    """
+    A file stored by core.storage.ContentAddressedStorage, with the number of
+    rows referencing it.
+    """
+    name = models.CharField(max_length=255, primary_key=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last upload or reference change; unreferenced blobs get a grace period from it
+    last_used = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['refcount', 'last_used'], name='mediablob_unused_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+
+class UploadSession(models.Model):
+    """
+    A resumable chunked upload (see core.uploads). ``received`` bytes of
+    ``size`` have been written to the session's staging file so far.
+    """
+    ACTIVE = 'active'
+    COMPLETE = 'complete'
+    STATUS_CHOICES = [
+        (ACTIVE, 'Active'),
+        (COMPLETE, 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ACTIVE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size})'
+
+
+class ImageDerivativesMixin(models.Model):
+    """
+    Keeps resized copies of an image field (see core.images).
+
+    ``derivatives`` records the original they were made from and each
+    size's file name and dimensions. Subclasses set
+    ``derivative_source_field`` when the image field is not ``image``.
+    """
+    derivative_source_field = 'image'
+
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def get_derivative_source(self):
+        return getattr(self, self.derivative_source_field)
+
+
+class PrimaryImageMixin(models.Model):
+    """
+    Shared behaviour for gallery images (BookImage, EventImage, RoommateImage).
+
+    Keeps the parent's ``primary_image`` pointer in sync with the
+    ``is_primary`` flags so listings can join straight to the primary image.
+    Subclasses set ``parent_field`` to the name of their FK to the parent.
+    """
+    parent_field = None
+
+    class Meta:
+        abstract = True
+
+    def get_parent(self):
+        return getattr(self, self.parent_field)
+
+    def save(self, *args, **kwargs):
+        parent = self.get_parent()
+        adding = self._state.adding
+        # If the gallery has no primary image yet, this one becomes it
+        if adding and parent.primary_image_id is None:
+            self.is_primary = True
+        super().save(*args, **kwargs)
+        if self.is_primary and parent.primary_image_id != self.pk:
+            self.make_primary()
+        elif not self.is_primary and not adding:
+            self.step_down()
+
+    def make_primary(self):
+        """Mark this image as the primary image of its gallery."""
+        parent = self.get_parent()
+        siblings = type(self).objects.filter(**{self.parent_field: parent})
+        with transaction.atomic():
+            siblings.filter(is_primary=True).exclude(pk=self.pk).update(is_primary=False)
+            if not self.is_primary:
+                siblings.filter(pk=self.pk).update(is_primary=True)
+                self.is_primary = True
+            type(parent).objects.filter(pk=parent.pk).update(primary_image=self)
+        parent.primary_image = self
+        # The updates above skip post_save, so invalidate cached responses by hand
+        bump_generation(type(self), type(parent))
+
+    def step_down(self):
+        """
+        If this image is its gallery's primary image, hand that over to the
+        oldest other image, or clear the parent's pointer when there is none.
+        """
+        parent = self.get_parent()
+        parent_model = type(parent)
+        with transaction.atomic():
+            # Read the pointer inside the transaction, not from a possibly stale parent
+            primary_id = parent_model._default_manager.filter(pk=parent.pk).values_list(
+                'primary_image_id', flat=True
+            ).first()
+            if primary_id != self.pk:
+                return
+            successor = next_primary_image(type(self), parent.pk, exclude=self.pk)
+            if successor is not None:
+                successor.make_primary()
+            else:
+                parent_model._default_manager.filter(pk=parent.pk).update(primary_image=None)
+        parent.primary_image = successor
+        if successor is None:
+            bump_generation(parent_model)
+
+
+def next_primary_image(model, parent_id, exclude=None):
+    """The oldest image of a gallery (other than exclude), which takes over as primary."""
+    images = model.objects.filter(**{f'{model.parent_field}_id': parent_id})
+    if exclude is not None:
+        images = images.exclude(pk=exclude)
+    return images.order_by('uploaded_at', 'pk').first()
+
+
+def promote_next_primary_image(sender, instance, **kwargs):
+    """
+    post_delete handler: when the primary image is removed, promote the
+    oldest remaining image of the gallery (if any).
+    """
+    if not instance.is_primary:
+        return
+    parent_id = getattr(instance, sender._meta.get_field(sender.parent_field).attname)
+    successor = next_primary_image(sender, parent_id)
+    if successor is not None:
+        successor.make_primary()
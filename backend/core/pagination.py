@@ -0,0 +1,124 @@
+import base64
+import binascii
+import json
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    By default this behaves like PageNumberPagination. Passing
+    ?pagination=cursor, or following a ?cursor= link, switches to keyset
+    mode: rows are ordered by the view's cursor_ordering column (e.g.
+    '-created_at') with the primary key as tiebreaker, and each page is
+    fetched with a WHERE on the last row's (value, pk) instead of an
+    OFFSET. No COUNT(*) is run, so page 1000 costs the same as page 1.
+    Both modes accept a bounded ?page_size=.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def keyset_requested(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.keyset_requested(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.field, descending = self.get_ordering(queryset, view)
+        value, pk, reverse = self.decode_cursor(request)
+
+        # Walking backwards (towards "previous") flips the comparison and the ordering
+        forward_descending = descending != reverse
+        name = self.field.name
+        op = 'lt' if forward_descending else 'gt'
+        if pk is not None:
+            # (value, pk) strictly after the cursor, written so the index on the
+            # ordering column bounds the range scan
+            queryset = queryset.filter(
+                Q(**{f'{name}__{op}e': value}) & (Q(**{f'{name}__{op}': value}) | Q(**{f'pk__{op}': pk}))
+            )
+        prefix = '-' if forward_descending else ''
+        rows = list(queryset.order_by(f'{prefix}{name}', f'{prefix}pk')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, pk is not None
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def get_ordering(self, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is None:
+            ordering = (queryset.query.order_by or queryset.model._meta.ordering or ['-pk'])[0]
+        descending = ordering.startswith('-')
+        field = queryset.model._meta.get_field(ordering.lstrip('-'))
+        if field.null:
+            raise ImproperlyConfigured(
+                f'Keyset pagination needs a non-null ordering column; {field.name} is nullable.'
+            )
+        return field, descending
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            value = self.field.to_python(payload['v'])
+            pk = self.field.model._meta.pk.to_python(payload['pk'])
+            reverse = bool(payload.get('r'))
+        except (ValueError, TypeError, KeyError, UnicodeEncodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, reverse
+
+    def encode_cursor(self, obj, reverse):
+        payload = {'v': self.field.value_to_string(obj), 'pk': str(obj.pk)}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            # Paged past the end (e.g. rows were deleted); start again from the top
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,66 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from django.db import connections
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+# BEGIN, COMMIT, SAVEPOINT and friends repeat by design; they are no N+1
+_TRANSACTION_CONTROL = re.compile(r'\s*(BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """
+    Reduce a SQL statement to its shape so repeated queries that only
+    differ in their parameters (the usual N+1 signature) compare equal.
+    """
+    sql = _LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts queries, sums their duration and
+    tallies the fingerprints of all but transaction control statements.
+    """
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.keep_sql = keep_sql
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            if not _TRANSACTION_CONTROL.match(sql):
+                self.fingerprints[fingerprint(sql)] += 1
+            if self.keep_sql:
+                self.statements.append((sql, params))
+
+    @property
+    def duplicates(self):
+        """Fingerprints that ran more than once, with their counts."""
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    @property
+    def duplicate_count(self):
+        """Number of queries that repeated an earlier fingerprint."""
+        return sum(count - 1 for count in self.duplicates.values())
+
+
+@contextmanager
+def record_queries(keep_sql=False):
+    """Record every query run on any database connection inside the block."""
+    recorder = QueryRecorder(keep_sql=keep_sql)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
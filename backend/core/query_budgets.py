@@ -0,0 +1,83 @@
+from importlib import import_module
+from django.apps import apps
+from rest_framework.routers import BaseRouter
+
+# Maximum number of SQL queries each GET endpoint may run against the
+# fixture data in core.tests.QueryBudgetTests. Keyed by URL name; every
+# GET route of every router in the apps' urls.py must have an entry.
+# List GETs build their ETag from the rows they serve, without a query of
+# their own (core.conditional).
+QUERY_BUDGETS = {
+    # bookbank
+    'book-list': 3,
+    'book-detail': 2,
+    'book-request-list': 2,
+    'book-request-detail': 1,
+    'book-request-incoming': 3,
+    'book-request-outgoing': 3,
+    'book-image-list': 2,
+    'book-image-detail': 1,
+    # lostfound
+    'lostfounditem-list': 2,
+    'lostfounditem-detail': 1,
+    'lostfounditem-similar-images': 4,
+    'lostfounditem-matches': 4,
+    # roommate
+    'roommate-post-list': 3,
+    'roommate-post-detail': 2,
+    # noticeboard
+    'event-list': 3,
+    'event-detail': 6,
+    'event-comments': 3,
+    'event-comment-list': 2,
+    'event-comment-detail': 1,
+    'event-registration-list': 2,
+    'event-registration-detail': 1,
+    'admin-event-list': 7,
+    'admin-event-detail': 6,
+    'admin-event-statistics': 4,
+    'admin-event-comment-list': 2,
+    'admin-event-comment-detail': 1,
+    'admin-event-registration-list': 2,
+    'admin-event-registration-detail': 1,
+    # core
+    'upload-session-detail': 1,
+}
+
+
+def iter_routers():
+    """Yield (module name, router) for every DRF router declared in an app's urls.py."""
+    for app_config in apps.get_app_configs():
+        try:
+            module = import_module(f'{app_config.name}.urls')
+        except ModuleNotFoundError:
+            continue
+        for value in vars(module).values():
+            if isinstance(value, BaseRouter):
+                yield module.__name__, value
+
+
+def iter_get_endpoints():
+    """
+    Yield (url name, basename, is_detail) for every GET route the app
+    routers expose, including extra @action routes.
+    """
+    for _, router in iter_routers():
+        for prefix, viewset, basename in router.registry:
+            for route in router.get_routes(viewset):
+                # Extra action mappings are MethodMappers, whose .get() is a decorator
+                if 'get' not in route.mapping or not hasattr(viewset, route.mapping['get']):
+                    continue
+                yield route.name.format(basename=basename), basename, route.detail
+
+
+def format_budget_report(rows):
+    """
+    Render (endpoint, budget, queries, duplicates) rows as a fixed-width table,
+    sorted by endpoint so reports from two releases diff cleanly.
+    """
+    lines = [f"{'endpoint':<40} {'budget':>6} {'queries':>7} {'duplicates':>10}"]
+    for name, budget, count, duplicates in sorted(rows):
+        budget = '-' if budget is None else budget
+        lines.append(f'{name:<40} {budget:>6} {count:>7} {duplicates:>10}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,321 @@
+"""
+Synthetic campus data at production scale.
+
+CampusSeeder fills the main tables with bulk_create batches. The data is
+deterministic for a given seed and skewed the way real traffic is: a few
+departments hold most of the books, a handful of events draw most of the
+registrations, and a small share of users post most of the listings.
+"""
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import UserProfile
+from bookbank.models import BookPost, BookRequest
+from lostfound.models import LostFoundItem
+from noticeboard.models import Event, EventComment, EventRegistration
+from roommate.models import RoommatePost
+from .cache import VERSIONED_MODELS, bump_generation
+
+User = get_user_model()
+
+# (name, weight) pairs; the weights give a long-tailed department mix
+DEPARTMENTS = [
+    ('Computer Science', 30), ('Electronics', 18), ('Mechanical', 14), ('Mathematics', 9),
+    ('Civil', 7), ('Physics', 6), ('Chemistry', 5), ('Economics', 4), ('Management', 3),
+    ('Biotechnology', 2), ('Architecture', 1), ('Humanities', 1),
+]
+CAMPUS_LOCATIONS = [
+    ('Central Library', 25), ('Main Canteen', 18), ('Academic Block A', 12), ('Academic Block B', 10),
+    ('Sports Complex', 8), ('Boys Hostel 1', 7), ('Girls Hostel 1', 6), ('Auditorium', 5),
+    ('Parking Lot', 4), ('Computer Centre', 3), ('Admin Building', 2),
+]
+LOST_FOUND_CATEGORIES = [
+    ('electronics', 30), ('id card', 20), ('keys', 15), ('bottle', 12), ('books', 10),
+    ('clothing', 8), ('wallet', 5),
+]
+ITEM_NAMES = {
+    'electronics': ['iPhone 13', 'Samsung Galaxy', 'AirPods', 'Calculator', 'Charger', 'Laptop'],
+    'id card': ['Student ID card', 'Library card', 'Hostel ID'],
+    'keys': ['Room keys', 'Bike keys', 'Locker key'],
+    'bottle': ['Water bottle', 'Steel flask'],
+    'books': ['Notebook', 'Lab record', 'Textbook'],
+    'clothing': ['Black hoodie', 'Umbrella', 'Cap', 'Jacket'],
+    'wallet': ['Brown wallet', 'Card holder'],
+}
+COLORS = ['black', 'white', 'blue', 'red', 'grey', 'silver', 'green']
+BRANDS = ['Apple', 'Samsung', 'Milton', 'Casio', 'Nike', 'Adidas', 'Dell', 'HP', '']
+EVENT_TYPES = [choice for choice, _ in Event.EVENT_TYPES]
+NEIGHBOURHOODS = ['North Campus', 'South Gate', 'Station Road', 'Lake View', 'Old City', 'Tech Park']
+
+SPAN_DAYS = 730
+
+
+def weighted_choices(rng, pairs, k):
+    names, weights = zip(*pairs)
+    return rng.choices(names, weights=weights, k=k)
+
+
+def skewed_index(rng, n, skew=3.0):
+    """Index in [0, n) biased towards 0, so low indices act as heavy users."""
+    return min(n - 1, int(n * rng.random() ** skew))
+
+
+def deterministic_uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Stop auto_now/auto_now_add from overwriting the timestamps we generate."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class CampusSeeder:
+    """
+    Populates the database with a deterministic synthetic campus.
+
+    All seeded users share one password that is hashed a single time, so
+    creating 50k users costs one hash instead of 50k.
+    """
+    def __init__(self, seed=0, batch_size=5000, password='campus-pass-123', log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = password
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.user_ids = []
+        self.staff_ids = []
+
+    def timestamp(self, recent_bias=2.0):
+        """A point in the last SPAN_DAYS days, biased towards recent dates."""
+        age = SPAN_DAYS * self.rng.random() ** recent_bias
+        return self.now - timedelta(days=age)
+
+    def insert(self, model, rows):
+        """bulk_create an iterable of unsaved instances in batches; return the row count."""
+        total, batch = 0, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+        self.log(f'Created {total} {model._meta.verbose_name_plural}')
+        return total
+
+    def run(self, users=1000, books=2000, book_requests=None, events=100, registrations=5000,
+            comments=None, items=2000, posts=500):
+        if book_requests is None:
+            book_requests = books // 4
+        if comments is None:
+            comments = registrations // 10
+        users = max(users, 2)
+        summary = {}
+        with transaction.atomic(), explicit_timestamps(
+            BookPost, BookRequest, Event, EventRegistration, EventComment, LostFoundItem, RoommatePost
+        ):
+            summary['users'] = self.seed_users(users)
+            summary['books'], summary['book_requests'] = self.seed_books(books, book_requests)
+            summary['events'], summary['registrations'], summary['comments'] = self.seed_events(
+                events, registrations, comments
+            )
+            summary['items'] = self.seed_lost_found(items)
+            summary['posts'] = self.seed_roommate_posts(posts)
+        # bulk_create sends no post_save, so drop cached responses explicitly
+        bump_generation(*VERSIONED_MODELS)
+        return summary
+
+    def seed_users(self, count):
+        rng = self.rng
+        password = make_password(self.password)
+        staff_count = max(1, count // 200)
+        self.user_ids = [deterministic_uuid(rng) for _ in range(count)]
+        self.staff_ids = self.user_ids[:staff_count]
+        joined = [self.timestamp(1.0) for _ in range(count)]
+        total = self.insert(User, (
+            User(
+                id=user_id, email=f'user{i}@campus.example', name=f'Student {i}',
+                mobile=f'7{i:09d}', password=password, is_staff=i < staff_count,
+                date_joined=joined[i]
+            )
+            for i, user_id in enumerate(self.user_ids)
+        ))
+        departments = weighted_choices(rng, DEPARTMENTS, count)
+        with explicit_timestamps(UserProfile):
+            self.insert(UserProfile, (
+                UserProfile(
+                    user_id=user_id, department=departments[i], student_id=f'S{i:07d}',
+                    created_at=joined[i], updated_at=joined[i]
+                )
+                for i, user_id in enumerate(self.user_ids)
+            ))
+        return total
+
+    def seed_books(self, count, request_count):
+        rng, user_ids = self.rng, self.user_ids
+        departments = weighted_choices(rng, DEPARTMENTS, count)
+        book_ids = []
+
+        def books():
+            for i in range(count):
+                created = self.timestamp()
+                book_id = deterministic_uuid(rng)
+                book_ids.append(book_id)
+                transaction_type = rng.choices(['sell', 'donate', 'exchange'], weights=[70, 20, 10])[0]
+                yield BookPost(
+                    id=book_id, title=f'{departments[i]} Textbook Vol. {i % 97 + 1}',
+                    author=f'Author {skewed_index(rng, 500)}', isbn=f'978{i:010d}',
+                    condition=rng.choice(['new', 'good', 'good', 'fair', 'poor']),
+                    price=Decimal(rng.randint(50, 1500)) if transaction_type == 'sell' else None,
+                    transaction_type=transaction_type, department=departments[i],
+                    course_code=f'{departments[i][:2].upper()}{rng.randint(100, 499)}',
+                    posted_by_id=user_ids[skewed_index(rng, len(user_ids))],
+                    contact_email='books@campus.example',
+                    is_available=rng.random() > 0.2, created_at=created, updated_at=created
+                )
+
+        book_total = self.insert(BookPost, books())
+
+        def requests():
+            seen = set()
+            for _ in range(request_count):
+                # Popular (low index) books collect most of the requests
+                pair = (book_ids[skewed_index(rng, len(book_ids), 2.0)], user_ids[rng.randrange(len(user_ids))])
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                created = self.timestamp()
+                yield BookRequest(
+                    id=deterministic_uuid(rng), book_id=pair[0], requested_by_id=pair[1],
+                    message='Is this still available?',
+                    status=rng.choices(['pending', 'accepted', 'rejected', 'completed'], weights=[60, 15, 15, 10])[0],
+                    created_at=created, updated_at=created
+                )
+
+        request_total = self.insert(BookRequest, requests()) if book_ids else 0
+        return book_total, request_total
+
+    def seed_events(self, count, registration_count, comment_count):
+        rng, user_ids = self.rng, self.user_ids
+        event_ids = []
+
+        def events():
+            for _ in range(count):
+                start = self.now + timedelta(days=rng.randint(-SPAN_DAYS, 90), hours=rng.randint(8, 18))
+                created = min(start, self.now) - timedelta(days=rng.randint(1, 30))
+                event_id = deterministic_uuid(rng)
+                event_ids.append(event_id)
+                yield Event(
+                    id=event_id, title=f'{rng.choice(EVENT_TYPES).title()} #{len(event_ids)}',
+                    description='Join us on campus.', event_type=rng.choice(EVENT_TYPES),
+                    start_datetime=start, end_datetime=start + timedelta(hours=rng.randint(1, 8)),
+                    location=weighted_choices(rng, CAMPUS_LOCATIONS, 1)[0],
+                    organizer_id=rng.choice(self.staff_ids), is_free=rng.random() > 0.2,
+                    registration_required=rng.random() > 0.5, is_approved=rng.random() > 0.05,
+                    created_at=created, updated_at=created
+                )
+
+        event_total = self.insert(Event, events())
+        if not event_ids:
+            return event_total, 0, 0
+
+        # Zipf-like popularity over a shuffled ranking, so a few hot events get most sign-ups
+        ranks = list(range(len(event_ids)))
+        rng.shuffle(ranks)
+        weights = [1 / (rank + 1) ** 1.1 for rank in ranks]
+        scale = sum(weights)
+
+        def allocate(total, cap):
+            sizes = [min(cap, int(total * weight / scale)) for weight in weights]
+            # Hand what rounding and the cap left over to the hottest events with room
+            remaining = total - sum(sizes)
+            for index in sorted(range(len(sizes)), key=lambda i: ranks[i]):
+                if remaining <= 0:
+                    break
+                extra = min(cap - sizes[index], remaining)
+                sizes[index] += extra
+                remaining -= extra
+            return sizes
+
+        def registrations():
+            for event_id, size in zip(event_ids, allocate(registration_count, len(user_ids))):
+                for user_index in rng.sample(range(len(user_ids)), size):
+                    yield EventRegistration(
+                        id=deterministic_uuid(rng), event_id=event_id, user_id=user_ids[user_index],
+                        registration_date=self.timestamp(), attended=rng.random() > 0.4
+                    )
+
+        def comments():
+            for event_id, size in zip(event_ids, allocate(comment_count, comment_count)):
+                for _ in range(size):
+                    created = self.timestamp()
+                    yield EventComment(
+                        id=deterministic_uuid(rng), event_id=event_id,
+                        user_id=user_ids[rng.randrange(len(user_ids))],
+                        content='Looking forward to this!', created_at=created, updated_at=created
+                    )
+
+        return event_total, self.insert(EventRegistration, registrations()), self.insert(EventComment, comments())
+
+    def seed_lost_found(self, count):
+        rng, user_ids = self.rng, self.user_ids
+        categories = weighted_choices(rng, LOST_FOUND_CATEGORIES, count)
+        locations = weighted_choices(rng, CAMPUS_LOCATIONS, count)
+
+        def items():
+            for i in range(count):
+                reported = self.timestamp()
+                # Older reports are more likely to have been resolved
+                resolved = rng.random() < (self.now - reported).days / SPAN_DAYS
+                yield LostFoundItem(
+                    id=deterministic_uuid(rng), item_name=rng.choice(ITEM_NAMES[categories[i]]),
+                    description='Reported via CampusConnect', status=rng.choices(['lost', 'found'], weights=[60, 40])[0],
+                    location=locations[i], date_reported=reported,
+                    date_occurred=reported - timedelta(hours=rng.randint(0, 72)),
+                    reporter_id=user_ids[skewed_index(rng, len(user_ids), 1.5)],
+                    claimed_by_id=user_ids[rng.randrange(len(user_ids))] if resolved else None,
+                    is_resolved=resolved, category=categories[i], color=rng.choice(COLORS),
+                    brand=rng.choice(BRANDS), created_at=reported, updated_at=reported
+                )
+
+        return self.insert(LostFoundItem, items())
+
+    def seed_roommate_posts(self, count):
+        rng, user_ids = self.rng, self.user_ids
+
+        def posts():
+            for i in range(count):
+                created = self.timestamp()
+                yield RoommatePost(
+                    id=deterministic_uuid(rng), user_id=user_ids[skewed_index(rng, len(user_ids), 1.5)],
+                    title=f'Room available near {rng.choice(NEIGHBOURHOODS)}', description='Furnished room.',
+                    location=rng.choice(NEIGHBOURHOODS), rent=Decimal(rng.randrange(3000, 20000, 500)),
+                    available_from=(created + timedelta(days=rng.randint(0, 60))).date(),
+                    lease_duration=rng.choice([3, 6, 6, 12, 12]),
+                    room_type=rng.choice(['private', 'shared', 'apartment']),
+                    preferred_gender=rng.choice(['M', 'F', 'A', 'A']), contact_number=f'9{i:09d}'[:10],
+                    contact_email='rooms@campus.example', is_active=rng.random() > 0.3,
+                    created_at=created, updated_at=created
+                )
+
+        return self.insert(RoommatePost, posts())
@@ -0,0 +1,45 @@
+import os
+import re
+from django.conf import settings
+from rest_framework import serializers
+from .models import UploadSession
+from .uploads import UPLOAD_TARGETS
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'sha256', 'offset', 'chunk_size', 'status', 'created_at', 'updated_at']
+        read_only_fields = ['status', 'created_at', 'updated_at']
+
+    def get_chunk_size(self, obj):
+        return settings.CHUNKED_UPLOAD_CHUNK_SIZE
+
+    def validate_filename(self, value):
+        # Only the name is kept; the storage decides where the file goes
+        name = os.path.basename(value.replace('\\', '/'))
+        if not name:
+            raise serializers.ValidationError('A file name is required.')
+        return name
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('The file is empty.')
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Files may be at most {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes.'
+            )
+        return value
+
+    def validate_sha256(self, value):
+        if not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError('Expected a hex SHA-256 digest.')
+        return value.lower()
+
+
+class UploadFinalizeSerializer(serializers.Serializer):
+    target = serializers.ChoiceField(choices=list(UPLOAD_TARGETS))
+    object_id = serializers.CharField()
@@ -0,0 +1,298 @@
+"""
+Content-addressed, deduplicated media storage.
+
+ContentAddressedStorage names every file it saves after the SHA-256 of its
+bytes, sharded two levels deep: ``blobs/ab/cd/abcd...<64 hex>.jpg``, or
+``private/blobs/...`` for PrivateMediaStorage. The digest is computed while
+the upload is streamed to a temporary file beside the blobs, so nothing is
+buffered whole; when a blob with that digest already exists the temporary file is dropped and the existing name is
+returned, so a re-posted photo costs no extra disk. With 256 entries per
+level a directory stays small however many files are stored.
+
+Each blob has a MediaBlob row counting the rows that point at it through a
+file field or an image derivative, kept by the signals connected in
+connect_media_signals(). A blob whose count reaches zero stays on disk, as
+a duplicate upload may be about to reuse it (which refreshes its mtime);
+``manage.py gc_media`` removes it once it is older than a grace period.
+
+Files saved before this storage keep their names and are not counted;
+``manage.py migrate_media_storage`` moves them into blobs/.
+"""
+import hashlib
+import math
+import os
+import posixpath
+import re
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from urllib.parse import urlencode
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.signing import Signer
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+# Partially written uploads; not a shard, as shards are two hex digits
+INCOMING_DIR = 'tmp'
+
+# Spellings of the same format share one blob name
+EXTENSION_ALIASES = {'.jpeg': '.jpg', '.jpe': '.jpg', '.tif': '.tiff'}
+
+# A stored blob, under the blobs/ of any storage prefix (e.g. private/)
+BLOB_NAME = re.compile(r'^(?:(?P<prefix>[a-z]+)/)?blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?:\.\w+)?$')
+
+PRIVATE_PREFIX = 'private'
+
+
+def normalized_extension(name):
+    extension = os.path.splitext(name)[1].lower()
+    return EXTENSION_ALIASES.get(extension, extension)
+
+
+def is_blob(name):
+    return bool(name) and BLOB_NAME.match(name) is not None
+
+
+def blob_digest(name):
+    """The SHA-256 a blob name was made from, or None for other names."""
+    match = BLOB_NAME.match(name or '')
+    return match.group('digest') if match else None
+
+
+@lru_cache(maxsize=None)
+def legacy_private_dirs():
+    """
+    upload_to directories of the PrivateMediaStorage fields. Files saved
+    there before the field was private keep those names until
+    migrate_media_storage moves them, and are private all the same.
+    """
+    dirs = set()
+    for model in apps.get_models():
+        for field in file_fields(model):
+            if isinstance(field.storage, PrivateMediaStorage) and isinstance(field.upload_to, str):
+                # Only the fixed part of a strftime path
+                directory = field.upload_to.split('%', 1)[0].strip('/')
+                if directory:
+                    dirs.add(directory + '/')
+    return tuple(sorted(dirs))
+
+
+def is_private(name):
+    name = name or ''
+    return name.startswith(PRIVATE_PREFIX + '/') or name.startswith(legacy_private_dirs())
+
+
+def media_signature(name, expires):
+    return Signer(salt='core.storage.media').signature(f'{name}:{expires}')
+
+
+def signing_expiry():
+    """
+    The expiry of signed URLs made now: PRIVATE_MEDIA_URL_MAX_AGE from now,
+    rounded up to PRIVATE_MEDIA_URL_BUCKET, so URLs made within one bucket are
+    identical and stay cacheable.
+    """
+    bucket = settings.PRIVATE_MEDIA_URL_BUCKET
+    return math.ceil((time.time() + settings.PRIVATE_MEDIA_URL_MAX_AGE) / bucket) * bucket
+
+
+def signing_started(expires):
+    """Unix time from which signed URLs are made with this expiry."""
+    return expires - settings.PRIVATE_MEDIA_URL_BUCKET - settings.PRIVATE_MEDIA_URL_MAX_AGE
+
+
+def signed_query(name):
+    """
+    ?expires=&signature= granting access to a private file, valid for at
+    least PRIVATE_MEDIA_URL_MAX_AGE (see signing_expiry).
+    """
+    expires = signing_expiry()
+    return urlencode({'expires': expires, 'signature': media_signature(name, expires)})
+
+
+def check_signature(name, expires, signature):
+    """True when a signed private file URL is genuine and not yet expired."""
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    return expires >= time.time() and constant_time_compare(signature or '', media_signature(name, expires))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct content once under blobs/."""
+    prefix = ''
+
+    def blob_name(self, digest, extension):
+        return posixpath.join(self.prefix, BLOB_PREFIX, digest[:2], digest[2:4], digest + extension)
+
+    def holds(self, name):
+        """True when name is a blob of this storage (rather than a legacy or other-prefix name)."""
+        match = BLOB_NAME.match(name or '')
+        return match is not None and (match.group('prefix') or '') == self.prefix
+
+    def get_available_name(self, name, max_length=None):
+        # The stored name comes from the content (see _save), never from name
+        return name
+
+    def _makedirs(self, directory):
+        if self.directory_permissions_mode is not None:
+            # Same as FileSystemStorage: os.makedirs applies the umask to mode
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+    def _save(self, name, content):
+        incoming = self.path(posixpath.join(self.prefix, BLOB_PREFIX, INCOMING_DIR))
+        self._makedirs(incoming)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    temp.write(chunk)
+
+            name = self.blob_name(digest.hexdigest(), normalized_extension(name))
+            full_path = self.path(name)
+            self._makedirs(os.path.dirname(full_path))
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+                # A fresh mtime keeps gc_media off a blob that is being reused
+                os.utime(full_path)
+            else:
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                # Same filesystem, so the blob appears whole or not at all
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        record_blob(name, digest.hexdigest(), size)
+        return name
+
+
+@deconstructible
+class PrivateMediaStorage(ContentAddressedStorage):
+    """
+    Content-addressed storage under private/ whose URLs carry an expiring
+    signature; core.media.serve_media refuses private files without one.
+    """
+    prefix = PRIVATE_PREFIX
+
+    def url(self, name):
+        return f'{super().url(name)}?{signed_query(name)}'
+
+
+def record_blob(name, digest, size):
+    """Create or touch the MediaBlob row of a saved blob."""
+    from .models import MediaBlob
+    now = timezone.now()
+    if MediaBlob.objects.filter(name=name).update(last_used=now):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, sha256=digest, size=size, last_used=now)
+    except IntegrityError:
+        # A concurrent upload of the same bytes created it first
+        pass
+
+
+def _adjust(names, sign):
+    from .models import MediaBlob
+    by_count = defaultdict(list)
+    for name, count in names.items():
+        by_count[count].append(name)
+    for count, group in by_count.items():
+        MediaBlob.objects.filter(name__in=group).update(
+            refcount=F('refcount') + sign * count, last_used=timezone.now()
+        )
+
+
+def update_references(old, new):
+    """Move reference counts from the blobs in Counter old to those in new."""
+    _adjust(new - old, 1)
+    _adjust(old - new, -1)
+
+
+def unreferenced_blobs(grace=timedelta(hours=1)):
+    """MediaBlob rows nothing has referenced or uploaded for at least grace."""
+    from .models import MediaBlob
+    return MediaBlob.objects.filter(refcount__lte=0, last_used__lt=timezone.now() - grace)
+
+
+def file_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+
+
+def referenced_blobs(instance):
+    """Counter of the blob names instance points at, derivatives included."""
+    from .models import ImageDerivativesMixin
+    names = [getattr(instance, field.attname).name for field in file_fields(type(instance))]
+    if isinstance(instance, ImageDerivativesMixin):
+        names += [entry['name'] for entry in instance.derivatives.get('sizes', {}).values()]
+    return Counter(name for name in names if is_blob(name))
+
+
+def _tracked_fields(model):
+    from .models import ImageDerivativesMixin
+    fields = [field.attname for field in file_fields(model)]
+    if issubclass(model, ImageDerivativesMixin):
+        fields.append('derivatives')
+    return fields
+
+
+def remember_references(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stored_blobs = Counter()
+    if instance._state.adding or instance.pk is None:
+        return
+    fields = _tracked_fields(sender)
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    stored = sender._default_manager.filter(pk=instance.pk).only(*fields).first()
+    if stored is not None:
+        instance._stored_blobs = referenced_blobs(stored)
+
+
+def count_references(sender, instance, update_fields=None, **kwargs):
+    old = instance.__dict__.pop('_stored_blobs', Counter())
+    fields = _tracked_fields(sender)
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    update_references(old, referenced_blobs(instance))
+
+
+def release_references(sender, instance, **kwargs):
+    update_references(referenced_blobs(instance), Counter())
+
+
+def connect_media_signals():
+    for model in apps.get_models():
+        if not file_fields(model):
+            continue
+        label = model._meta.label_lower
+        pre_save.connect(remember_references, sender=model, dispatch_uid=f'remember_references_{label}')
+        post_save.connect(count_references, sender=model, dispatch_uid=f'count_references_{label}')
+        post_delete.connect(release_references, sender=model, dispatch_uid=f'release_references_{label}')
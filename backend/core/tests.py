@@ -0,0 +1,1130 @@
+import argparse
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlsplit
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from PIL import Image
+from bookbank.models import BookPost, BookImage, BookRequest
+from lostfound.models import ImageHash, LostFoundItem
+from lostfound.similarity import hash_fields
+from noticeboard.models import Event, EventImage, EventComment, EventRegistration
+from roommate.models import RoommatePost, RoommateImage
+from .cache import RESPONSE_CACHE_ALIAS, get_stats
+from .images import derivatives_ready
+from .management.commands.migrate_media_storage import Command as MigrateMediaStorage
+from .management.commands.seed_campus import row_count
+from .media_gc import reconcile, walk_media
+from .models import MediaBlob, UploadSession
+from .benchmark import BENCHMARK_SETTINGS, WSGIClient, build_scenarios, populate_dataset, run_benchmark
+from .index_advisor import (
+    DEFAULT_WORKLOAD, FULL_SCAN, StatementShape, analyze, explain, parse_workload, recommend, replay,
+)
+from .query_budgets import QUERY_BUDGETS, iter_get_endpoints, format_budget_report
+from .queries import QueryRecorder, record_queries
+from .seeding import DEPARTMENTS, LOST_FOUND_CATEGORIES, CampusSeeder, explicit_timestamps
+from .storage import ContentAddressedStorage
+
+User = get_user_model()
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='photo.gif'):
+    return SimpleUploadedFile(name, b'GIF89a', content_type='image/gif')
+
+
+def make_photo(name='photo.jpg', size=(2000, 1000)):
+    output = io.BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(output, 'JPEG')
+    return SimpleUploadedFile(name, output.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class QueryBudgetTests(APITestCase):
+    """
+    Runs every GET endpoint of every app router against a few rows per model
+    and fails when one exceeds its entry in QUERY_BUDGETS. Set the
+    QUERY_BUDGET_REPORT environment variable to a path to also write the
+    measured counts as a table.
+    """
+    ROWS = 3
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='owner@example.com',
+            name='Owner',
+            mobile='1234567890',
+            password='testpass123',
+            is_staff=True
+        )
+        cls.members = [
+            User.objects.create_user(
+                email=f'member{i}@example.com',
+                name=f'Member {i}',
+                mobile=f'98765432{i:02d}',
+                password='testpass123'
+            )
+            for i in range(cls.ROWS)
+        ]
+        start = timezone.now() + timedelta(days=7)
+        for i in range(cls.ROWS):
+            book = BookPost.objects.create(
+                title=f'Book {i}',
+                author='Author',
+                department='Physics',
+                posted_by=cls.owner,
+                contact_email='owner@example.com'
+            )
+            event = Event.objects.create(
+                title=f'Event {i}',
+                description='Description',
+                start_datetime=start,
+                end_datetime=start + timedelta(hours=2),
+                location='Main Hall',
+                organizer=cls.owner,
+                is_approved=True
+            )
+            post = RoommatePost.objects.create(
+                user=cls.owner,
+                title=f'Room {i}',
+                description='Description',
+                location='North Campus',
+                rent=5000,
+                available_from=date.today(),
+                lease_duration=6,
+                room_type='shared',
+                contact_number='1234567890',
+                contact_email='owner@example.com'
+            )
+            found = LostFoundItem.objects.create(
+                item_name=f'Item {i}',
+                status='found',
+                location='Library',
+                reporter=cls.owner,
+                claimed_by=cls.members[i]
+            )
+            lost = LostFoundItem.objects.create(
+                item_name=f'Item {i}', status='lost', location='Library', reporter=cls.members[i]
+            )
+            for item in (found, lost):
+                ImageHash.objects.create(item=item, source='lostfound/item.jpg', **hash_fields(i))
+            for _ in range(2):
+                BookImage.objects.create(book=book, image=make_image())
+                EventImage.objects.create(event=event, image=make_image())
+                RoommateImage.objects.create(post=post, image=make_image())
+            for member in cls.members:
+                BookRequest.objects.create(book=book, requested_by=member)
+                EventRegistration.objects.create(event=event, user=member)
+                EventComment.objects.create(event=event, user=member, content='Count me in')
+        UploadSession.objects.create(owner=cls.owner, filename='cover.jpg', size=1, sha256='0' * 64)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+
+    def detail_object(self, basename):
+        models = {
+            'book': BookPost,
+            'book-request': BookRequest,
+            'book-image': BookImage,
+            'lostfounditem': LostFoundItem,
+            'roommate-post': RoommatePost,
+            'event': Event,
+            'event-comment': EventComment,
+            'event-registration': EventRegistration,
+            'admin-event': Event,
+            'admin-event-comment': EventComment,
+            'admin-event-registration': EventRegistration,
+            'upload-session': UploadSession,
+        }
+        return models[basename].objects.first()
+
+    def test_every_router_endpoint_has_a_budget(self):
+        missing = [name for name, _, _ in iter_get_endpoints() if name not in QUERY_BUDGETS]
+        self.assertEqual(missing, [], 'Add these endpoints to core.query_budgets.QUERY_BUDGETS')
+
+    def test_endpoints_stay_within_budget(self):
+        rows = []
+        for name, basename, detail in iter_get_endpoints():
+            args = [self.detail_object(basename).pk] if detail else []
+            with record_queries() as recorder:
+                response = self.client.get(reverse(name, args=args))
+            self.assertEqual(response.status_code, 200, name)
+            rows.append((name, QUERY_BUDGETS.get(name), recorder.count, recorder.duplicate_count))
+
+        report_path = os.environ.get('QUERY_BUDGET_REPORT')
+        if report_path:
+            with open(report_path, 'w') as report:
+                report.write(format_budget_report(rows))
+
+        for name, budget, count, _ in rows:
+            with self.subTest(endpoint=name):
+                self.assertIsNotNone(budget)
+                self.assertLessEqual(count, budget, f'{name} ran {count} queries (budget {budget})')
+
+    def test_transaction_control_is_not_duplicated(self):
+        recorder = QueryRecorder()
+        for sql in ['BEGIN', 'SELECT 1', 'SAVEPOINT "s1"', 'RELEASE SAVEPOINT "s1"'] * 2:
+            recorder(lambda sql, params, many, context: None, sql, None, False, {})
+        self.assertEqual(recorder.count, 8)
+        self.assertEqual(recorder.duplicates, {'SELECT ?': 2})
+
+    def test_middleware_reports_query_headers(self):
+        response = self.client.get(reverse('book-list'))
+        self.assertIn('X-Query-Count', response)
+        self.assertIn('X-Query-Time', response)
+        self.assertEqual(response['X-Query-Duplicates'], '0')
+
+
+@override_settings(
+    ALLOWED_HOSTS=['localhost'],
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class BenchmarkHarnessTests(APITestCase):
+    def test_every_scenario_succeeds(self):
+        staff, member = populate_dataset({
+            'users': 3, 'books': 4, 'events': 2, 'registrations': 4, 'items': 4, 'posts': 2
+        })
+        client = WSGIClient()
+        results = run_benchmark(build_scenarios(client, staff, member), iterations=2, client=client)
+        self.assertIn('auth.token', results)
+        self.assertGreater(results['books.list']['queries_per_request'], 0)
+        for name, stats in results.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(stats['errors'], 0)
+                self.assertEqual(stats['requests'], 2)
+
+    def test_timed_requests_skip_query_instrumentation(self):
+        staff, member = populate_dataset({
+            'users': 2, 'books': 2, 'events': 1, 'registrations': 1, 'items': 1, 'posts': 1
+        })
+        with override_settings(**BENCHMARK_SETTINGS):
+            client = WSGIClient()
+            run_benchmark(build_scenarios(client, staff, member), iterations=1, client=client, only=['books.list'])
+        self.assertNotIn('X-Query-Count', client.last_headers)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CampusSeederTests(APITestCase):
+    SIZES = {'users': 40, 'books': 60, 'events': 8, 'registrations': 150, 'items': 30, 'posts': 10}
+
+    def test_creates_the_requested_rows(self):
+        summary = CampusSeeder(seed=7, batch_size=25).run(**self.SIZES)
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(BookPost.objects.count(), 60)
+        self.assertEqual(EventRegistration.objects.count(), 150)
+        self.assertEqual(summary['registrations'], 150)
+        self.assertEqual(summary['comments'], 15)
+        self.assertEqual(LostFoundItem.objects.count(), 30)
+        self.assertEqual(RoommatePost.objects.count(), 10)
+        # Seeded timestamps are kept rather than replaced by auto_now_add
+        self.assertLess(BookPost.objects.order_by('created_at').first().created_at, timezone.now() - timedelta(days=1))
+
+    def test_command_row_counts_take_suffixes(self):
+        counts = [row_count(value) for value in ('5000', '50k', '1M', '2.5k', '1.1M')]
+        self.assertEqual(counts, [5000, 50000, 1000000, 2500, 1100000])
+        for value in ('1.5', 'ten', '-5', '1G'):
+            with self.subTest(value=value), self.assertRaises(argparse.ArgumentTypeError):
+                row_count(value)
+
+    def test_same_seed_gives_same_rows(self):
+        CampusSeeder(seed=3).run(**self.SIZES)
+        first = list(BookPost.objects.order_by('pk').values_list('pk', 'title', 'posted_by_id'))
+        BookPost.objects.all().delete()
+        User.objects.all().delete()
+        CampusSeeder(seed=3).run(**self.SIZES)
+        second = list(BookPost.objects.order_by('pk').values_list('pk', 'title', 'posted_by_id'))
+        self.assertEqual(first, second)
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='owner@example.com',
+            name='Owner',
+            mobile='1234567890',
+            password='testpass123'
+        )
+        # Several rows share a timestamp so the id tiebreaker matters
+        now = timezone.now()
+        with explicit_timestamps(BookPost):
+            BookPost.objects.bulk_create([
+                BookPost(
+                    title=f'Book {i}', author='Author', department='Physics', posted_by=cls.owner,
+                    contact_email='owner@example.com', created_at=now - timedelta(minutes=i // 3),
+                    updated_at=now
+                )
+                for i in range(11)
+            ])
+        cls.expected = [
+            str(pk) for pk in BookPost.objects.order_by('-created_at', '-pk').values_list('pk', flat=True)
+        ]
+        cls.url = reverse('book-list')
+
+    def test_page_number_mode_is_the_default(self):
+        response = self.client.get(self.url, {'page': 2, 'page_size': 4})
+        self.assertEqual(response.data['count'], 11)
+        self.assertEqual([book['id'] for book in response.data['results']], self.expected[4:8])
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen, url, pages = [], self.url + '?pagination=cursor&page_size=4', 0
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            seen += [book['id'] for book in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+
+        # And back again through the previous links
+        seen, url = [], response.data['previous']
+        while url:
+            response = self.client.get(url)
+            seen = [book['id'] for book in response.data['results']] + seen
+            url = response.data['previous']
+        self.assertEqual(seen, self.expected[:8])
+
+    def test_deep_pages_cost_the_same_queries(self):
+        with record_queries() as first:
+            response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 2})
+        for _ in range(3):
+            response = self.client.get(response.data['next'])
+        with record_queries() as deep:
+            self.client.get(response.data['next'])
+        self.assertEqual(first.count, deep.count)
+
+    def test_page_size_is_bounded_and_bad_cursors_404(self):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 11)
+        self.assertIsNone(response.data['next'])
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ResponseCacheTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='owner@example.com',
+            name='Owner',
+            mobile='1234567890',
+            password='testpass123',
+            is_staff=True
+        )
+        cls.book = BookPost.objects.create(
+            title='Cached Book',
+            author='Author',
+            department='Physics',
+            posted_by=cls.owner,
+            contact_email='owner@example.com'
+        )
+        cls.url = reverse('book-list')
+
+    def setUp(self):
+        cache.clear()
+        caches[RESPONSE_CACHE_ALIAS].clear()
+
+    def test_anonymous_reads_are_served_from_cache(self):
+        first = self.client.get(self.url, {'page_size': 5, 'department': 'Physics'})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with record_queries() as recorder:
+            second = self.client.get(self.url, {'department': 'Physics', 'page_size': 5})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(recorder.count, 0)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(get_stats()['hits'], 1)
+        self.assertEqual(get_stats()['misses'], 1)
+
+    def test_authenticated_reads_bypass_the_cache(self):
+        self.client.force_authenticate(user=self.owner)
+        self.client.get(self.url)
+        self.assertNotIn('X-Cache', self.client.get(self.url))
+
+    def test_saves_invalidate_dependent_entries(self):
+        detail = reverse('book-detail', args=[self.book.pk])
+        self.client.get(detail)
+        self.book.title = 'Renamed Book'
+        self.book.save()
+        response = self.client.get(detail)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renamed Book')
+
+        # Related rows count too, including the update() in make_primary
+        self.client.get(detail)
+        image = BookImage.objects.create(book=self.book, image=make_image())
+        self.assertEqual(self.client.get(detail)['X-Cache'], 'MISS')
+        second = BookImage.objects.create(book=self.book, image=make_image())
+        self.client.get(detail)
+        second.make_primary()
+        self.assertEqual(self.client.get(detail)['X-Cache'], 'MISS')
+        image.delete()
+        self.owner.name = 'New Name'
+        self.owner.save()
+        self.assertEqual(self.client.get(detail)['X-Cache'], 'MISS')
+
+    def test_last_login_updates_keep_entries(self):
+        self.client.get(self.url)
+        self.owner.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+    @override_settings(RESPONSE_CACHE_MAX_BYTES=10)
+    def test_oversized_responses_are_not_stored(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(get_stats()['oversized'], 2)
+
+    def test_stats_endpoint_is_staff_only(self):
+        stats_url = reverse('response-cache-stats')
+        self.assertEqual(self.client.get(stats_url).status_code, 401)
+        self.client.force_authenticate(user=self.owner)
+        self.assertEqual(set(self.client.get(stats_url).data), {'hits', 'misses', 'oversized', 'hit_ratio'})
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ConditionalGetTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='owner@example.com',
+            name='Owner',
+            mobile='1234567890',
+            password='testpass123'
+        )
+        cls.other = User.objects.create_user(
+            email='other@example.com',
+            name='Other',
+            mobile='0987654321',
+            password='testpass123'
+        )
+        cls.book = BookPost.objects.create(
+            title='Conditional Book',
+            author='Author',
+            department='Physics',
+            posted_by=cls.owner,
+            contact_email='owner@example.com'
+        )
+        cls.list_url = reverse('book-list')
+        cls.detail_url = reverse('book-detail', args=[cls.book.pk])
+
+    def setUp(self):
+        caches[RESPONSE_CACHE_ALIAS].clear()
+        self.client.force_authenticate(user=self.owner)
+
+    def test_list_revalidates_with_one_query(self):
+        response = self.client.get(self.list_url)
+        self.assertIn('Last-Modified', response)
+        with record_queries() as recorder:
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(recorder.count, 1)
+
+    def test_cursor_pages_read_only_their_rows(self):
+        url = self.list_url + '?pagination=cursor'
+        # The page and the gallery prefetch; no COUNT or MAX over the table
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertIn('ETag', response)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        # Seen through the page's updated_at even without a generation bump
+        BookPost.objects.filter(pk=self.book.pk).update(updated_at=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_detail_validators_match_the_revalidation_path(self):
+        with record_queries() as plain:
+            response = self.client.get(self.detail_url)
+        with record_queries() as revalidation:
+            not_modified = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(revalidation.count, 1)
+        # A plain GET reads updated_at from the loaded object, without an extra query
+        self.assertEqual(plain.count, QUERY_BUDGETS['book-detail'])
+
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_produce_a_new_etag(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        BookImage.objects.create(book=self.book, image=make_image())
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = self.client.get(self.list_url)['ETag']
+        BookPost.objects.filter(pk=self.book.pk).delete()
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_signed_media_etags_follow_the_expiry(self):
+        item = LostFoundItem.objects.create(
+            item_name='Umbrella', status='lost', reporter=self.owner, image=make_image()
+        )
+        url = reverse('lostfounditem-detail', args=[item.pk])
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        # Once URLs are signed with a later expiry, older copies are replaced
+        later = time.time() + settings.PRIVATE_MEDIA_URL_BUCKET
+        with mock.patch('core.storage.time.time', return_value=later):
+            fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(fresh.status_code, 200)
+            self.assertNotEqual(fresh.data['image'], response.data['image'])
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(response.status_code, 200)
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get(self.list_url)['ETag']
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cached_anonymous_responses_revalidate_without_queries(self):
+        self.client.force_authenticate(user=None)
+        etag = self.client.get(self.detail_url)['ETag']
+        with record_queries() as recorder:
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(recorder.count, 0)
+
+    def test_unknown_detail_still_404s(self):
+        response = self.client.get(reverse('book-detail', args=['not-a-uuid']), HTTP_IF_NONE_MATCH='W/"x"')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    ALLOWED_HOSTS=['localhost'], RESPONSE_CACHE_ENABLED=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class IndexAdvisorTests(APITestCase):
+    def test_statement_shape_reads_filters_and_ordering(self):
+        queryset = LostFoundItem.objects.filter(status='lost', is_resolved=False, category='Books')
+        sql, _ = queryset.order_by('-date_reported').query.sql_with_params()
+        shape = StatementShape(sql)
+        table = LostFoundItem._meta.db_table
+        self.assertEqual(sorted(shape.equality[table]), ['category', 'status'])
+        self.assertEqual(shape.flags[table], {'is_resolved': False})
+        self.assertEqual(shape.tail(table), ['date_reported'])
+
+    def test_flags_scans_and_recommends_partial_indexes(self):
+        populate_dataset({'users': 3, 'books': 4, 'events': 2, 'registrations': 4, 'items': 4, 'posts': 6})
+        _, statements = replay([('roommate.active', 'anonymous', '/api/roommate/posts/?is_active=true')], {})
+        queries = analyze(statements)
+        self.assertTrue(any(kind == FULL_SCAN for query in queries for kind, _, _ in query.findings))
+        advised = [str(recommendation) for recommendation in recommend(queries)]
+        self.assertIn('roommate.RoommatePost(created_at) WHERE is_active', advised)
+
+    def test_hot_filters_use_their_partial_indexes(self):
+        sql, params = BookPost.objects.filter(
+            is_available=True, department='Physics'
+        ).order_by('-created_at', '-id').query.sql_with_params()
+        self.assertIn('SEARCH bookbank_bookpost USING INDEX bookpost_available_dept_idx', ' '.join(explain(sql, params)))
+        sql, params = LostFoundItem.objects.filter(
+            status='lost', is_resolved=False, category='Books'
+        ).query.sql_with_params()
+        # Either open-items index beats a scan; which one depends on the statistics
+        self.assertIn('USING INDEX lostfound_open_', ' '.join(explain(sql, params)))
+
+    def test_default_workload_filters_on_seeded_values(self):
+        # A filter no seeded row matches would measure plans over empty results
+        seeded = {
+            'category': {name for name, _ in LOST_FOUND_CATEGORIES},
+            'department': {name for name, _ in DEPARTMENTS},
+        }
+        for name, _, path in DEFAULT_WORKLOAD:
+            for key, value in parse_qsl(urlsplit(path).query):
+                if key in seeded:
+                    self.assertIn(value, seeded[key], name)
+
+    def test_workload_files_accept_paths_and_log_lines(self):
+        workload = parse_workload([
+            '# hot paths',
+            'GET /api/bookbank/books/?department=Physics',
+            '127.0.0.1 - - [17/Oct/2026:10:00:00] "GET /api/lostfound/items/?status=lost HTTP/1.1" 200 512',
+            '/api/roommate/posts/',
+            '',
+        ])
+        self.assertEqual([path for _, _, path in workload], [
+            '/api/bookbank/books/?department=Physics', '/api/lostfound/items/?status=lost', '/api/roommate/posts/',
+        ])
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class ImageDerivativeTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='photos@example.com', name='Photos', mobile='1234567890', password='testpass123'
+        )
+        self.book = BookPost.objects.create(
+            title='Optics', author='Hecht', department='Physics', posted_by=self.user,
+            contact_email='photos@example.com'
+        )
+
+    def test_derivatives_are_made_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = BookImage.objects.create(book=self.book, image=make_photo())
+        image.refresh_from_db()
+        self.assertTrue(derivatives_ready(image))
+        sizes = image.derivatives['sizes']
+        self.assertEqual((sizes['thumb']['width'], sizes['thumb']['height']), (200, 100))
+        self.assertEqual(sizes['card']['width'], 640)
+        with image.image.storage.open(sizes['full']['name']) as stored:
+            self.assertEqual(Image.open(stored).format, 'WEBP')
+
+        data = self.client.get(reverse('book-detail', args=[self.book.pk])).data['images'][0]
+        self.assertTrue(data['sizes']['thumb'].endswith('.webp'))
+        self.assertEqual(data['srcset'].count('w, '), 2)
+        self.assertIn(' 200w', data['srcset'])
+
+    def test_sizes_fall_back_to_the_original(self):
+        BookImage.objects.create(book=self.book, image=make_photo())
+        data = self.client.get(reverse('book-detail', args=[self.book.pk])).data['images'][0]
+        self.assertEqual(set(data['sizes'].values()), {data['image']})
+        self.assertIsNone(data['srcset'])
+
+    def test_replaced_images_get_new_derivatives(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = LostFoundItem.objects.create(item_name='Umbrella', reporter=self.user, image=make_photo())
+        item.refresh_from_db()
+        old_thumb = item.derivatives['sizes']['thumb']['name']
+        item.image = make_photo('replacement.jpg', size=(300, 600))
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+            # Until the job runs, the stale derivatives are not served
+            self.assertFalse(derivatives_ready(item))
+        item.refresh_from_db()
+        self.assertNotEqual(item.derivatives['sizes']['thumb']['name'], old_thumb)
+        self.assertEqual(item.derivatives['sizes']['full']['height'], 600)
+
+    def test_unreadable_uploads_keep_the_original(self):
+        with self.assertLogs('core.images', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            image = BookImage.objects.create(book=self.book, image=make_image())
+        image.refresh_from_db()
+        self.assertEqual(image.derivatives['error'], 'unreadable')
+        self.assertFalse(derivatives_ready(image))
+        # Recorded, so neither saves nor the backfill try it again
+        with mock.patch('core.images.generate_derivatives') as generate, self.captureOnCommitCallbacks(execute=True):
+            image.save()
+            call_command('generate_image_derivatives', model=['bookbank.BookImage'], stdout=io.StringIO())
+        generate.assert_not_called()
+
+    def test_backfill_command(self):
+        image = BookImage.objects.create(book=self.book, image=make_photo())
+        out = io.StringIO()
+        call_command('generate_image_derivatives', model=['bookbank.BookImage'], stdout=out)
+        self.assertIn('bookbank.BookImage: 1 image(s) processed', out.getvalue())
+        image.refresh_from_db()
+        self.assertTrue(derivatives_ready(image))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class ContentAddressedStorageTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='blobs@example.com', name='Blobs', mobile='1234567890', password='testpass123'
+        )
+        self.book = BookPost.objects.create(
+            title='Optics', author='Hecht', department='Physics', posted_by=self.user,
+            contact_email='blobs@example.com'
+        )
+
+    def test_duplicate_uploads_share_one_blob(self):
+        first = BookImage.objects.create(book=self.book, image=make_image('cover.GIF'))
+        second = BookImage.objects.create(book=self.book, image=make_image('again.gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$')
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).refcount, 2)
+
+        first.delete()
+        blob = MediaBlob.objects.get(name=second.image.name)
+        self.assertEqual(blob.refcount, 1)
+        self.assertTrue(os.path.exists(second.image.path))
+        self.assertEqual(os.listdir(os.path.join(TEST_MEDIA_ROOT, 'blobs', 'tmp')), [])
+
+    def test_replacing_a_file_moves_its_reference(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = LostFoundItem.objects.create(item_name='Umbrella', reporter=self.user, image=make_photo())
+        item.refresh_from_db()
+        old = item.image.name
+        old_thumb = item.derivatives['sizes']['thumb']['name']
+        self.assertEqual(MediaBlob.objects.get(name=old_thumb).refcount, 1)
+
+        item.image = make_photo('other.jpg', size=(300, 600))
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        item.refresh_from_db()
+        self.assertEqual(MediaBlob.objects.get(name=old).refcount, 0)
+        self.assertEqual(MediaBlob.objects.get(name=old_thumb).refcount, 0)
+        self.assertEqual(MediaBlob.objects.get(name=item.image.name).refcount, 1)
+
+        # Saves that leave the files alone don't touch the counts
+        item.status = 'found'
+        item.save(update_fields=['status'])
+        self.assertEqual(MediaBlob.objects.get(name=item.image.name).refcount, 1)
+
+    def test_migrate_media_storage(self):
+        legacy = os.path.join(TEST_MEDIA_ROOT, 'bookbank')
+        os.makedirs(legacy, exist_ok=True)
+        for name in ('a.gif', 'b.gif'):
+            with open(os.path.join(legacy, name), 'wb') as file:
+                file.write(b'GIF89a-legacy')
+        first = BookImage.objects.create(book=self.book, image=make_image())
+        second = BookImage.objects.create(book=self.book, image=make_image())
+        BookImage.objects.filter(pk=first.pk).update(image='bookbank/a.gif')
+        BookImage.objects.filter(pk=second.pk).update(image='bookbank/b.gif')
+
+        out = io.StringIO()
+        call_command('migrate_media_storage', dry_run=True, stdout=out)
+        self.assertIn('2 file(s) would move into 1 blob(s)', out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(legacy, 'a.gif')))
+
+        out = io.StringIO()
+        call_command('migrate_media_storage', stdout=out)
+        self.assertIn('bookbank.BookImage: 2 row(s) updated', out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).refcount, 2)
+        self.assertFalse(os.path.exists(os.path.join(legacy, 'a.gif')))
+        with first.image.open('rb') as stored:
+            self.assertEqual(stored.read(), b'GIF89a-legacy')
+
+    def test_migrate_media_storage_keeps_originals_of_skipped_rows(self):
+        legacy = os.path.join(TEST_MEDIA_ROOT, 'bookbank')
+        os.makedirs(legacy, exist_ok=True)
+        with open(os.path.join(legacy, 'c.gif'), 'wb') as file:
+            file.write(b'GIF89a-skipped')
+        image = BookImage.objects.create(book=self.book, image=make_image())
+        BookImage.objects.filter(pk=image.pk).update(image='bookbank/c.gif')
+        move = MigrateMediaStorage.move
+
+        def move_while_replaced(command, storage, name):
+            # Another request changes the row's image while its file is copied
+            BookImage.objects.filter(pk=image.pk).update(image='bookbank/other.gif')
+            return move(command, storage, name)
+
+        with mock.patch.object(MigrateMediaStorage, 'move', move_while_replaced):
+            call_command('migrate_media_storage', stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(legacy, 'c.gif')))
+
+
+UPLOAD_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT, CHUNKED_UPLOAD_DIR=UPLOAD_DIR, CHUNKED_UPLOAD_CHUNK_SIZE=4096,
+    IMAGE_DERIVATIVE_WORKERS=0
+)
+class ChunkedUploadTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(UPLOAD_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='chunks@example.com', name='Chunks', mobile='1234567890', password='testpass123'
+        )
+        self.book = BookPost.objects.create(
+            title='Optics', author='Hecht', department='Physics', posted_by=self.user,
+            contact_email='chunks@example.com'
+        )
+        self.client.force_authenticate(self.user)
+        # Noise compresses badly, so the JPEG spans several chunks
+        noise = Image.frombytes('RGB', (200, 200), os.urandom(200 * 200 * 3))
+        output = io.BytesIO()
+        noise.save(output, 'JPEG')
+        self.content = output.getvalue()
+
+    def open_session(self, content=None, sha256=None):
+        content = self.content if content is None else content
+        response = self.client.post(reverse('upload-session-list'), {
+            'filename': 'cover.jpg', 'size': len(content),
+            'sha256': sha256 or hashlib.sha256(content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def put_chunk(self, session_id, offset, chunk):
+        return self.client.put(
+            reverse('upload-session-detail', args=[session_id]) + f'?offset={offset}',
+            data=chunk, content_type='application/octet-stream'
+        )
+
+    def upload(self, session_id, content=None):
+        content = self.content if content is None else content
+        for offset in range(0, len(content), 4096):
+            response = self.put_chunk(session_id, offset, content[offset:offset + 4096])
+            self.assertEqual(response.status_code, 200)
+
+    def finalize(self, session_id, target='book', object_id=None):
+        return self.client.post(
+            reverse('upload-session-finalize', args=[session_id]),
+            {'target': target, 'object_id': object_id or self.book.pk}, format='json'
+        )
+
+    def test_chunks_resume_and_attach_to_a_book(self):
+        session_id = self.open_session()
+        first = self.content[:4096]
+        self.assertEqual(self.put_chunk(session_id, 0, first).data['offset'], 4096)
+
+        # A resent chunk is refused with the offset to carry on from
+        response = self.put_chunk(session_id, 0, first)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 4096)
+        status = self.client.get(reverse('upload-session-detail', args=[session_id])).data
+        self.assertEqual(status['offset'], 4096)
+
+        self.assertEqual(self.finalize(session_id).status_code, 409)
+        for offset in range(4096, len(self.content), 4096):
+            response = self.put_chunk(session_id, offset, self.content[offset:offset + 4096])
+            self.assertEqual(response.status_code, 200)
+
+        response = self.finalize(session_id)
+        self.assertEqual(response.status_code, 201)
+        image = BookImage.objects.get(pk=response.data['image_id'])
+        self.assertEqual(image.book, self.book)
+        with image.image.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertFalse(UploadSession.objects.filter(pk=session_id).exists())
+        self.assertEqual(os.listdir(UPLOAD_DIR), [])
+
+    def test_file_is_copied_outside_the_transaction(self):
+        session_id = self.open_session()
+        self.upload(session_id)
+        # The test case's own transactions are already open
+        outer = len(connection.atomic_blocks)
+        save = ContentAddressedStorage._save
+        depths = []
+
+        def record_depth(storage, name, content):
+            depths.append(len(connection.atomic_blocks))
+            return save(storage, name, content)
+
+        with mock.patch.object(ContentAddressedStorage, '_save', record_depth):
+            self.assertEqual(self.finalize(session_id).status_code, 201)
+        self.assertEqual(depths, [outer])
+
+    def test_lost_and_found_item_gets_the_image(self):
+        item = LostFoundItem.objects.create(item_name='Umbrella', reporter=self.user)
+        session_id = self.open_session()
+        self.upload(session_id)
+        response = self.finalize(session_id, target='lostfound', object_id=item.pk)
+        self.assertEqual(response.status_code, 201)
+        item.refresh_from_db()
+        self.assertTrue(item.image.name.startswith('private/blobs/'))
+
+    def test_rejected_chunks_and_uploads(self):
+        session_id = self.open_session()
+        self.assertEqual(self.put_chunk(session_id, 0, b'x' * 5000).status_code, 413)
+        self.assertEqual(self.put_chunk(session_id, 4096, b'x').status_code, 409)
+
+        # Another user can neither see the session nor attach to this book
+        other = User.objects.create_user(
+            email='other@example.com', name='Other', mobile='1234567891', password='testpass123'
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.put_chunk(session_id, 0, self.content[:4096]).status_code, 404)
+        other_session = self.open_session()
+        self.upload(other_session)
+        self.assertEqual(self.finalize(other_session).status_code, 403)
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        session_id = self.open_session(sha256='0' * 64)
+        self.upload(session_id)
+        response = self.finalize(session_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.filter(pk=session_id).exists())
+        self.assertFalse(BookImage.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0, MEDIA_SENDFILE_HEADER=None)
+class MediaServingTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='media@example.com', name='Media', mobile='1234567890', password='testpass123'
+        )
+        book = BookPost.objects.create(
+            title='Optics', author='Hecht', department='Physics', posted_by=self.user,
+            contact_email='media@example.com'
+        )
+        self.image = BookImage.objects.create(book=book, image=make_photo(size=(300, 200)))
+        with self.image.image.open('rb') as stored:
+            self.content = stored.read()
+        self.url = reverse('media', kwargs={'path': self.image.image.name})
+
+    def body(self, response):
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return content
+
+    def test_blobs_are_immutable_and_revalidate(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(self.content).hexdigest()}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        size = len(self.content)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{size}')
+        self.assertEqual(self.body(response), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(self.body(response), self.content[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+        # A range for another version of the file gets the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.body(response)), size)
+
+    def test_private_media_needs_a_signed_url(self):
+        item = LostFoundItem.objects.create(item_name='Umbrella', reporter=self.user, image=make_photo())
+        self.assertTrue(item.image.name.startswith('private/blobs/'))
+        url = self.client.get(reverse('lostfounditem-detail', args=[item.pk])).data['image']
+        self.assertIn('signature=', url)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.body(response)
+
+        unsigned = reverse('media', kwargs={'path': item.image.name})
+        self.assertEqual(self.client.get(unsigned).status_code, 403)
+        self.assertEqual(self.client.get(url.replace('signature=', 'signature=x')).status_code, 403)
+
+    def test_legacy_private_media_needs_a_signed_url(self):
+        # Saved under upload_to before lost & found photos were private
+        os.makedirs(os.path.join(TEST_MEDIA_ROOT, 'lostfound'), exist_ok=True)
+        with open(os.path.join(TEST_MEDIA_ROOT, 'lostfound', 'wallet.jpg'), 'wb') as legacy:
+            legacy.write(self.content)
+        item = LostFoundItem.objects.create(item_name='Wallet', reporter=self.user)
+        LostFoundItem.objects.filter(pk=item.pk).update(image='lostfound/wallet.jpg')
+
+        self.assertEqual(self.client.get('/media/lostfound/wallet.jpg').status_code, 404)
+        url = self.client.get(reverse('lostfounditem-detail', args=[item.pk])).data['image']
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.body(response), self.content)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_front_proxy_sends_the_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.image.image.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_missing_staging_and_outside_paths_are_not_served(self):
+        os.makedirs(os.path.join(TEST_MEDIA_ROOT, 'blobs', 'tmp'), exist_ok=True)
+        with open(os.path.join(TEST_MEDIA_ROOT, 'blobs', 'tmp', 'partial'), 'wb') as partial:
+            partial.write(b'half')
+        for path in ('blobs/tmp/partial', 'bookbank/missing.jpg', '../settings.py', 'blobs'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(f'/media/{path}').status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class GalleryBatchUploadTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='gallery@example.com', name='Gallery', mobile='1234567890', password='testpass123'
+        )
+        self.book = BookPost.objects.create(
+            title='Optics', author='Hecht', department='Physics', posted_by=self.user,
+            contact_email='gallery@example.com'
+        )
+        self.client.force_authenticate(self.user)
+
+    def upload(self, url, files):
+        return self.client.post(url, {'images': files}, format='multipart')
+
+    def test_valid_files_are_added_and_invalid_ones_reported(self):
+        files = [
+            make_photo('one.jpg', size=(300, 200)),
+            make_photo('two.jpg', size=(200, 300)),
+            SimpleUploadedFile('notes.txt', b'not an image', content_type='text/plain'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(reverse('book-upload-images', args=[self.book.pk]), files)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [2])
+
+        images = list(self.book.images.order_by('pk'))
+        self.assertEqual([image.is_primary for image in images], [True, False])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.primary_image_id, images[0].pk)
+        # The work post_save does for single uploads still happens
+        self.assertTrue(all(derivatives_ready(image) for image in BookImage.objects.all()))
+        self.assertEqual(MediaBlob.objects.get(name=images[1].image.name).refcount, 1)
+
+        # Later batches leave the primary image alone
+        response = self.upload(reverse('book-upload-images', args=[self.book.pk]), [make_photo('three.jpg')])
+        self.assertFalse(response.data['created'][0]['is_primary'])
+
+    def test_only_the_owner_can_upload(self):
+        post = RoommatePost.objects.create(
+            user=self.user, title='Room', description='Description', location='North Campus', rent=5000,
+            available_from=date.today(), lease_duration=6, room_type='shared',
+            contact_number='1234567890', contact_email='gallery@example.com'
+        )
+        url = reverse('roommate-post-upload-images', args=[post.pk])
+        self.assertEqual(self.upload(url, [make_photo()]).status_code, 201)
+
+        other = User.objects.create_user(
+            email='other@example.com', name='Other', mobile='1234567891', password='testpass123'
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.upload(url, [make_photo()]).status_code, 403)
+
+    def test_batches_with_no_valid_file_fail(self):
+        url = reverse('book-upload-images', args=[self.book.pk])
+        self.assertEqual(self.upload(url, [make_image('broken.gif')]).status_code, 400)
+        with override_settings(GALLERY_BATCH_MAX_FILES=1):
+            self.assertEqual(self.upload(url, [make_photo(), make_photo()]).status_code, 400)
+        self.assertFalse(self.book.images.exists())
+
+
+@override_settings(IMAGE_DERIVATIVE_WORKERS=0)
+class MediaGarbageCollectorTests(APITestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = User.objects.create_user(
+            email='gc@example.com', name='GC', mobile='1234567890', password='testpass123'
+        )
+        book = BookPost.objects.create(
+            title='Optics', author='Hecht', department='Physics', posted_by=user, contact_email='gc@example.com'
+        )
+        self.kept = BookImage.objects.create(book=book, image=make_photo())
+        deleted = BookImage.objects.create(book=book, image=make_photo(size=(300, 300)))
+        self.orphan = deleted.image.name
+        deleted.delete()
+        self.missing = BookImage.objects.create(book=book, image=make_image())
+        BookImage.objects.filter(pk=self.missing.pk).update(image='bookbank/gone.gif')
+        self.write('bookbank/old-upload.gif')
+        # Files from before the grace period, except one upload still in flight
+        old = time.time() - 3 * 24 * 3600
+        for name, _, path in self.files():
+            os.utime(path, (old, old))
+        self.write('blobs/tmp/in-flight')
+
+    def write(self, name, content=b'GIF89a'):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+
+    def files(self):
+        return [(name, stat, path) for name, path, stat in walk_media(self.root)]
+
+    def test_walk_is_in_name_order(self):
+        for name in ('a-b', 'a/b', 'a.b/c', 'ab'):
+            self.write(f'x/{name}')
+        names = [name for name, _, _ in self.files()]
+        self.assertEqual(names, sorted(names))
+
+    def test_report_quarantine_and_delete(self):
+        kinds = {name: kind for kind, name, _, _ in reconcile(self.root)}
+        self.assertEqual(kinds[self.kept.image.name], 'ok')
+        self.assertEqual(kinds[self.orphan], 'orphan')
+        self.assertEqual(kinds['bookbank/old-upload.gif'], 'orphan')
+        self.assertEqual(kinds['bookbank/gone.gif'], 'missing')
+
+        out = io.StringIO()
+        call_command('gc_media', stdout=out)
+        self.assertIn('2 orphaned', out.getvalue())
+        self.assertIn('1 too recent to judge, 1 referenced but missing', out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.root, self.orphan)))
+
+        call_command('gc_media', quarantine=True, stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.root, '.quarantine', self.orphan)))
+        self.assertFalse(MediaBlob.objects.filter(name=self.orphan).exists())
+        self.assertTrue(os.path.exists(self.kept.image.path))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'blobs/tmp/in-flight')))
+
+        self.write('bookbank/stray.gif')
+        call_command('gc_media', delete=True, grace_hours=0, stdout=io.StringIO())
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'bookbank/stray.gif')))
+        self.assertTrue(os.path.exists(self.kept.image.path))
+
+    def test_runs_resume_where_the_last_one_stopped(self):
+        total = len(self.files())
+        out = io.StringIO()
+        call_command('gc_media', max_files=2, stdout=out)
+        self.assertIn('Scanned 2 file(s)', out.getvalue())
+        self.assertIn('next run resumes after', out.getvalue())
+
+        out = io.StringIO()
+        call_command('gc_media', stdout=out)
+        self.assertIn(f'Scanned {total - 2} file(s) after', out.getvalue())
+        self.assertIn('finished the media tree', out.getvalue())
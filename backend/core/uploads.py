@@ -0,0 +1,189 @@
+"""
+Resumable chunked uploads.
+
+A client opens a session with the file's name, size and SHA-256, then PUTs
+the file in pieces of at most CHUNKED_UPLOAD_CHUNK_SIZE bytes, each at the
+offset the session has reached. Chunks are copied from the request stream
+straight into a staging file under CHUNKED_UPLOAD_DIR, so a worker holds at
+most one read buffer per upload whatever the file's size; after a dropped
+connection the client asks for the session's offset and carries on from
+there. Finalizing checks the size, checksum and image data and attaches the
+file to a record named in UPLOAD_TARGETS, through the field's storage.
+
+Sessions untouched for CHUNKED_UPLOAD_EXPIRY are deleted, with their
+staging files, whenever a new session is opened.
+"""
+import hashlib
+import os
+from collections import namedtuple
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+from .models import UploadSession
+
+# Bytes read from the request or staging file at a time
+READ_SIZE = 64 * 1024
+
+# model: the record named by object_id; owner_field: who may attach to it;
+# image_model/parent_field: the gallery image created for it, or None when
+# the file goes into the record's own image field
+UploadTarget = namedtuple('UploadTarget', 'model owner_field image_model parent_field')
+
+UPLOAD_TARGETS = {
+    'book': UploadTarget('bookbank.BookPost', 'posted_by', 'bookbank.BookImage', 'book'),
+    'event': UploadTarget('noticeboard.Event', 'organizer', 'noticeboard.EventImage', 'event'),
+    'roommate': UploadTarget('roommate.RoommatePost', 'user', 'roommate.RoommateImage', 'post'),
+    'lostfound': UploadTarget('lostfound.LostFoundItem', 'reporter', None, None),
+}
+
+
+class UploadError(Exception):
+    """A request the session cannot accept; status is the HTTP status to answer with."""
+    def __init__(self, detail, status=400, **extra):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+        self.extra = extra
+
+
+def staging_path(session):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{session.pk}.part')
+
+
+def discard(session):
+    """Delete a session and its staging file."""
+    try:
+        os.remove(staging_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def expire_sessions():
+    cutoff = timezone.now() - settings.CHUNKED_UPLOAD_EXPIRY
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff):
+        discard(session)
+
+
+def open_session(owner, filename, size, sha256):
+    expire_sessions()
+    session = UploadSession.objects.create(owner=owner, filename=filename, size=size, sha256=sha256)
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    # Created empty so every chunk, the first included, is written in place
+    open(staging_path(session), 'wb').close()
+    return session
+
+
+def write_chunk(session, offset, length, stream):
+    """
+    Copy length bytes from stream into the staging file at offset and return
+    the session's new offset.
+    """
+    if session.status != UploadSession.ACTIVE:
+        raise UploadError('This upload is already finalized.', status=409)
+    if offset != session.received:
+        # Resent or skipped chunk: tell the client where to carry on from
+        raise UploadError('Chunk offset does not match the upload.', status=409, offset=session.received)
+    if length <= 0:
+        raise UploadError('Empty chunk.')
+    if length > settings.CHUNKED_UPLOAD_CHUNK_SIZE:
+        raise UploadError(
+            f'Chunks may be at most {settings.CHUNKED_UPLOAD_CHUNK_SIZE} bytes.', status=413
+        )
+    if offset + length > session.size:
+        raise UploadError('Chunk goes past the end of the file.')
+
+    written = 0
+    with open(staging_path(session), 'r+b') as staged:
+        staged.seek(offset)
+        while written < length:
+            data = stream.read(min(READ_SIZE, length - written))
+            if not data:
+                break
+            staged.write(data)
+            written += len(data)
+    if written != length:
+        raise UploadError('Chunk ended early; resend it.', offset=session.received)
+
+    # A concurrent request for the same offset may have won; only one advances
+    advanced = UploadSession.objects.filter(pk=session.pk, received=offset).update(
+        received=offset + length, updated_at=timezone.now()
+    )
+    if not advanced:
+        session.refresh_from_db(fields=['received'])
+        raise UploadError('Chunk offset does not match the upload.', status=409, offset=session.received)
+    session.received = offset + length
+    return session.received
+
+
+def verify(session):
+    """Check the staged file's size, SHA-256 and image data."""
+    path = staging_path(session)
+    if session.received != session.size:
+        raise UploadError(
+            'The upload is incomplete.', status=409, offset=session.received
+        )
+    digest = hashlib.sha256()
+    with open(path, 'rb') as staged:
+        for data in iter(lambda: staged.read(READ_SIZE), b''):
+            digest.update(data)
+    if digest.hexdigest() != session.sha256.lower():
+        raise UploadError('Checksum mismatch; the upload must be restarted.')
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise UploadError('The uploaded file is not a valid image.')
+
+
+def get_target(user, target, object_id):
+    """The record an upload will be attached to, if user may attach to it."""
+    if target not in UPLOAD_TARGETS:
+        raise UploadError(f"Unknown target; choose from {', '.join(UPLOAD_TARGETS)}.")
+    spec = UPLOAD_TARGETS[target]
+    model = apps.get_model(spec.model)
+    try:
+        record = model._default_manager.get(pk=object_id)
+    except (model.DoesNotExist, ValueError, TypeError):
+        raise UploadError('Not found.', status=404)
+    owner_id = getattr(record, f'{spec.owner_field}_id')
+    if owner_id != user.pk and not user.is_superuser:
+        raise UploadError("You don't have permission to add images to this record.", status=403)
+    return spec, record
+
+
+def finalize(session, user, target, object_id):
+    """Verify the staged file, attach it to the target and return the record holding it."""
+    if session.status != UploadSession.ACTIVE:
+        raise UploadError('This upload is already finalized.', status=409)
+    spec, record = get_target(user, target, object_id)
+    try:
+        verify(session)
+    except UploadError as error:
+        if error.status == 400:
+            # Bad bytes cannot be fixed by resuming
+            discard(session)
+        raise
+
+    if spec.image_model is None:
+        holder = record
+    else:
+        holder = apps.get_model(spec.image_model)(**{spec.parent_field: record})
+    # Copied outside the transaction so a large file doesn't hold the write
+    # lock; if the row is never saved, gc_media removes the unreferenced blob
+    with open(staging_path(session), 'rb') as staged:
+        # The storage reads the staging file chunk by chunk
+        holder.image.save(session.filename, File(staged), save=False)
+
+    with transaction.atomic():
+        claimed = UploadSession.objects.filter(pk=session.pk, status=UploadSession.ACTIVE).update(
+            status=UploadSession.COMPLETE
+        )
+        if not claimed:
+            raise UploadError('This upload is already finalized.', status=409)
+        holder.save()
+    discard(session)
+    return holder
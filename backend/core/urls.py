@@ -0,0 +1,11 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'uploads', views.UploadSessionViewSet, basename='upload-session')
+
+urlpatterns = [
+    path('cache-stats/', views.ResponseCacheStatsView.as_view(), name='response-cache-stats'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,80 @@
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .cache import get_stats
+from .models import UploadSession
+from .serializers import UploadFinalizeSerializer, UploadSessionSerializer
+from .uploads import UploadError, discard, finalize, open_session, write_chunk
+
+
+class ResponseCacheStatsView(APIView):
+    """Hit/miss counters of the anonymous response cache (staff only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats())
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads (see core.uploads).
+
+    POST opens a session, PUT ?offset=N writes the raw request body as the
+    chunk at N, GET reports the offset to resume from, DELETE abandons the
+    upload and POST finalize/ attaches the file to a record.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    # Chunks are read from the raw stream, never parsed into memory
+    parser_classes = [JSONParser]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance = open_session(self.request.user, data['filename'], data['size'], data['sha256'])
+
+    def upload_error(self, error):
+        return Response({'detail': error.detail, **error.extra}, status=error.status)
+
+    def update(self, request, pk=None):
+        session = self.get_object()
+        try:
+            offset = int(request.query_params['offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'PUT needs an ?offset= and a Content-Length.', 'offset': session.received},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            received = write_chunk(session, offset, length, request.stream)
+        except UploadError as error:
+            return self.upload_error(error)
+        return Response({'offset': received, 'size': session.size})
+
+    def destroy(self, request, pk=None):
+        discard(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Check the upload and attach it to a book, event, roommate post or lost & found item."""
+        session = self.get_object()
+        serializer = UploadFinalizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            holder = finalize(
+                session, request.user, serializer.validated_data['target'], serializer.validated_data['object_id']
+            )
+        except UploadError as error:
+            return self.upload_error(error)
+        return Response({
+            'target': serializer.validated_data['target'],
+            'object_id': str(serializer.validated_data['object_id']),
+            'image_id': holder.pk,
+            'image': request.build_absolute_uri(holder.image.url),
+        }, status=status.HTTP_201_CREATED)
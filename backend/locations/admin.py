@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import Place, PlaceAlias
+
+
+class PlaceAliasInline(admin.TabularInline):
+    model = PlaceAlias
+    extra = 1
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key', 'updated_at')
+    search_fields = ('name', 'aliases__alias')
+    inlines = [PlaceAliasInline]
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class LocationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'locations'
+
+    def ready(self):
+        from .gazetteer import connect_location_signals
+
+        # Link free-text locations to places as rows are saved
+        connect_location_signals()
@@ -0,0 +1,226 @@
+"""
+Campus gazetteer: canonical places, their aliases, and free-text lookups.
+
+normalize_location() turns what people type ("Lib 2nd flr", "Library
+Floor 2", "the library") into a key: lowercase words with abbreviations
+expanded, filler and floor/room qualifiers dropped, sorted. A Place and
+each of its PlaceAliases store their key, and a location resolves to the
+place whose name or alias has the same key.
+
+Each process keeps the whole gazetteer in memory: a dict from key to place
+for resolving, and a prefix trie over every word of every name and alias
+for autocomplete. Each trie node stores its best TRIE_FANOUT completions,
+so a lookup walks len(prefix) nodes and reads a list. The
+copy is rebuilt when the Place/PlaceAlias generation counters (core.cache)
+move. With the counters in a shared cache (CACHE_REDIS_URL) an edit in one
+worker reaches the others on their next lookup.
+"""
+import re
+import threading
+import unicodedata
+from django.apps import apps
+from django.db.models.signals import pre_save
+from core.cache import bump_generation, get_generations
+
+AUTOCOMPLETE_LIMIT = 10
+# Completions kept per trie node; multi-word queries filter these down
+TRIE_FANOUT = 50
+
+# Models with a free-text location and the location_place key kept next to it.
+# Archived items are only written in bulk, so resolve_all() is what updates them
+LOCATED_MODELS = [
+    'lostfound.LostFoundItem', 'lostfound.ArchivedLostFoundItem', 'noticeboard.Event', 'roommate.RoommatePost',
+]
+
+ABBREVIATIONS = {
+    'lib': 'library', 'libr': 'library', 'flr': 'floor', 'fl': 'floor', 'lvl': 'level',
+    'bldg': 'building', 'bld': 'building', 'blk': 'block', 'blck': 'block', 'ctr': 'centre',
+    'center': 'centre', 'cntr': 'centre', 'hstl': 'hostel', 'hst': 'hostel', 'aud': 'auditorium',
+    'audi': 'auditorium', 'dept': 'department', 'rm': 'room', 'gnd': 'ground', 'acad': 'academic',
+    'admin': 'administration', 'administrative': 'administration', 'caf': 'cafeteria',
+}
+FILLER = frozenset({'the', 'of', 'at', 'near', 'in', 'on', 'inside', 'outside', 'opposite', 'behind'})
+# "2nd floor", "floor 2", "ground floor", "room 101": where inside a place, not which place
+QUALIFIERS = frozenset({'floor', 'level', 'room'})
+ORDINAL = re.compile(r'^(\d+)(st|nd|rd|th)?$')
+WORD = re.compile(r'[a-z0-9]+')
+
+
+def words(text):
+    """Normalized words of text in their original order."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return [ABBREVIATIONS.get(word, word) for word in WORD.findall(text)]
+
+
+def normalize_location(text):
+    """The lookup key of a free-text location ('' when nothing is left)."""
+    tokens = words(text)
+    kept = []
+    for index, word in enumerate(tokens):
+        if word in FILLER or word in QUALIFIERS:
+            continue
+        neighbours = tokens[max(index - 1, 0):index] + tokens[index + 1:index + 2]
+        # A number or 'ground'/'first' next to floor/level/room belongs to the qualifier
+        if (ORDINAL.match(word) or word in ('ground', 'first', 'top')) and QUALIFIERS & set(neighbours):
+            continue
+        kept.append(word)
+    return ' '.join(sorted(kept))
+
+
+class TrieNode:
+    __slots__ = ('children', 'completions')
+
+    def __init__(self):
+        self.children = {}
+        # [(rank, place id)] of the best matches below this node
+        self.completions = []
+
+
+class PrefixTrie:
+    """Maps word prefixes to the best-ranked places having a word with that prefix."""
+    def __init__(self, limit=TRIE_FANOUT):
+        self.root = TrieNode()
+        self.limit = limit
+
+    def insert(self, word, rank, place_id):
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, TrieNode())
+            self._offer(node, rank, place_id)
+
+    def _offer(self, node, rank, place_id):
+        completions = node.completions
+        for index, (existing_rank, existing_id) in enumerate(completions):
+            if existing_id == place_id:
+                if rank >= existing_rank:
+                    return
+                del completions[index]
+                break
+        completions.append((rank, place_id))
+        completions.sort()
+        del completions[self.limit:]
+
+    def lookup(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [place_id for _, place_id in node.completions]
+
+
+class Gazetteer:
+    """An immutable in-memory copy of the places and aliases."""
+    def __init__(self, places, aliases):
+        # places: [(id, name, key)], aliases: [(place id, alias, key)]
+        self.names = {pk: name for pk, name, _ in places}
+        # Every word of each place's name and aliases
+        self.words = {pk: set() for pk in self.names}
+        self.keys = {}
+        self.trie = PrefixTrie()
+        for place_id, alias, key in aliases:
+            self.keys.setdefault(key, place_id)
+            self.index(place_id, alias, alias_rank=1)
+        # Names win over aliases with the same key
+        for pk, name, key in places:
+            self.keys[key] = pk
+            self.index(pk, name, alias_rank=0)
+
+    def index(self, place_id, text, alias_rank):
+        name = self.names[place_id]
+        for position, word in enumerate(words(text)):
+            self.words[place_id].add(word)
+            # Matches on a name's first word first, then names before aliases, then short names
+            rank = (position > 0, alias_rank, len(name), name)
+            self.trie.insert(word, rank, place_id)
+
+    def resolve(self, text):
+        """The id of the place text names, or None."""
+        key = normalize_location(text)
+        return self.keys.get(key) if key else None
+
+    def autocomplete(self, query, limit=AUTOCOMPLETE_LIMIT):
+        """[(id, name)] of places with a word starting with each word of query."""
+        query_words = [word for word in words(query) if word not in FILLER]
+        if not query_words:
+            return []
+        # Walk the trie with the most selective word and check the others directly
+        longest = max(query_words, key=len)
+        matches = []
+        for pk in self.trie.lookup(longest):
+            if all(any(word.startswith(prefix) for word in self.words[pk]) for prefix in query_words):
+                matches.append((pk, self.names[pk]))
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+_lock = threading.Lock()
+_current = (None, None)
+
+
+def get_gazetteer():
+    """This process's gazetteer, rebuilt when a place or alias changed anywhere."""
+    global _current
+    from .models import Place, PlaceAlias
+
+    generations = get_generations([Place, PlaceAlias])
+    loaded_generations, gazetteer = _current
+    if loaded_generations == generations:
+        return gazetteer
+    with _lock:
+        if _current[0] != generations:
+            gazetteer = Gazetteer(
+                list(Place.objects.values_list('pk', 'name', 'key')),
+                list(PlaceAlias.objects.values_list('place_id', 'alias', 'key')),
+            )
+            _current = (generations, gazetteer)
+        return _current[1]
+
+
+def assign_location_place(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep location_place in step with the free-text location on every save."""
+    if raw or (update_fields is not None and 'location' not in update_fields):
+        return
+    place_id = get_gazetteer().resolve(instance.location)
+    if update_fields is not None and not {'location_place', 'location_place_id'} & set(update_fields):
+        # save() has already picked its columns, so write the key alongside
+        if place_id != instance.location_place_id:
+            type(instance)._default_manager.filter(pk=instance.pk).update(location_place_id=place_id)
+    instance.location_place_id = place_id
+
+
+def resolve_all(batch_size=500):
+    """
+    Re-resolve the location of every row of LOCATED_MODELS, e.g. after the
+    gazetteer changed or rows were bulk inserted. Returns {label: rows changed}.
+    """
+    gazetteer = get_gazetteer()
+    changed = {}
+    for label in LOCATED_MODELS:
+        model = apps.get_model(label)
+        moves = {}
+        rows = model._default_manager.values_list('pk', 'location', 'location_place_id')
+        for pk, location, current in rows.iterator(chunk_size=2000):
+            place_id = gazetteer.resolve(location)
+            if place_id != current:
+                moves.setdefault(place_id, []).append(pk)
+        for place_id, pks in moves.items():
+            for start in range(0, len(pks), batch_size):
+                model._default_manager.filter(pk__in=pks[start:start + batch_size]).update(
+                    location_place_id=place_id
+                )
+        changed[label] = sum(len(pks) for pks in moves.values())
+        if changed[label]:
+            # update() skips post_save
+            bump_generation(model)
+    return changed
+
+
+def connect_location_signals():
+    for label in LOCATED_MODELS:
+        pre_save.connect(
+            assign_location_place, sender=apps.get_model(label),
+            dispatch_uid=f'assign_location_place_{label.lower()}'
+        )
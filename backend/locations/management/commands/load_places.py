@@ -0,0 +1,52 @@
+import json
+import os
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from locations.models import Place, PlaceAlias
+
+DEFAULT_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'campus_places.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Add the places and aliases of a JSON gazetteer ([{"name": ..., "aliases": [...]}]) '
+        'that are not there yet. Existing places keep their other aliases.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', default=DEFAULT_FILE, help='Defaults to the bundled campus list')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['file']) as source:
+                entries = json.load(source)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read {options['file']}: {error}")
+
+        places = aliases = 0
+        with transaction.atomic():
+            for entry in entries:
+                place = Place.objects.filter(name=entry['name']).first()
+                if place is None:
+                    place = Place(name=entry['name'])
+                    if not self.save(place, entry['name']):
+                        continue
+                    places += 1
+                for text in entry.get('aliases', []):
+                    alias = PlaceAlias(place=place, alias=text)
+                    if self.save(alias, text):
+                        aliases += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'{places} place(s) and {aliases} alias(es) added; run resolve_locations to relink existing rows'
+        ))
+
+    def save(self, instance, text):
+        try:
+            instance.full_clean(exclude=['key', 'place'])
+        except ValidationError as error:
+            # Aliases that are already there, or clash with another place, are skipped
+            self.stdout.write(self.style.WARNING(f'Skipped {text!r}: {"; ".join(error.messages)}'))
+            return False
+        instance.save()
+        return True
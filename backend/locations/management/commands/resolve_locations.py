@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from locations.gazetteer import resolve_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Link every free-text location (lost & found items, events, roommate posts) to its '
+        'gazetteer place, e.g. after editing places or aliases or bulk inserting rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per UPDATE')
+
+    def handle(self, *args, **options):
+        for label, count in resolve_all(batch_size=options['batch_size']).items():
+            self.stdout.write(f'{label}: {count} row(s) relinked')
@@ -0,0 +1,59 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+from .gazetteer import normalize_location
+
+
+class Place(models.Model):
+    """
+    A canonical campus location. Free-text locations that normalize to its
+    name's key, or one of its aliases', are linked to it (see gazetteer.py).
+    """
+    name = models.CharField(max_length=200, unique=True)
+    # normalize_location(name)
+    key = models.CharField(max_length=200, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        key = normalize_location(self.name)
+        if not key:
+            raise ValidationError({'name': 'Name has no words left to match on.'})
+        if PlaceAlias.objects.filter(key=key).exclude(place_id=self.pk).exists():
+            raise ValidationError({'name': 'Another place already has this name as an alias.'})
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_location(self.name)
+        super().save(*args, **kwargs)
+
+
+class PlaceAlias(models.Model):
+    """Another way people write a place: "Lib", "Main library", "CL"."""
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=200)
+    key = models.CharField(max_length=200, unique=True, editable=False)
+
+    class Meta:
+        ordering = ['alias']
+        verbose_name_plural = 'Place aliases'
+
+    def __str__(self):
+        return f'{self.alias} -> {self.place_id}'
+
+    def clean(self):
+        key = normalize_location(self.alias)
+        if not key:
+            raise ValidationError({'alias': 'Alias has no words left to match on.'})
+        if Place.objects.filter(key=key).exclude(pk=self.place_id).exists():
+            raise ValidationError({'alias': 'This is already the name of another place.'})
+        if PlaceAlias.objects.filter(key=key).exclude(pk=self.pk).exists():
+            raise ValidationError({'alias': 'Another alias already normalizes to the same words.'})
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_location(self.alias)
+        super().save(*args, **kwargs)
@@ -0,0 +1,121 @@
+import io
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.cache import bump_generation
+from lostfound.models import LostFoundItem
+from .gazetteer import get_gazetteer, normalize_location
+from .models import Place, PlaceAlias
+
+User = get_user_model()
+
+
+class GazetteerTestMixin:
+    def setUp(self):
+        self.library = Place.objects.create(name='Central Library')
+        PlaceAlias.objects.create(place=self.library, alias='Library')
+        PlaceAlias.objects.create(place=self.library, alias='Main Library')
+        self.canteen = Place.objects.create(name='Main Canteen')
+        PlaceAlias.objects.create(place=self.canteen, alias='Canteen')
+        self.block = Place.objects.create(name='Academic Block A')
+
+    def tearDown(self):
+        # The rolled back places must not linger in this process's gazetteer
+        bump_generation(Place, PlaceAlias)
+
+
+class NormalizationTests(GazetteerTestMixin, TestCase):
+    def test_spellings_share_a_key(self):
+        keys = {normalize_location(text) for text in ['Lib 2nd flr', 'Library Floor 2', 'the library', 'LIBRARY']}
+        self.assertEqual(keys, {'library'})
+        self.assertEqual(normalize_location('Room 101, Acad Blk A'), 'a academic block')
+
+    def test_resolve(self):
+        gazetteer = get_gazetteer()
+        for text in ['Lib 2nd flr', 'near the main library', 'Central Library ground floor']:
+            self.assertEqual(gazetteer.resolve(text), self.library.pk, text)
+        self.assertEqual(gazetteer.resolve('canteen'), self.canteen.pk)
+        self.assertIsNone(gazetteer.resolve('Bus stop'))
+        self.assertIsNone(gazetteer.resolve(''))
+
+    def test_gazetteer_follows_edits(self):
+        self.assertIsNone(get_gazetteer().resolve('Mess'))
+        PlaceAlias.objects.create(place=self.canteen, alias='Mess')
+        self.assertEqual(get_gazetteer().resolve('mess'), self.canteen.pk)
+
+
+class LocationPlaceTests(GazetteerTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email='user@example.com', name='User', mobile='1234567890', password='testpass123'
+        )
+
+    def test_location_place_set_on_save(self):
+        item = LostFoundItem.objects.create(
+            item_name='Umbrella', status='lost', location='Lib 2nd flr', reporter=self.user
+        )
+        self.assertEqual(item.location_place_id, self.library.pk)
+        item.location = 'Bus stop'
+        item.save()
+        item.refresh_from_db()
+        self.assertIsNone(item.location_place_id)
+        # Saving only the location still writes its place
+        item.location = 'the library'
+        item.save(update_fields=['location'])
+        item.refresh_from_db()
+        self.assertEqual(item.location_place_id, self.library.pk)
+
+    def test_filter_by_location_place(self):
+        for location in ['Library Floor 2', 'the library', 'Canteen']:
+            LostFoundItem.objects.create(item_name='Keys', status='lost', location=location, reporter=self.user)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('lostfounditem-list'), {'location_place': self.library.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        for url in [reverse('lostfounditem-list'), reverse('event-list')]:
+            response = self.client.get(url, {'location_place': 'library'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, url)
+
+    def test_resolve_locations_command(self):
+        item = LostFoundItem.objects.create(item_name='Keys', status='lost', location='Mess', reporter=self.user)
+        self.assertIsNone(item.location_place_id)
+        PlaceAlias.objects.create(place=self.canteen, alias='Mess')
+        out = io.StringIO()
+        call_command('resolve_locations', stdout=out)
+        item.refresh_from_db()
+        self.assertEqual(item.location_place_id, self.canteen.pk)
+        self.assertIn('lostfound.LostFoundItem: 1 row(s) relinked', out.getvalue())
+
+
+class AutocompleteTests(GazetteerTestMixin, APITestCase):
+    def autocomplete(self, **params):
+        return self.client.get(reverse('location-autocomplete'), params)
+
+    def names(self, **params):
+        return [place['name'] for place in self.autocomplete(**params).data['results']]
+
+    def test_prefixes(self):
+        response = self.autocomplete(q='lib')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.library.pk, 'name': 'Central Library'}])
+        # Names starting with the prefix first, then aliases
+        self.assertEqual(self.names(q='ma'), ['Main Canteen', 'Central Library'])
+        self.assertEqual(self.names(q='main lib'), ['Central Library'])
+        self.assertEqual(self.names(q=''), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.names(q='a', limit=1)), 1)
+        self.assertEqual(self.autocomplete(q='a', limit=50).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_load_places(self):
+        call_command('load_places', stdout=io.StringIO())
+        self.assertTrue(Place.objects.filter(name='Sports Complex', aliases__alias='Gym').exists())
+        # Running it again adds nothing
+        count = PlaceAlias.objects.count()
+        call_command('load_places', stdout=io.StringIO())
+        self.assertEqual(PlaceAlias.objects.count(), count)
+        self.assertEqual(get_gazetteer().resolve('gym'), Place.objects.get(name='Sports Complex').pk)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('autocomplete/', views.AutocompleteView.as_view(), name='location-autocomplete'),
+]
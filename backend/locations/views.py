@@ -0,0 +1,26 @@
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .gazetteer import AUTOCOMPLETE_LIMIT, get_gazetteer
+
+
+class AutocompleteView(APIView):
+    """
+    GET /api/locations/autocomplete/?q=lib&limit=5
+
+    Places whose name or an alias has a word starting with each word of q,
+    best first. Answered from the in-memory gazetteer without a query.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= AUTOCOMPLETE_LIMIT:
+            raise ValidationError({'limit': [f'Must be a whole number from 1 to {AUTOCOMPLETE_LIMIT}.']})
+        places = get_gazetteer().autocomplete(query, limit)
+        return Response({'results': [{'id': pk, 'name': name} for pk, name in places]})
@@ -1,5 +1,17 @@
 from django.contrib import admin
-from .models import LostFoundItem
+from .models import ArchivedLostFoundItem, LostFoundItem, LostFoundTransition
+
+
+class LostFoundTransitionInline(admin.TabularInline):
+    model = LostFoundTransition
+    fields = ('created_at', 'action', 'from_state', 'to_state', 'actor')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(LostFoundItem)
 class LostFoundItemAdmin(admin.ModelAdmin):
@@ -8,6 +20,7 @@ class LostFoundItemAdmin(admin.ModelAdmin):
     search_fields = ('item_name', 'description', 'reporter__email', 'reporter__name')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'date_reported'
+    inlines = [LostFoundTransitionInline]
     fieldsets = (
         ('Item Information', {
             'fields': ('item_name', 'description', 'status', 'is_resolved')
@@ -33,3 +46,18 @@ class LostFoundItemAdmin(admin.ModelAdmin):
         if request.user.is_superuser:
             return qs
         return qs.filter(reporter=request.user)
+
+
+@admin.register(ArchivedLostFoundItem)
+class ArchivedLostFoundItemAdmin(admin.ModelAdmin):
+    list_display = ('item_name', 'status', 'location', 'reporter', 'date_reported', 'archived_at')
+    list_filter = ('status', 'category', 'archived_at')
+    search_fields = ('item_name', 'description', 'reporter__email', 'reporter__name')
+    date_hierarchy = 'date_reported'
+
+    # Archived items are history; they are only ever written by archive_lostfound
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
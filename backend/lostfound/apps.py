@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 
 class LostfoundConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lostfound'
+
+    def ready(self):
+        from .fuzzy import update_trigram_index
+        from .matching import update_match_index
+        from .models import LostFoundItem
+        from .similarity import queue_image_hash
+
+        # Hash new and replaced photos once they are committed
+        post_save.connect(queue_image_hash, sender=LostFoundItem, dispatch_uid='queue_image_hash')
+        # Keep the matching index in step; deleted items' postings cascade away
+        post_save.connect(update_match_index, sender=LostFoundItem, dispatch_uid='update_match_index')
+        # ... and the fuzzy lookup index
+        post_save.connect(update_trigram_index, sender=LostFoundItem, dispatch_uid='update_trigram_index')
@@ -0,0 +1,85 @@
+"""
+Moving resolved lost & found items out of the live table.
+
+Open items are what the listing is for, but resolved ones pile up in the
+same table forever. archive_resolved() moves items resolved and untouched
+for LOSTFOUND_ARCHIVE_AFTER into ArchivedLostFoundItem, a batch per
+transaction: the rows are copied (same id, image and derivatives, with the
+transition history folded in) and then deleted from LostFoundItem. The
+archived row takes over the blob references before the live row releases
+them, so the images are never unreferenced in between.
+
+The listing reads ArchivedLostFoundItem only when asked (``?archive=true``).
+"""
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from core.cache import bump_generation
+from core.storage import referenced_blobs, update_references
+from .models import ArchivedLostFoundItem, LostFoundItem, LostFoundTransition
+
+# Columns of LostFoundItem that ArchivedLostFoundItem keeps as they are
+COPIED_FIELDS = [
+    field.attname for field in LostFoundItem._meta.concrete_fields
+    if field.attname in {other.attname for other in ArchivedLostFoundItem._meta.concrete_fields}
+]
+
+
+def archivable(cutoff):
+    """Resolved items last changed before cutoff, oldest first."""
+    return LostFoundItem.objects.filter(is_resolved=True, updated_at__lt=cutoff).order_by('updated_at', 'id')
+
+
+def history_of(item_ids):
+    """{item id: [transition dicts]} for the given items, oldest first."""
+    history = {item_id: [] for item_id in item_ids}
+    transitions = LostFoundTransition.objects.filter(item_id__in=item_ids).order_by('created_at', 'id')
+    for item_id, action, from_state, to_state, actor_id, created_at in transitions.values_list(
+        'item_id', 'action', 'from_state', 'to_state', 'actor_id', 'created_at'
+    ):
+        history[item_id].append({
+            'action': action, 'from_state': from_state, 'to_state': to_state,
+            'actor': str(actor_id) if actor_id else None, 'created_at': created_at.isoformat(),
+        })
+    return history
+
+
+def archive_batch(cutoff, batch_size):
+    """Archive up to batch_size items in one transaction; returns how many."""
+    with transaction.atomic():
+        # Locked until commit, so a concurrent unclaim cannot slip in between copy and delete
+        items = list(archivable(cutoff).select_for_update()[:batch_size])
+        if not items:
+            return 0
+        history = history_of([item.pk for item in items])
+        archived = [
+            ArchivedLostFoundItem(
+                **{attname: getattr(item, attname) for attname in COPIED_FIELDS},
+                history=history[item.pk]
+            )
+            for item in items
+        ]
+        ArchivedLostFoundItem.objects.bulk_create(archived)
+        # bulk_create skips the reference counting signals; the delete below releases the live rows'
+        update_references(Counter(), sum((referenced_blobs(row) for row in archived), Counter()))
+        LostFoundItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+    bump_generation(LostFoundItem, ArchivedLostFoundItem)
+    return len(items)
+
+
+def archive_resolved(older_than, batch_size=500, limit=None, log=None):
+    """
+    Archive every item resolved and unchanged for older_than (a timedelta),
+    batch_size per transaction, at most limit in all. Returns how many.
+    """
+    cutoff = timezone.now() - older_than
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        moved = archive_batch(cutoff, size)
+        if not moved:
+            break
+        total += moved
+        if log:
+            log(f'Archived {total} item(s)')
+    return total
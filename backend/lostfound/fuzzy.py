@@ -0,0 +1,216 @@
+"""
+Typo-tolerant lookups of lost & found items by name, brand and colour.
+
+Values are compared by trigrams the way pg_trgm does it: every word,
+padded with two spaces in front and one behind, gives its three-letter
+slices ("adidas" -> "  a", " ad", "adi", "did", "ida", "das", "as ").
+Misspellings keep most of them, so two texts are alike when the share of
+trigrams they have in common (their Jaccard similarity) is high. Like
+pg_trgm's word_similarity, a value is scored by its best run of words
+against the query, so "iphnoe" finds "Black iPhone charger" as well as
+"iPhone".
+
+Item names repeat a lot ("Water bottle", "Room keys"), so trigrams are
+indexed per distinct normalized value, a FuzzyTerm, and FuzzyItemTerm
+links each item's fields to their terms. A lookup is two steps:
+
+1. one grouped query over the (gram, term) index counts the trigrams each
+   term with items shares with the query. A run of words can only share
+   the trigrams its term shares, so terms sharing too few to reach the
+   threshold are dropped there, and the CANDIDATE_POOL sharing most are
+   scored word by word in Python, keeping the TERM_POOL most similar;
+2. one query reads the newest items of each of those terms off the
+   (term, date_reported, item) index and keeps each item's best term.
+
+The first step reads the distinct values instead of every item, and the
+second stops after the items it returns. Signals
+keep the links in step with each save and drop the terms a rename leaves
+without items; rows written without them are picked up by
+``manage.py rebuild_trigram_index``.
+"""
+import math
+from django.db import connections, transaction
+from django.db.models import Count, Exists, OuterRef
+from .matching import normalize
+
+# {field name in the index: model attribute}
+FUZZY_FIELDS = {'name': 'item_name', 'brand': 'brand', 'color': 'color'}
+# Most similar terms whose items a lookup returns
+TERM_POOL = 20
+# Terms sharing the most trigrams with the query that are scored word by word
+CANDIDATE_POOL = 200
+TERM_LENGTH = 200
+
+
+def trigrams(text):
+    """The set of padded word trigrams of text."""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f'  {word} '
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+def item_terms(item):
+    """{field: normalized value} for an item's non-empty fields."""
+    terms = {}
+    for field, attname in FUZZY_FIELDS.items():
+        value = normalize(getattr(item, attname))[:TERM_LENGTH]
+        if value:
+            terms[field] = value
+    return terms
+
+
+def ensure_terms(values):
+    """{value: term id} for values, creating the missing terms and their trigrams."""
+    from .models import FuzzyTerm, FuzzyTermGram
+
+    values = set(values)
+    known = dict(FuzzyTerm.objects.filter(value__in=values).values_list('value', 'id'))
+    missing = values - set(known)
+    if missing:
+        # A concurrent save may create the same term; the unique value keeps one
+        FuzzyTerm.objects.bulk_create([FuzzyTerm(value=value) for value in missing], ignore_conflicts=True)
+        created = dict(FuzzyTerm.objects.filter(value__in=missing).values_list('value', 'id'))
+        FuzzyTermGram.objects.bulk_create([
+            FuzzyTermGram(term_id=term_id, gram=gram)
+            for value, term_id in created.items() for gram in trigrams(value)
+        ], ignore_conflicts=True)
+        known.update(created)
+    return known
+
+
+def index_terms(item):
+    """Bring item's term links in line with its fields, touching only the rows that changed."""
+    from .models import FuzzyItemTerm
+
+    wanted = item_terms(item)
+    term_ids = ensure_terms(wanted.values()) if wanted else {}
+    wanted = {field: term_ids[value] for field, value in wanted.items()}
+    stored = {
+        field: (pk, term_id)
+        for pk, field, term_id in FuzzyItemTerm.objects.filter(item=item).values_list('pk', 'field', 'term_id')
+    }
+    stale = {pk: term_id for field, (pk, term_id) in stored.items() if wanted.get(field) != term_id}
+    if stale:
+        FuzzyItemTerm.objects.filter(pk__in=stale).delete()
+        prune_terms(stale.values())
+    FuzzyItemTerm.objects.bulk_create([
+        FuzzyItemTerm(item=item, field=field, term_id=term_id, date_reported=item.date_reported)
+        for field, term_id in wanted.items() if stored.get(field, (None, None))[1] != term_id
+    ])
+
+
+def rebuild_trigram_index(batch_size=5000):
+    """Re-create every term and link from the items; returns (items, terms)."""
+    from .models import FuzzyTerm, LostFoundItem
+
+    items = 0
+    with transaction.atomic():
+        # Cascades to the trigrams and links
+        FuzzyTerm.objects.all().delete()
+        rows = LostFoundItem.objects.only('pk', 'date_reported', *FUZZY_FIELDS.values()).iterator(chunk_size=batch_size)
+        batch = []
+        for item in rows:
+            items += 1
+            batch.append((item, item_terms(item)))
+            if len(batch) == batch_size:
+                link_batch(batch)
+                batch = []
+        link_batch(batch)
+        terms = FuzzyTerm.objects.count()
+    return items, terms
+
+
+def link_batch(batch):
+    from .models import FuzzyItemTerm
+
+    term_ids = ensure_terms({value for _, terms in batch for value in terms.values()})
+    FuzzyItemTerm.objects.bulk_create([
+        FuzzyItemTerm(item_id=item.pk, field=field, term_id=term_ids[value], date_reported=item.date_reported)
+        for item, terms in batch for field, value in terms.items()
+    ])
+
+
+def update_trigram_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not set(FUZZY_FIELDS.values()) & set(update_fields)):
+        return
+    index_terms(instance)
+
+
+def prune_terms(term_ids):
+    """Delete the terms among term_ids that no item has any more."""
+    from .models import FuzzyItemTerm, FuzzyTerm
+
+    FuzzyTerm.objects.filter(pk__in=term_ids).exclude(
+        Exists(FuzzyItemTerm.objects.filter(term_id=OuterRef('pk')))
+    ).delete()
+
+
+def word_similarity(grams, value, width):
+    """
+    The best similarity of the trigrams grams to those of a run of up to
+    width consecutive words of value.
+    """
+    word_grams = [trigrams(word) for word in value.split()]
+    best = 0.0
+    for start in range(len(word_grams)):
+        window = set()
+        for word in word_grams[start:start + width]:
+            window |= word
+            best = max(best, len(grams & window) / len(grams | window))
+    return best
+
+
+def similar_terms(query, threshold=0.2, limit=TERM_POOL):
+    """[(term id, similarity)] of the terms at least threshold similar to query, best first."""
+    from .models import FuzzyItemTerm, FuzzyTermGram
+
+    grams = trigrams(query)
+    if not grams:
+        return []
+    width = len(normalize(query).split())
+    candidates = FuzzyTermGram.objects.filter(gram__in=grams).filter(
+        # Terms whose items were all deleted wait for a rebuild; skip them
+        Exists(FuzzyItemTerm.objects.filter(term_id=OuterRef('term_id')))
+    ).values('term_id', 'term__value').annotate(shared=Count('gram')).filter(
+        shared__gte=math.ceil(threshold * len(grams))
+    ).order_by('-shared', 'term_id')[:CANDIDATE_POOL]
+    scored = [
+        (row['term_id'], round(word_similarity(grams, row['term__value'], width), 3))
+        for row in candidates
+    ]
+    scored = [(term_id, similarity) for term_id, similarity in scored if similarity >= threshold]
+    scored.sort(key=lambda term: (-term[1], term[0]))
+    return scored[:limit]
+
+
+def fuzzy_ranking(queryset, terms, limit=100):
+    """
+    [(item id, similarity)] for up to limit items of queryset with a field
+    among terms (from similar_terms), each scored by its most similar
+    term, most similar first and newest first among equals.
+
+    Each term's items are read newest first off the index, stopping after
+    limit, so no query sorts every match. The reads are glued together
+    with UNION ALL into one statement; Django cannot slice the parts of a
+    union on SQLite, so it is put together from their compiled SQL.
+    """
+    if not terms:
+        return []
+    parts, params = [], []
+    for term_id, similarity in terms:
+        part = queryset.filter(fuzzy_terms__term_id=term_id).order_by(
+            '-fuzzy_terms__date_reported'
+        ).values_list('pk', 'date_reported')[:limit]
+        sql, part_params = part.query.sql_with_params()
+        parts.append(f'SELECT *, %s AS similarity FROM ({sql})')
+        params += [similarity, *part_params]
+    pk = queryset.model._meta.pk
+    sql = (
+        f'SELECT {pk.column}, MAX(similarity) AS similarity FROM ({" UNION ALL ".join(parts)}) '
+        f'GROUP BY {pk.column} ORDER BY similarity DESC, date_reported DESC, {pk.column} DESC LIMIT %s'
+    )
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, [*params, limit])
+        return [(pk.to_python(item_id), similarity) for item_id, similarity in cursor.fetchall()]
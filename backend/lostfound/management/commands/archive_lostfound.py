@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from lostfound.archive import archivable, archive_resolved
+
+
+class Command(BaseCommand):
+    help = (
+        'Move lost & found items resolved and unchanged for LOSTFOUND_ARCHIVE_AFTER into the '
+        'archive table, in batches, so the live listing only holds recent items.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=float,
+            help='Archive items resolved at least this many days ago (default: LOSTFOUND_ARCHIVE_AFTER)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Items moved per transaction')
+        parser.add_argument('--limit', type=int, help='Stop after archiving this many items')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the items that would move')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] is None:
+            older_than = settings.LOSTFOUND_ARCHIVE_AFTER
+        else:
+            older_than = timedelta(days=options['older_than_days'])
+        if older_than < timedelta(0):
+            raise CommandError('--older-than-days must not be negative.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        if options['dry_run']:
+            count = archivable(timezone.now() - older_than).count()
+            self.stdout.write(self.style.SUCCESS(f'{count} item(s) would be archived'))
+            return
+        total = archive_resolved(
+            older_than, batch_size=options['batch_size'], limit=options['limit'], log=self.stdout.write
+        )
+        self.stdout.write(self.style.SUCCESS(f'{total} item(s) archived'))
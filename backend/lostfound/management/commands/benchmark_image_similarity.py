@@ -0,0 +1,104 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from accounts.models import User
+from lostfound.models import ImageHash, LostFoundItem
+from lostfound.similarity import HASH_BITS, candidate_filter, hash_fields, to_unsigned
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Time photo similarity lookups in a throwaway database of random hashes: the banded '
+        'index lookup used by /similar-images/ against scanning every hash, checking both find '
+        'the same matches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100000, help='Hashed items to create')
+        parser.add_argument('--queries', type=int, default=50, help='Lookups to time')
+        parser.add_argument('--radius', type=int, default=10, help='Hamming radius of each lookup')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the hashes')
+
+    def handle(self, *args, **options):
+        if options['items'] < 1 or options['queries'] < 1:
+            raise CommandError('--items and --queries must be at least 1.')
+        if not 0 <= options['radius'] < HASH_BITS:
+            raise CommandError(f'--radius must be from 0 to {HASH_BITS - 1}.')
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            rng = random.Random(options['seed'])
+            queries = self.populate(rng, options['items'], options['queries'], options['radius'])
+            indexed_ms, candidates, indexed = self.time_lookups(queries, options['radius'], indexed=True)
+            scan_ms, _, scanned = self.time_lookups(queries, options['radius'], indexed=False)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if indexed != scanned:
+            raise CommandError('The banded lookup missed matches the full scan found.')
+        count = len(queries)
+        self.stdout.write(f"{options['items']} hashed items, {count} lookups at radius {options['radius']}")
+        self.stdout.write(
+            f'banded index: {indexed_ms / count:.3f} ms per lookup, '
+            f'{candidates / count:.1f} candidate(s) checked'
+        )
+        self.stdout.write(f"full scan:    {scan_ms / count:.3f} ms per lookup, {options['items']} checked")
+        matches = sum(len(found) for found in indexed)
+        self.stdout.write(self.style.SUCCESS(
+            f'{matches} match(es), identical for both; {scan_ms / max(indexed_ms, 1e-9):.1f}x faster'
+        ))
+
+    def populate(self, rng, items, queries, radius):
+        """
+        Insert items with random hashes, each query hash having a near copy
+        (up to radius bits flipped) among them. Returns the query hashes.
+        """
+        reporter = User.objects.create_user(
+            email='benchmark@example.com', name='Benchmark', mobile='0000000000', password=None
+        )
+        query_hashes = [rng.getrandbits(HASH_BITS) for _ in range(queries)]
+        values = []
+        for value in query_hashes:
+            for bit in rng.sample(range(HASH_BITS), rng.randint(0, radius)):
+                value ^= 1 << bit
+            values.append(value)
+        values += [rng.getrandbits(HASH_BITS) for _ in range(items - len(values))]
+        now = timezone.now()
+        for start in range(0, len(values), BATCH_SIZE):
+            batch = values[start:start + BATCH_SIZE]
+            rows = LostFoundItem.objects.bulk_create([
+                LostFoundItem(item_name=f'Item {start + offset}', status=LostFoundItem.FOUND,
+                              reporter=reporter, date_occurred=now)
+                for offset in range(len(batch))
+            ])
+            ImageHash.objects.bulk_create([
+                ImageHash(item=row, source=f'lostfound/{row.pk}.jpg', **hash_fields(value))
+                for row, value in zip(rows, batch)
+            ])
+        with connection.cursor() as cursor:
+            # Let the planner see how selective the band indexes are
+            cursor.execute('ANALYZE')
+        return query_hashes
+
+    def time_lookups(self, queries, radius, indexed):
+        """Total ms, candidates checked and the sorted matching item ids per query."""
+        total = 0.0
+        candidates = 0
+        results = []
+        for value in queries:
+            start = time.perf_counter()
+            rows = ImageHash.objects.all()
+            if indexed:
+                rows = rows.filter(candidate_filter(value, radius))
+            found = []
+            for item_id, other in rows.values_list('item_id', 'value'):
+                candidates += 1
+                if (value ^ to_unsigned(other)).bit_count() <= radius:
+                    found.append(item_id)
+            total += (time.perf_counter() - start) * 1000
+            results.append(sorted(found))
+        return total, candidates, results
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from lostfound.models import LostFoundItem
+from lostfound.similarity import hash_is_current, index_image
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute the perceptual hashes of lost & found photos that have none or were hashed '
+        'from an older photo, e.g. for items reported before photo matching existed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rehash photos that are up to date')
+
+    def handle(self, *args, **options):
+        items = LostFoundItem.objects.exclude(image='').exclude(image__isnull=True)
+        hashed = unreadable = 0
+        for item in items.only('pk', 'image').iterator():
+            if not options['force'] and hash_is_current(item):
+                continue
+            if index_image(item) is None:
+                unreadable += 1
+            else:
+                hashed += 1
+        self.stdout.write(self.style.SUCCESS(f'{hashed} photo(s) hashed, {unreadable} unreadable'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from lostfound.matching import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the lost/found matching index from the open items, e.g. after bulk_create or '
+        'queryset.update() wrote rows without signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Postings per INSERT')
+
+    def handle(self, *args, **options):
+        items, postings = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{items} open item(s) indexed, {postings} posting(s)'))
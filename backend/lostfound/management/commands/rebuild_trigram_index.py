@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from lostfound.fuzzy import rebuild_trigram_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the trigram index behind ?fuzzy= on the lost & found list, e.g. after '
+        'bulk_create or queryset.update() wrote rows without signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Items per batch')
+
+    def handle(self, *args, **options):
+        items, terms = rebuild_trigram_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{items} item(s) indexed, {terms} distinct term(s)'))
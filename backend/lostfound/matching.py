@@ -0,0 +1,204 @@
+"""
+Matching lost reports with found ones.
+
+Every unresolved item has a MatchToken row per normalized token of its
+name, category, colour, brand and location: an inverted index from
+(field, token, status) to items. Each posting carries the item's weight
+for that token, the field's weight split over the item's tokens in that
+field, so summing the postings an item shares with a query is its
+overlap score.
+
+Candidates for an item are the unresolved items of the other status that
+share a token with it. One grouped query over the index ranks them by
+overlap; the best few are then scored for how close their dates are, and
+the top ones returned. Signals keep the postings in step with each save,
+and resolved or deleted items drop out of the index. Rows written without
+signals (bulk_create, queryset.update()) are picked up by
+``manage.py rebuild_match_index``.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Q, Sum
+
+# How much a full overlap in each field is worth
+FIELD_WEIGHTS = {
+    'category': 3.0,
+    'brand': 2.5,
+    'color': 2.0,
+    'name': 4.0,
+    'location': 1.5,
+}
+# Worth of two items happening at the same time, fading out over TIME_WINDOW_DAYS
+TIME_WEIGHT = 2.0
+TIME_WINDOW_DAYS = 30
+# Candidates ranked by overlap that are scored in full, per result asked for
+POOL_FACTOR = 4
+
+# Fields indexed as whole values rather than word by word
+WHOLE_VALUE_FIELDS = ('category', 'brand')
+SOURCE_FIELDS = {
+    'name': 'item_name', 'category': 'category', 'color': 'color',
+    'brand': 'brand', 'location': 'location',
+}
+TOKEN_LENGTH = 50
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'my', 'near', 'of', 'on', 'or', 'the', 'to', 'with',
+})
+SYNONYMS = {'grey': 'gray', 'colour': 'color', 'specs': 'spectacles', 'glasses': 'spectacles'}
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercase ASCII text: accents stripped, punctuation and spacing collapsed."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return ' '.join(WORD_RE.findall(text))
+
+
+def word_tokens(text):
+    tokens = set()
+    for word in normalize(text).split():
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        # Crude plural folding: keys/key, bottles/bottle (not glass/glas)
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.add(SYNONYMS.get(word, word)[:TOKEN_LENGTH])
+    return tokens
+
+
+def item_tokens(item):
+    """{field: set of tokens} for an item."""
+    tokens = {}
+    for field, attname in SOURCE_FIELDS.items():
+        value = getattr(item, attname)
+        if field in WHOLE_VALUE_FIELDS:
+            value = normalize(value)[:TOKEN_LENGTH]
+            tokens[field] = {value} if value else set()
+        else:
+            tokens[field] = word_tokens(value)
+    return tokens
+
+
+def postings(item):
+    """{(field, token): weight} for an item."""
+    entries = {}
+    for field, tokens in item_tokens(item).items():
+        for token in tokens:
+            entries[(field, token)] = FIELD_WEIGHTS[field] / len(tokens)
+    return entries
+
+
+def index_item(item):
+    """
+    Bring item's postings in line with its fields, touching only the rows
+    that changed. Resolved items are removed from the index.
+    """
+    from .models import MatchToken
+
+    wanted = set() if item.is_resolved else {
+        (field, token, item.status, weight) for (field, token), weight in postings(item).items()
+    }
+    stored = {
+        (field, token, status, weight): pk
+        for pk, field, token, status, weight in MatchToken.objects.filter(item=item).values_list(
+            'pk', 'field', 'token', 'status', 'weight'
+        )
+    }
+    stale = [pk for entry, pk in stored.items() if entry not in wanted]
+    if stale:
+        MatchToken.objects.filter(pk__in=stale).delete()
+    MatchToken.objects.bulk_create([
+        MatchToken(item=item, field=field, token=token, status=status, weight=weight)
+        for field, token, status, weight in wanted if (field, token, status, weight) not in stored
+    ])
+
+
+def rebuild_index(batch_size=2000):
+    """Re-create every posting from the open items; returns (items, postings)."""
+    from .models import LostFoundItem, MatchToken
+
+    items = count = 0
+    with transaction.atomic():
+        MatchToken.objects.all().delete()
+        batch = []
+        for item in LostFoundItem.objects.filter(is_resolved=False).only(
+            'pk', 'status', *SOURCE_FIELDS.values()
+        ).iterator(chunk_size=batch_size):
+            items += 1
+            batch.extend(
+                MatchToken(item_id=item.pk, field=field, token=token, status=item.status, weight=weight)
+                for (field, token), weight in postings(item).items()
+            )
+            if len(batch) >= batch_size:
+                MatchToken.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        MatchToken.objects.bulk_create(batch)
+        count += len(batch)
+    return items, count
+
+
+def update_match_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    indexed = set(SOURCE_FIELDS.values()) | {'status', 'is_resolved'}
+    if raw or (update_fields is not None and not indexed & set(update_fields)):
+        return
+    index_item(instance)
+
+
+def occurred(item):
+    return item.date_occurred or item.date_reported
+
+
+def time_score(item, candidate):
+    """TIME_WEIGHT for items on the same day, fading to 0 over TIME_WINDOW_DAYS."""
+    if occurred(item) is None or occurred(candidate) is None:
+        return 0.0
+    lost, found = (item, candidate) if item.status == item.LOST else (candidate, item)
+    gap = (occurred(found) - occurred(lost)).total_seconds() / 86400
+    # Allow a day for reports made from memory; nothing is found well before it was lost
+    if gap < -1:
+        return 0.0
+    return TIME_WEIGHT * max(0.0, 1 - abs(gap) / TIME_WINDOW_DAYS)
+
+
+def find_matches(item, limit=10):
+    """
+    [(score, reasons, candidate)] for the best unresolved items of the other
+    status, best first. reasons lists the fields the candidate shares with
+    item, plus 'date' when they happened close together.
+    """
+    from .models import LostFoundItem, MatchToken
+
+    tokens = item_tokens(item)
+    condition = Q()
+    for field, values in tokens.items():
+        if values:
+            condition |= Q(field=field, token__in=values)
+    if not condition:
+        return []
+    opposite = LostFoundItem.FOUND if item.status == LostFoundItem.LOST else LostFoundItem.LOST
+    shared = MatchToken.objects.filter(condition, status=opposite).exclude(item=item)
+
+    ranked = shared.values('item_id').annotate(overlap=Sum('weight')).order_by('-overlap', 'item_id')
+    pool = {row['item_id']: row['overlap'] for row in ranked[:limit * POOL_FACTOR]}
+    if not pool:
+        return []
+    reasons = defaultdict(set)
+    for item_id, field in shared.filter(item_id__in=pool).values_list('item_id', 'field'):
+        reasons[item_id].add(field)
+    candidates = LostFoundItem.objects.select_related('reporter', 'claimed_by').in_bulk(list(pool))
+
+    scored = []
+    for item_id, candidate in candidates.items():
+        closeness = time_score(item, candidate)
+        fields = sorted(reasons[item_id], key=list(FIELD_WEIGHTS).index)
+        if closeness:
+            fields.append('date')
+        scored.append((round(pool[item_id] + closeness, 3), fields, candidate))
+    scored.sort(key=lambda entry: (-entry[0], str(entry[2].pk)))
+    return scored[:limit]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0002_alter_lostfounditem_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lostfounditem',
+            index=models.Index(fields=['date_reported', 'id'], name='lostfound_reported_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0003_lostfounditem_lostfound_reported_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lostfounditem',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['status', 'date_reported'], name='lostfound_open_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lostfounditem',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['status', 'category'], name='lostfound_open_category_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:05
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0005_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lostfounditem',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.PrivateMediaStorage(), upload_to='lostfound/'),
+        ),
+    ]
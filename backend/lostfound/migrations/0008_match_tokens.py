@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0007_image_hashes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=10)),
+                ('token', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('lost', 'Lost'), ('found', 'Found')], max_length=10)),
+                ('weight', models.FloatField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_tokens', to='lostfound.lostfounditem')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='matchtoken',
+            index=models.Index(fields=['field', 'token', 'status', 'item', 'weight'], name='lostfound_match_token_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='matchtoken',
+            unique_together={('item', 'field', 'token')},
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lostfound', '0008_match_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LostFoundTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('mark_found', 'Marked found'), ('claim', 'Claimed'), ('unclaim', 'Unclaimed')], max_length=20)),
+                ('from_state', models.CharField(max_length=10)),
+                ('to_state', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lostfound_transitions', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='lostfound.lostfounditem')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lostfoundtransition',
+            index=models.Index(fields=['item', 'created_at'], name='lostfound_transition_item_idx'),
+        ),
+    ]
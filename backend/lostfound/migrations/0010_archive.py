@@ -0,0 +1,55 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:28
+
+import core.storage
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lostfound', '0009_transitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLostFoundItem',
+            fields=[
+                ('derivatives', models.JSONField(blank=True, default=dict, editable=False)),
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('item_name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('lost', 'Lost'), ('found', 'Found')], max_length=10)),
+                ('location', models.CharField(blank=True, max_length=200, null=True)),
+                ('date_reported', models.DateTimeField()),
+                ('date_occurred', models.DateTimeField(blank=True, null=True)),
+                ('is_resolved', models.BooleanField(default=True)),
+                ('image', models.ImageField(blank=True, null=True, storage=core.storage.PrivateMediaStorage(), upload_to='lostfound/')),
+                ('contact_info', models.CharField(blank=True, max_length=200, null=True)),
+                ('category', models.CharField(blank=True, max_length=50, null=True)),
+                ('color', models.CharField(blank=True, max_length=50, null=True)),
+                ('brand', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('history', models.JSONField(blank=True, default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_claimed_items', to=settings.AUTH_USER_MODEL)),
+                ('reporter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_reported_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Lost & Found Item',
+                'verbose_name_plural': 'Archived Lost & Found Items',
+                'ordering': ['-date_reported'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedlostfounditem',
+            index=models.Index(fields=['date_reported', 'id'], name='lostfound_archive_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedlostfounditem',
+            index=models.Index(fields=['status', 'category'], name='lostfound_archive_category_idx'),
+        ),
+    ]
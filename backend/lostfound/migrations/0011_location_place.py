@@ -0,0 +1,25 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+        ('lostfound', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedlostfounditem',
+            name='location_place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_lostfound_items', to='locations.place'),
+        ),
+        migrations.AddField(
+            model_name='lostfounditem',
+            name='location_place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lostfound_items', to='locations.place'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0011_location_place'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuzzyTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(max_length=200, unique=True)),
+                ('size', models.PositiveSmallIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FuzzyTermGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grams', to='lostfound.fuzzyterm')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FuzzyItemTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=10)),
+                ('date_reported', models.DateTimeField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fuzzy_terms', to='lostfound.lostfounditem')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='lostfound.fuzzyterm')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='fuzzytermgram',
+            index=models.Index(fields=['gram', 'term'], name='lostfound_fuzzy_gram_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='fuzzytermgram',
+            unique_together={('term', 'gram')},
+        ),
+        migrations.AddIndex(
+            model_name='fuzzyitemterm',
+            index=models.Index(fields=['term', '-date_reported', 'item'], name='lostfound_fuzzy_item_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='fuzzyitemterm',
+            unique_together={('item', 'field')},
+        ),
+    ]
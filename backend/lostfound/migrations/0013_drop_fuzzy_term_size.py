@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 06:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lostfound', '0012_fuzzy_terms'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='fuzzyterm',
+            name='size',
+        ),
+    ]
@@ -1,9 +1,11 @@
 import uuid
 from django.db import models
 from accounts.models import User
+from core.models import ImageDerivativesMixin
+from core.storage import PrivateMediaStorage
 from django.utils import timezone
 
-class LostFoundItem(models.Model):
+class LostFoundItem(ImageDerivativesMixin):
     LOST = 'lost'
     FOUND = 'found'
     STATUS_CHOICES = [
@@ -16,6 +18,11 @@ class LostFoundItem(models.Model):
     description = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=LOST)
     location = models.CharField(max_length=200, blank=True, null=True)
+    # The gazetteer place the location text resolves to (see locations/gazetteer.py)
+    location_place = models.ForeignKey(
+        'locations.Place', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='lostfound_items'
+    )
     date_reported = models.DateTimeField(auto_now_add=True)
     date_occurred = models.DateTimeField(blank=True, null=True)
     reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reported_items')
@@ -27,7 +34,8 @@ class LostFoundItem(models.Model):
         related_name='claimed_items'
     )
     is_resolved = models.BooleanField(default=False)
-    image = models.ImageField(upload_to='lostfound/', blank=True, null=True)
+    # Private: served only through signed, expiring URLs (see core.media)
+    image = models.ImageField(upload_to='lostfound/', storage=PrivateMediaStorage(), blank=True, null=True)
     contact_info = models.CharField(max_length=200, blank=True, null=True)
     category = models.CharField(max_length=50, blank=True, null=True)
     color = models.CharField(max_length=50, blank=True, null=True)
@@ -39,6 +47,19 @@ class LostFoundItem(models.Model):
         ordering = ['-date_reported']
         verbose_name = 'Lost & Found Item'
         verbose_name_plural = 'Lost & Found Items'
+        indexes = [
+            # Keyset pagination walks (date_reported, id)
+            models.Index(fields=['date_reported', 'id'], name='lostfound_reported_id_idx'),
+            # Open items by status, and by status and category (see advise_indexes)
+            models.Index(
+                fields=['status', 'date_reported'], name='lostfound_open_status_idx',
+                condition=models.Q(is_resolved=False)
+            ),
+            models.Index(
+                fields=['status', 'category'], name='lostfound_open_category_idx',
+                condition=models.Q(is_resolved=False)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_status_display()}: {self.item_name} ({self.date_reported.strftime('%Y-%m-%d')})"
@@ -47,3 +68,171 @@ class LostFoundItem(models.Model):
         if self.status == self.FOUND and not self.date_occurred:
             self.date_occurred = timezone.now()
         super().save(*args, **kwargs)
+
+
+class ImageHash(models.Model):
+    """
+    Perceptual hash of an item's photo (see lostfound/similarity.py), split
+    into four indexed 16-bit bands for finding near neighbours.
+    """
+    item = models.OneToOneField(
+        LostFoundItem, on_delete=models.CASCADE, primary_key=True, related_name='image_hash'
+    )
+    # The image name the hash was computed from
+    source = models.CharField(max_length=255)
+    # 64-bit dHash, stored as a signed integer
+    value = models.BigIntegerField()
+    band0 = models.PositiveIntegerField(db_index=True)
+    band1 = models.PositiveIntegerField(db_index=True)
+    band2 = models.PositiveIntegerField(db_index=True)
+    band3 = models.PositiveIntegerField(db_index=True)
+
+    def __str__(self):
+        return f'{self.item_id}: {self.value & 0xFFFFFFFFFFFFFFFF:016x}'
+
+
+class MatchToken(models.Model):
+    """
+    One posting of the lost/found matching index (see lostfound/matching.py):
+    an unresolved item has a normalized token in one of its fields.
+    """
+    item = models.ForeignKey(LostFoundItem, on_delete=models.CASCADE, related_name='match_tokens')
+    field = models.CharField(max_length=10)
+    token = models.CharField(max_length=50)
+    # The item's status, so lookups read only the other side's postings
+    status = models.CharField(max_length=10, choices=LostFoundItem.STATUS_CHOICES)
+    # The field's weight over the item's number of tokens in that field
+    weight = models.FloatField()
+
+    class Meta:
+        unique_together = ['item', 'field', 'token']
+        indexes = [
+            # Covers the grouped lookup in find_matches, which never reads the table
+            models.Index(
+                fields=['field', 'token', 'status', 'item', 'weight'], name='lostfound_match_token_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.field}:{self.token} -> {self.item_id}'
+
+
+class FuzzyTerm(models.Model):
+    """
+    A distinct normalized name, brand or colour of the fuzzy lookup index
+    (see lostfound/fuzzy.py), shared by every item with that value.
+    """
+    value = models.CharField(max_length=200, unique=True)
+
+    def __str__(self):
+        return self.value
+
+
+class FuzzyTermGram(models.Model):
+    """A term has a trigram."""
+    term = models.ForeignKey(FuzzyTerm, on_delete=models.CASCADE, related_name='grams')
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = ['term', 'gram']
+        indexes = [
+            # Covers the grouped lookup in similar_terms
+            models.Index(fields=['gram', 'term'], name='lostfound_fuzzy_gram_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.gram!r} -> {self.term_id}'
+
+
+class FuzzyItemTerm(models.Model):
+    """An item's field has a term."""
+    item = models.ForeignKey(LostFoundItem, on_delete=models.CASCADE, related_name='fuzzy_terms')
+    field = models.CharField(max_length=10)
+    term = models.ForeignKey(FuzzyTerm, on_delete=models.CASCADE, related_name='items')
+    # The item's, which never changes, so a term's items can be read newest first
+    date_reported = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['item', 'field']
+        indexes = [
+            models.Index(fields=['term', '-date_reported', 'item'], name='lostfound_fuzzy_item_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.field}:{self.term_id} -> {self.item_id}'
+
+
+class LostFoundTransition(models.Model):
+    """One state change of an item, made by lostfound.transitions."""
+    ACTION_CHOICES = [
+        ('mark_found', 'Marked found'),
+        ('claim', 'Claimed'),
+        ('unclaim', 'Unclaimed'),
+    ]
+
+    item = models.ForeignKey(LostFoundItem, on_delete=models.CASCADE, related_name='transitions')
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    # 'lost', 'found' or 'claimed'
+    from_state = models.CharField(max_length=10)
+    to_state = models.CharField(max_length=10)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='lostfound_transitions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['item', 'created_at'], name='lostfound_transition_item_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.item_id}: {self.from_state} -> {self.to_state} ({self.action})'
+
+
+class ArchivedLostFoundItem(ImageDerivativesMixin):
+    """
+    A resolved item moved out of LostFoundItem by ``manage.py archive_lostfound``
+    so the live listing stays small. Keeps the item's id, columns, image and
+    derivatives, and its transition history.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    item_name = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=LostFoundItem.STATUS_CHOICES)
+    location = models.CharField(max_length=200, blank=True, null=True)
+    location_place = models.ForeignKey(
+        'locations.Place', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='archived_lostfound_items'
+    )
+    date_reported = models.DateTimeField()
+    date_occurred = models.DateTimeField(blank=True, null=True)
+    reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_reported_items')
+    claimed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_claimed_items'
+    )
+    is_resolved = models.BooleanField(default=True)
+    image = models.ImageField(upload_to='lostfound/', storage=PrivateMediaStorage(), blank=True, null=True)
+    contact_info = models.CharField(max_length=200, blank=True, null=True)
+    category = models.CharField(max_length=50, blank=True, null=True)
+    color = models.CharField(max_length=50, blank=True, null=True)
+    brand = models.CharField(max_length=100, blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    # [{action, from_state, to_state, actor, created_at}] from LostFoundTransition
+    history = models.JSONField(default=list, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date_reported']
+        verbose_name = 'Archived Lost & Found Item'
+        verbose_name_plural = 'Archived Lost & Found Items'
+        indexes = [
+            models.Index(fields=['date_reported', 'id'], name='lostfound_archive_reported_idx'),
+            models.Index(fields=['status', 'category'], name='lostfound_archive_category_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_status_display()}: {self.item_name} ({self.date_reported.strftime('%Y-%m-%d')})"
@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import LostFoundItem
+from .models import ArchivedLostFoundItem, LostFoundItem
 from accounts.serializers import UserSerializer
+from core.images import ImageSizesField, ImageSrcsetField
 from rest_framework.parsers import MultiPartParser, FormParser
 
 class LostFoundItemSerializer(serializers.ModelSerializer):
@@ -8,13 +9,15 @@ class LostFoundItemSerializer(serializers.ModelSerializer):
     claimed_by = UserSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     image = serializers.ImageField(required=False, allow_null=True)
+    image_sizes = ImageSizesField()
+    image_srcset = ImageSrcsetField()
     
     class Meta:
         model = LostFoundItem
         fields = [
             'id', 'item_name', 'description', 'status', 'status_display',
-            'location', 'date_reported', 'date_occurred', 'reporter',
-            'claimed_by', 'is_resolved', 'image', 'contact_info',
+            'location', 'location_place', 'date_reported', 'date_occurred', 'reporter',
+            'claimed_by', 'is_resolved', 'image', 'image_sizes', 'image_srcset', 'contact_info',
             'category', 'color', 'brand', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'reporter', 'created_at', 'updated_at']
@@ -56,3 +59,16 @@ class LostFoundItemUpdateSerializer(serializers.ModelSerializer):
             'color': {'required': False, 'allow_blank': True},
             'brand': {'required': False, 'allow_blank': True},
         }
+
+
+class ArchivedLostFoundItemSerializer(serializers.ModelSerializer):
+    reporter = UserSerializer(read_only=True)
+    claimed_by = UserSerializer(read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    image_sizes = ImageSizesField()
+    image_srcset = ImageSrcsetField()
+
+    class Meta:
+        model = ArchivedLostFoundItem
+        fields = LostFoundItemSerializer.Meta.fields + ['history', 'archived_at']
+        read_only_fields = fields
@@ -0,0 +1,171 @@
+"""
+Finding lost & found photos that look alike.
+
+Every item photo gets a 64-bit difference hash (dHash): the photo shrunk
+to 9x8 grey pixels, one bit per horizontally adjacent pair saying whether
+brightness falls. Re-encoded, resized or slightly recropped copies of a
+photo differ in a few bits, so "looks alike" is a small Hamming distance.
+
+The hashes are stored in ImageHash, split into four 16-bit bands, each
+with its own index (multi-index hashing). By the pigeonhole principle two
+hashes within distance r share at least one band within distance r // 4,
+so the candidates are the rows whose band i is one of the few values near
+the query's band i. That is one indexed lookup per band instead of a scan
+of every hash, and only the candidates' full distances are computed.
+
+Hashes are computed once the upload's transaction commits and again when
+the photo changes; ``manage.py index_image_hashes`` backfills older rows.
+"""
+import logging
+from itertools import combinations
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def dhash(file):
+    """The 64-bit difference hash of an open image file."""
+    image = Image.open(file)
+    # Let JPEG decode at a fraction of full size; the hash only needs 9x8 pixels
+    image.draft('L', (64, 64))
+    image = ImageOps.exif_transpose(image).convert('L').resize((9, 8), Image.BOX)
+    pixels = image.tobytes()
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left, right = pixels[row * 9 + column], pixels[row * 9 + column + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def to_signed(value):
+    """An unsigned 64-bit hash as the signed value a BigIntegerField holds."""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value & ((1 << HASH_BITS) - 1)
+
+
+def bands(value):
+    """The four 16-bit bands of a hash, most significant first."""
+    return [(value >> (BAND_BITS * (BANDS - 1 - index))) & BAND_MASK for index in range(BANDS)]
+
+
+def band_neighbours(band, distance):
+    """Every 16-bit value within ``distance`` bits of band."""
+    values = [band]
+    for flipped in range(1, distance + 1):
+        for bits in combinations(range(BAND_BITS), flipped):
+            mask = 0
+            for bit in bits:
+                mask |= 1 << bit
+            values.append(band ^ mask)
+    return values
+
+
+def hash_fields(value):
+    """ImageHash field values for an unsigned hash."""
+    fields = {f'band{index}': band for index, band in enumerate(bands(value))}
+    fields['value'] = to_signed(value)
+    return fields
+
+
+def candidate_filter(value, radius):
+    """
+    A Q matching every ImageHash that may be within radius of value: some
+    band is within radius // BANDS bits of the query's.
+    """
+    spread = radius // BANDS
+    condition = Q()
+    for index, band in enumerate(bands(value)):
+        condition |= Q(**{f'band{index}__in': band_neighbours(band, spread)})
+    return condition
+
+
+def index_image(item):
+    """
+    Store the hash of item's current photo, or remove it when the photo is
+    gone. Unreadable photos are left unhashed. Returns the hash or None.
+    """
+    from .models import ImageHash
+
+    if not item.image:
+        ImageHash.objects.filter(item=item).delete()
+        return None
+    try:
+        with item.image.open('rb') as file:
+            value = dhash(file)
+    except (UnidentifiedImageError, OSError) as error:
+        logger.warning('Cannot hash %s: %s', item.image.name, error)
+        ImageHash.objects.filter(item=item).delete()
+        return None
+    ImageHash.objects.update_or_create(
+        item=item, defaults=dict(hash_fields(value), source=item.image.name)
+    )
+    return value
+
+
+def hash_is_current(item):
+    from .models import ImageHash
+    return ImageHash.objects.filter(item=item, source=item.image.name).exists()
+
+
+def refresh_hash(item_id):
+    from .models import LostFoundItem
+
+    item = LostFoundItem.objects.filter(pk=item_id).first()
+    if item is None:
+        return
+    if item.image and hash_is_current(item):
+        return
+    index_image(item)
+
+
+def queue_image_hash(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'image' not in update_fields):
+        return
+    item_id = instance.pk
+    transaction.on_commit(lambda: refresh_hash(item_id))
+
+
+def similar_items(item, radius=None, limit=None):
+    """
+    [(distance, item)] for the unresolved items of the opposite status whose
+    photos are within radius of item's, nearest first. None when item has
+    no hashed photo.
+    """
+    from .models import ImageHash, LostFoundItem
+
+    radius = settings.LOSTFOUND_SIMILAR_IMAGES_RADIUS if radius is None else radius
+    limit = settings.LOSTFOUND_SIMILAR_IMAGES_LIMIT if limit is None else limit
+    own = ImageHash.objects.filter(item=item).values_list('value', flat=True).first()
+    if own is None:
+        return None
+    value = to_unsigned(own)
+
+    opposite = LostFoundItem.FOUND if item.status == LostFoundItem.LOST else LostFoundItem.LOST
+    candidates = ImageHash.objects.filter(candidate_filter(value, radius)).filter(
+        item__status=opposite, item__is_resolved=False
+    ).exclude(item=item).values_list('item_id', 'value')
+
+    matches = []
+    for item_id, other in candidates:
+        distance = (value ^ to_unsigned(other)).bit_count()
+        if distance <= radius:
+            matches.append((distance, item_id))
+    matches.sort(key=lambda match: (match[0], str(match[1])))
+    matches = matches[:limit]
+
+    items = LostFoundItem.objects.select_related('reporter', 'claimed_by').in_bulk(
+        [item_id for _, item_id in matches]
+    )
+    return [(distance, items[item_id]) for distance, item_id in matches if item_id in items]
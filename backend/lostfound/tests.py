@@ -1,9 +1,29 @@
-from django.test import TestCase
+import io
+import math
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
-from .models import LostFoundItem
+from PIL import Image
+from .fuzzy import trigrams
+from .matching import find_matches
+from core.models import MediaBlob
+from core.queries import record_queries
+from .models import ArchivedLostFoundItem, ImageHash, LostFoundItem, FuzzyItemTerm, FuzzyTerm, MatchToken
+from .similarity import candidate_filter, hash_fields
+from .transitions import TransitionConflict, apply_transition
 
 User = get_user_model()
 
@@ -152,3 +172,404 @@ class LostFoundModelTests(TestCase):
         self.assertEqual(str(item), 'Test Item (lost)')
         self.assertEqual(item.reporter, user)
         self.assertFalse(item.is_resolved)
+
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_photo(name, pattern, size=(320, 240), image_format='JPEG'):
+    """A photo of a smooth pattern: pattern(x, y) gives the grey level at each point."""
+    width, height = size
+    image = Image.new('L', size)
+    image.putdata([pattern(x / width, y / height) for y in range(height) for x in range(width)])
+    content = io.BytesIO()
+    image.convert('RGB').save(content, image_format)
+    return SimpleUploadedFile(name, content.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+def waves(x, y):
+    return int(127 + 120 * math.sin(7 * x) * math.cos(5 * y))
+
+
+def ramps(x, y):
+    return int(255 * ((x * 3 + y) % 1))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class SimilarImageTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='finder@example.com', name='Finder', mobile='1234567890', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def report(self, status_value, photo):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('lostfounditem-list'), {
+                'item_name': 'Blue bottle', 'status': status_value, 'image': photo,
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return LostFoundItem.objects.get(pk=response.data['id'])
+
+    def test_photos_are_hashed_on_upload_and_replacement(self):
+        item = self.report('lost', make_photo('bottle.jpg', waves))
+        first = ImageHash.objects.get(item=item)
+        self.assertEqual(first.source, item.image.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('lostfounditem-detail', args=[item.pk]),
+                {'image': make_photo('other.jpg', ramps)}, format='multipart'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item.refresh_from_db()
+        second = ImageHash.objects.get(item=item)
+        self.assertEqual(second.source, item.image.name)
+        self.assertNotEqual(first.value, second.value)
+
+    def test_similar_images_finds_open_items_of_the_other_status(self):
+        lost = self.report('lost', make_photo('bottle.jpg', waves))
+        # The same scene, smaller and re-encoded as PNG
+        found = self.report('found', make_photo('found.png', waves, size=(160, 120), image_format='PNG'))
+        self.report('found', make_photo('unrelated.jpg', ramps))
+        self.report('lost', make_photo('also-lost.jpg', waves))
+
+        response = self.client.get(reverse('lostfounditem-similar-images', args=[lost.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([match['item']['id'] for match in response.data['results']], [str(found.pk)])
+        self.assertLessEqual(response.data['results'][0]['distance'], response.data['radius'])
+
+        LostFoundItem.objects.filter(pk=found.pk).update(is_resolved=True)
+        response = self.client.get(reverse('lostfounditem-similar-images', args=[lost.pk]))
+        self.assertEqual(response.data['results'], [])
+
+    def test_banded_candidates_cover_every_hash_within_the_radius(self):
+        rng = random.Random(0)
+        query = rng.getrandbits(64)
+        for radius in (0, 3, 7, 10):
+            for _ in range(50):
+                value = query
+                for bit in rng.sample(range(64), radius):
+                    value ^= 1 << bit
+                item = LostFoundItem.objects.create(item_name='Bottle', reporter=self.user)
+                ImageHash.objects.create(item=item, source='lostfound/bottle.jpg', **hash_fields(value))
+                self.assertTrue(ImageHash.objects.filter(candidate_filter(query, radius), item=item).exists())
+
+    def test_radius_is_validated_and_items_without_photos_404(self):
+        item = LostFoundItem.objects.create(item_name='Umbrella', reporter=self.user)
+        url = reverse('lostfounditem-similar-images', args=[item.pk])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        for radius in ('-1', '64', 'near'):
+            response = self.client.get(url, {'radius': radius})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MatchingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='owner@example.com', name='Owner', mobile='1234567890', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.lost = self.report(
+            'lost', 'Black Samsung phones', category='Electronics', color='Black', brand='Samsung',
+            location='Central Library', days_ago=2
+        )
+
+    def report(self, status_value, name, days_ago=0, **fields):
+        return LostFoundItem.objects.create(
+            item_name=name, status=status_value, reporter=self.user,
+            date_occurred=timezone.now() - timedelta(days=days_ago), **fields
+        )
+
+    def test_matches_are_ranked_by_shared_fields_and_date(self):
+        best = self.report(
+            'found', 'Samsung phone', category='electronics', color='black', brand='SAMSUNG',
+            location='Library', days_ago=1
+        )
+        weaker = self.report('found', 'Calculator', category='Electronics', color='Black', days_ago=0)
+        self.report('lost', 'Samsung phone', category='Electronics', brand='Samsung')
+        self.report('found', 'Samsung phone', category='Electronics', brand='Samsung', is_resolved=True)
+        self.report('found', 'Water bottle', category='Kitchen')
+
+        response = self.client.get(reverse('lostfounditem-matches', args=[self.lost.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([match['item']['id'] for match in results], [str(best.pk), str(weaker.pk)])
+        self.assertEqual(results[0]['reasons'], ['category', 'brand', 'color', 'name', 'location', 'date'])
+        self.assertEqual(results[1]['reasons'], ['category', 'color', 'date'])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+
+    def test_index_follows_edits_resolution_and_deletes(self):
+        tokens = lambda: set(self.lost.match_tokens.values_list('field', 'token'))
+        self.assertIn(('name', 'phone'), tokens())
+        self.assertIn(('location', 'library'), tokens())
+        self.assertIn(('category', 'electronics'), tokens())
+
+        self.lost.item_name = 'Grey umbrella'
+        self.lost.save()
+        self.assertIn(('name', 'gray'), tokens())
+        self.assertNotIn(('name', 'phone'), tokens())
+
+        self.lost.is_resolved = True
+        self.lost.save()
+        self.assertEqual(tokens(), set())
+        self.lost.is_resolved = False
+        self.lost.save()
+        pk = self.lost.pk
+        self.lost.delete()
+        self.assertFalse(MatchToken.objects.filter(item_id=pk).exists())
+
+    def test_limit_is_validated(self):
+        url = reverse('lostfounditem-matches', args=[self.lost.pk])
+        for limit in ('0', '51', 'all'):
+            self.assertEqual(self.client.get(url, {'limit': limit}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command_indexes_bulk_created_rows(self):
+        found, = LostFoundItem.objects.bulk_create([
+            LostFoundItem(item_name='Samsung phone', status='found', brand='Samsung', reporter=self.user)
+        ])
+        self.assertEqual(find_matches(self.lost), [])
+        call_command('rebuild_match_index', stdout=io.StringIO())
+        self.assertEqual([match.pk for _, _, match in find_matches(self.lost)], [found.pk])
+
+
+class FuzzyLookupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='owner@example.com', name='Owner', mobile='1234567890', password='testpass123'
+        )
+        self.phone = self.report('iPhone 13', 'lost', brand='Apple', color='Black')
+        self.shoes = self.report('Running shoes', 'found', brand='Adidas', color='White')
+        self.bottle = self.report('Water bottle', 'found', brand='Milton', color='Blue')
+
+    def report(self, name, status_value, **fields):
+        return LostFoundItem.objects.create(item_name=name, status=status_value, reporter=self.user, **fields)
+
+    def fuzzy(self, text, **params):
+        response = self.client.get(reverse('lostfounditem-list'), {'fuzzy': text, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams('Adidas'), {'  a', ' ad', 'adi', 'did', 'ida', 'das', 'as '})
+        self.assertEqual(trigrams('  '), set())
+
+    def test_misspellings_are_ranked_by_similarity(self):
+        self.assertEqual(self.fuzzy('iphnoe'), [str(self.phone.pk)])
+        self.assertEqual(self.fuzzy('adiddas'), [str(self.shoes.pk)])
+        close = self.report('Water bottles', 'lost')
+        self.assertEqual(self.fuzzy('water botle'), [str(self.bottle.pk), str(close.pk)])
+        self.assertEqual(self.fuzzy('xyz'), [])
+
+    def test_words_of_longer_names_match(self):
+        pro = self.report('iPhone 13 Pro', 'found')
+        charger = self.report('Black iPhone charger', 'found')
+        self.assertEqual(set(self.fuzzy('iphnoe')), {str(self.phone.pk), str(pro.pk), str(charger.pk)})
+        self.assertEqual(self.fuzzy('iphnoe charger'), [str(charger.pk)])
+
+    def test_one_query_reads_the_items(self):
+        for index in range(5):
+            self.report(f'Bottle {index}', 'lost', brand=f'Brand{index}', color='Bluish')
+        with record_queries() as recorder:
+            self.assertEqual(len(self.fuzzy('blue bottle')), 6)
+        self.assertEqual(recorder.duplicate_count, 0)
+
+    def test_ranking_is_not_keyset_paged(self):
+        response = self.client.get(reverse('lostfounditem-list'), {'fuzzy': 'iphnoe', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_combines_with_filters(self):
+        lost_shoes = self.report('Adidas shoes', 'lost')
+        # Both match a word exactly, so the newer comes first
+        self.assertEqual(self.fuzzy('adidas'), [str(lost_shoes.pk), str(self.shoes.pk)])
+        self.assertEqual(self.fuzzy('adidas', status='lost'), [str(lost_shoes.pk)])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.phone.item_name = 'Laptop charger'
+        self.phone.save()
+        self.assertEqual(self.fuzzy('iphnoe'), [])
+        self.assertEqual(self.fuzzy('chargr'), [str(self.phone.pk)])
+        # The renamed item's old name goes with its last item
+        self.assertFalse(FuzzyTerm.objects.filter(value='iphone 13').exists())
+        self.phone.delete()
+        self.assertFalse(FuzzyItemTerm.objects.filter(item_id=self.phone.pk).exists())
+        # The deleted item's terms are no longer offered
+        self.assertEqual(self.fuzzy('chargr'), [])
+
+        FuzzyItemTerm.objects.all().delete()
+        call_command('rebuild_trigram_index', stdout=io.StringIO())
+        self.assertEqual(self.fuzzy('adiddas'), [str(self.shoes.pk)])
+
+
+class TransitionTests(APITestCase):
+    def setUp(self):
+        self.reporter = User.objects.create_user(
+            email='reporter@example.com', name='Reporter', mobile='1234567890', password='testpass123'
+        )
+        self.owner = User.objects.create_user(
+            email='owner@example.com', name='Owner', mobile='0987654321', password='testpass123'
+        )
+        self.item = LostFoundItem.objects.create(item_name='Blue umbrella', status='found', reporter=self.reporter)
+
+    def post(self, user, action):
+        self.client.force_authenticate(user=user)
+        return self.client.post(reverse(f'lostfounditem-{action}', args=[self.item.pk]))
+
+    def test_lifecycle_is_recorded(self):
+        lost = LostFoundItem.objects.create(item_name='Wallet', status='lost', reporter=self.reporter)
+        self.item = lost
+        self.assertEqual(self.post(self.reporter, 'mark-found').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.post(self.owner, 'claim').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.post(self.owner, 'unclaim').status_code, status.HTTP_200_OK)
+
+        lost.refresh_from_db()
+        self.assertEqual((lost.status, lost.claimed_by, lost.is_resolved), ('found', None, False))
+        self.assertIsNotNone(lost.date_occurred)
+        self.assertEqual(
+            list(lost.transitions.values_list('action', 'from_state', 'to_state', 'actor')),
+            [('mark_found', 'lost', 'found', self.reporter.pk), ('claim', 'found', 'claimed', self.owner.pk),
+             ('unclaim', 'claimed', 'found', self.owner.pk)]
+        )
+
+    def test_conflicts_are_409_and_strangers_cannot_unclaim(self):
+        self.assertEqual(self.post(self.owner, 'claim').status_code, status.HTTP_200_OK)
+        response = self.post(self.reporter, 'claim')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['detail'], 'This item has already been claimed.')
+        self.assertEqual(self.post(self.reporter, 'mark-found').status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.post(self.reporter, 'unclaim').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.item.transitions.count(), 1)
+
+    def test_transitions_write_only_their_columns(self):
+        # A stale copy saved meanwhile must not be overwritten by the claim
+        LostFoundItem.objects.filter(pk=self.item.pk).update(item_name='Navy umbrella')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.post(self.owner, 'claim').status_code, status.HTTP_200_OK)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.item_name, 'Navy umbrella')
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "lostfound_lostfounditem"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"item_name"', updates[0].split('WHERE')[0])
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+    THREADS = 8
+
+    def test_exactly_one_of_many_simultaneous_claims_wins(self):
+        reporter = User.objects.create_user(
+            email='reporter@example.com', name='Reporter', mobile='1234567890', password='testpass123'
+        )
+        claimants = [
+            User.objects.create_user(
+                email=f'claimant{i}@example.com', name=f'Claimant {i}', mobile=f'98765432{i:02d}',
+                password='testpass123'
+            )
+            for i in range(self.THREADS)
+        ]
+        item = LostFoundItem.objects.create(item_name='Laptop', status='found', reporter=reporter)
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+
+        def claim(user):
+            try:
+                snapshot = LostFoundItem.objects.get(pk=item.pk)
+                barrier.wait()
+                while True:
+                    try:
+                        apply_transition(snapshot, 'claim', user)
+                        outcomes.append(('claimed', user.pk))
+                    except TransitionConflict:
+                        outcomes.append(('conflict', user.pk))
+                    except OperationalError as error:
+                        # The in-memory test database reports lock contention at once
+                        # instead of waiting; the failed attempt was rolled back
+                        if 'locked' not in str(error):
+                            raise
+                        time.sleep(0.01)
+                        continue
+                    break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim, args=(user,)) for user in claimants]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        winners = [pk for outcome, pk in outcomes if outcome == 'claimed']
+        self.assertEqual(len(outcomes), self.THREADS)
+        self.assertEqual(len(winners), 1)
+        item.refresh_from_db()
+        self.assertEqual(item.claimed_by_id, winners[0])
+        self.assertEqual(list(item.transitions.values_list('actor', flat=True)), winners)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IMAGE_DERIVATIVE_WORKERS=0)
+class ArchiveTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.reporter = User.objects.create_user(
+            email='reporter@example.com', name='Reporter', mobile='1234567890', password='testpass123'
+        )
+        self.owner = User.objects.create_user(
+            email='owner@example.com', name='Owner', mobile='0987654321', password='testpass123'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.old = LostFoundItem.objects.create(
+                item_name='Old calculator', status='found', reporter=self.reporter,
+                image=make_photo('calculator.jpg', waves)
+            )
+        apply_transition(self.old, 'claim', self.owner)
+        self.recent = LostFoundItem.objects.create(
+            item_name='New calculator', status='found', reporter=self.reporter, is_resolved=True
+        )
+        self.open = LostFoundItem.objects.create(item_name='Open calculator', status='lost', reporter=self.reporter)
+        LostFoundItem.objects.filter(pk__in=[self.old.pk, self.open.pk]).update(
+            updated_at=timezone.now() - timedelta(days=400)
+        )
+
+    def test_command_moves_old_resolved_items_with_their_images(self):
+        self.old.refresh_from_db()
+        blobs = dict(MediaBlob.objects.values_list('name', 'refcount'))
+        call_command('archive_lostfound', stdout=io.StringIO())
+
+        self.assertEqual(
+            set(LostFoundItem.objects.values_list('pk', flat=True)), {self.recent.pk, self.open.pk}
+        )
+        archived = ArchivedLostFoundItem.objects.get(pk=self.old.pk)
+        self.assertEqual(
+            (archived.item_name, archived.claimed_by, archived.image.name, archived.derivatives),
+            ('Old calculator', self.owner, self.old.image.name, self.old.derivatives)
+        )
+        self.assertEqual([entry['action'] for entry in archived.history], ['claim'])
+        self.assertTrue(archived.image.storage.exists(archived.image.name))
+        self.assertEqual(dict(MediaBlob.objects.values_list('name', 'refcount')), blobs)
+
+    def test_listing_reads_the_archive_only_when_asked(self):
+        call_command('archive_lostfound', batch_size=1, stdout=io.StringIO())
+        url = reverse('lostfounditem-list')
+        live = [item['id'] for item in self.client.get(url).data['results']]
+        self.assertNotIn(str(self.old.pk), live)
+
+        response = self.client.get(url, {'archive': 'true', 'status': 'found'})
+        self.assertEqual([item['id'] for item in response.data['results']], [str(self.old.pk)])
+        self.assertEqual(response.data['results'][0]['history'][0]['to_state'], 'claimed')
+        detail = reverse('lostfounditem-detail', args=[self.old.pk])
+        self.assertEqual(self.client.get(detail).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(detail, {'archive': 'true'}).status_code, status.HTTP_200_OK)
+
+    def test_dry_run_changes_nothing(self):
+        out = io.StringIO()
+        call_command('archive_lostfound', dry_run=True, stdout=out)
+        self.assertIn('1 item(s) would be archived', out.getvalue())
+        self.assertFalse(ArchivedLostFoundItem.objects.exists())
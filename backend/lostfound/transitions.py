@@ -0,0 +1,109 @@
+"""
+State transitions of lost & found items.
+
+An item is lost or found, and claimed once its owner has it back:
+
+    lost --mark_found--> found --claim--> claimed (resolved)
+                 claimed --unclaim--> lost or found (open again)
+
+Each transition is checked against a snapshot of the item and written
+as one conditional UPDATE of the columns it changes, matching only if
+the item still has the snapshot's state. Two students claiming the same
+item at once both pass the check, but only one UPDATE matches; the other
+re-reads the item and gets a TransitionConflict. Every transition that
+takes effect is recorded in LostFoundTransition.
+"""
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.cache import bump_generation
+from .matching import index_item
+
+# Re-reads after a lost race before giving up
+MAX_ATTEMPTS = 3
+
+
+class TransitionConflict(Exception):
+    """The item's state does not allow the transition (e.g. it is already claimed)."""
+    def __init__(self, detail, forbidden=False):
+        super().__init__(detail)
+        self.detail = detail
+        # The actor may never do this, rather than the item being in the wrong state
+        self.forbidden = forbidden
+
+
+def state_of(item):
+    return 'claimed' if item.claimed_by_id else item.status
+
+
+def plan_mark_found(item, actor):
+    if item.status == item.FOUND:
+        raise TransitionConflict('Item is already marked as found.')
+    return {'status': item.FOUND, 'is_resolved': True}
+
+
+def plan_claim(item, actor):
+    if item.claimed_by_id:
+        raise TransitionConflict('This item has already been claimed.')
+    return {'claimed_by': actor, 'is_resolved': True}
+
+
+def plan_unclaim(item, actor):
+    if not item.claimed_by_id:
+        raise TransitionConflict('This item is not claimed by anyone.')
+    if item.claimed_by_id != actor.pk and not actor.is_staff:
+        raise TransitionConflict('You do not have permission to unclaim this item.', forbidden=True)
+    return {'claimed_by': None, 'is_resolved': False}
+
+
+PLANS = {
+    'mark_found': plan_mark_found,
+    'claim': plan_claim,
+    'unclaim': plan_unclaim,
+}
+
+# The columns whose snapshot an UPDATE must still match
+STATE_FIELDS = ('status', 'claimed_by_id', 'is_resolved')
+
+
+def apply_transition(item, action, actor):
+    """
+    Move item through ``action`` on behalf of actor, updating item in place.
+    Raises TransitionConflict when its current state does not allow it, and
+    LostFoundItem.DoesNotExist when it was deleted meanwhile.
+    """
+    from .models import LostFoundItem, LostFoundTransition
+
+    manager = LostFoundItem.objects
+    for _ in range(MAX_ATTEMPTS):
+        changes = PLANS[action](item, actor)
+        now = timezone.now()
+        columns = dict(changes, updated_at=now)
+        if changes.get('status') == LostFoundItem.FOUND:
+            # What save() fills in for found items; kept when already set
+            columns['date_occurred'] = Coalesce('date_occurred', Value(now))
+        # claimed_by_id=None matches IS NULL
+        expected = {field: getattr(item, field) for field in STATE_FIELDS}
+
+        with transaction.atomic():
+            if manager.filter(pk=item.pk, **expected).update(**columns):
+                before = state_of(item)
+                for field, value in changes.items():
+                    setattr(item, field, value)
+                item.updated_at = now
+                if 'date_occurred' in columns:
+                    item.date_occurred = item.date_occurred or now
+                LostFoundTransition.objects.create(
+                    item=item, action=action, actor=actor, from_state=before, to_state=state_of(item)
+                )
+                # update() skips post_save: keep the matching index and cached responses current
+                index_item(item)
+                break
+        # Someone changed the item since it was read; judge the transition again
+        for field, value in manager.values(*STATE_FIELDS).get(pk=item.pk).items():
+            setattr(item, field, value)
+    else:
+        raise TransitionConflict('The item changed while this request was handled; try again.')
+    bump_generation(LostFoundItem)
+    return item
@@ -1,21 +1,81 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, parser_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import LostFoundItem
-from .serializers import LostFoundItemSerializer, LostFoundItemUpdateSerializer
+from django.conf import settings
+from django.db.models import Case, FloatField, Value, When
+from django.http import Http404
+from .models import ArchivedLostFoundItem, LostFoundItem
+from .serializers import (
+    ArchivedLostFoundItemSerializer,
+    LostFoundItemSerializer,
+    LostFoundItemUpdateSerializer,
+)
 from accounts.permissions import IsOwnerOrReadOnly
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from .fuzzy import fuzzy_ranking, similar_terms
+from .matching import find_matches
+from .similarity import similar_items
+from .transitions import TransitionConflict, apply_transition
 
-class LostFoundItemViewSet(viewsets.ModelViewSet):
-    queryset = LostFoundItem.objects.all().order_by('-date_reported')
+class LostFoundItemViewSet(CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = LostFoundItem.objects.select_related(
+        'reporter', 'claimed_by'
+    ).order_by('-date_reported')
     serializer_class = LostFoundItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['status', 'is_resolved', 'category']
+    filterset_fields = ['status', 'is_resolved', 'category', 'location_place']
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
+    cursor_ordering = '-date_reported'
+    cache_dependencies = ['lostfound.LostFoundItem', 'lostfound.ArchivedLostFoundItem', 'accounts.User']
+
+    def is_archive_request(self):
+        """?archive=true on list/retrieve reads archived items instead of live ones."""
+        return (
+            self.action in ['list', 'retrieve']
+            and self.request.query_params.get('archive', '').lower() in ['1', 'true']
+        )
+
+    def get_queryset(self):
+        if self.is_archive_request():
+            return ArchivedLostFoundItem.objects.select_related(
+                'reporter', 'claimed_by'
+            ).order_by('-date_reported')
+        return super().get_queryset()
+
+    def filter_queryset(self, queryset):
+        """?fuzzy=<text> keeps the items whose name, brand or colour is like text, most alike first."""
+        queryset = super().filter_queryset(queryset)
+        fuzzy = self.request.query_params.get('fuzzy', '').strip()
+        if not fuzzy or self.action != 'list' or self.is_archive_request():
+            return queryset
+        if self.paginator.keyset_requested(self.request):
+            # Keyset pages follow cursor_ordering, which would undo the ranking
+            raise ValidationError({'pagination': ['Fuzzy results are ranked; page through them with ?page=.']})
+        # The conditional GET check filters the same queryset before list() does
+        if not hasattr(self, 'fuzzy_ranked'):
+            terms = similar_terms(fuzzy, settings.LOSTFOUND_FUZZY_THRESHOLD)
+            self.fuzzy_ranked = fuzzy_ranking(queryset, terms, settings.LOSTFOUND_FUZZY_LIMIT)
+        similarity = Case(
+            *[When(pk=item_id, then=Value(score)) for item_id, score in self.fuzzy_ranked],
+            default=Value(0.0), output_field=FloatField()
+        )
+        # The ranked ids already passed the other filters, so they are looked up
+        # by primary key alone; with the filters repeated SQLite may scan one of
+        # their indexes instead
+        return self.get_queryset().filter(pk__in=[item_id for item_id, _ in self.fuzzy_ranked]).annotate(
+            similarity=similarity
+        ).order_by('-similarity', '-date_reported')
 
     def get_serializer_class(self):
+        if self.is_archive_request():
+            return ArchivedLostFoundItemSerializer
         if self.action in ['update', 'partial_update']:
             return LostFoundItemUpdateSerializer
         return LostFoundItemSerializer
@@ -23,56 +83,80 @@ class LostFoundItemViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(reporter=self.request.user)
 
-    @action(detail=True, methods=['post'])
-    def mark_found(self, request, pk=None):
+    def transition(self, request, action):
         item = self.get_object()
-        if item.status == 'found':
+        try:
+            apply_transition(item, action, request.user)
+        except TransitionConflict as conflict:
             return Response(
-                {'detail': 'Item is already marked as found.'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'detail': conflict.detail},
+                status=status.HTTP_403_FORBIDDEN if conflict.forbidden else status.HTTP_409_CONFLICT
             )
-        
-        item.status = 'found'
-        item.is_resolved = True
-        item.save()
-        
+        except LostFoundItem.DoesNotExist:
+            raise Http404
         serializer = self.get_serializer(item)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
+    def mark_found(self, request, pk=None):
+        return self.transition(request, 'mark_found')
+
+    # Anyone signed in may claim an item, not only its reporter
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def claim(self, request, pk=None):
+        return self.transition(request, 'claim')
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def unclaim(self, request, pk=None):
+        return self.transition(request, 'unclaim')
+
+    @action(detail=True, methods=['get'], url_path='similar-images')
+    def similar_images(self, request, pk=None):
+        """Open items of the opposite status whose photos look like this one's."""
         item = self.get_object()
-        if item.claimed_by:
+        try:
+            radius = int(request.query_params.get('radius', settings.LOSTFOUND_SIMILAR_IMAGES_RADIUS))
+        except ValueError:
+            radius = -1
+        if not 0 <= radius <= settings.LOSTFOUND_SIMILAR_IMAGES_MAX_RADIUS:
             return Response(
-                {'detail': 'This item has already been claimed.'},
+                {'radius': [f'Must be a whole number from 0 to {settings.LOSTFOUND_SIMILAR_IMAGES_MAX_RADIUS}.']},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        item.claimed_by = request.user
-        item.is_resolved = True
-        item.save()
-        
-        serializer = self.get_serializer(item)
-        return Response(serializer.data)
 
-    @action(detail=True, methods=['post'])
-    def unclaim(self, request, pk=None):
-        item = self.get_object()
-        if not item.claimed_by:
+        matches = similar_items(item, radius)
+        if matches is None:
             return Response(
-                {'detail': 'This item is not claimed by anyone.'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'detail': 'This item has no photo to compare yet.'},
+                status=status.HTTP_404_NOT_FOUND
             )
-        
-        if item.claimed_by != request.user and not request.user.is_staff:
+        context = self.get_serializer_context()
+        return Response({
+            'radius': radius,
+            'results': [
+                {'distance': distance, 'item': LostFoundItemSerializer(match, context=context).data}
+                for distance, match in matches
+            ],
+        })
+
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        """Open items of the opposite status that best match this one's description."""
+        item = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', settings.LOSTFOUND_MATCHES_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= settings.LOSTFOUND_MATCHES_MAX_LIMIT:
             return Response(
-                {'detail': 'You do not have permission to unclaim this item.'},
-                status=status.HTTP_403_FORBIDDEN
+                {'limit': [f'Must be a whole number from 1 to {settings.LOSTFOUND_MATCHES_MAX_LIMIT}.']},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
-        item.claimed_by = None
-        item.is_resolved = False
-        item.save()
-        
-        serializer = self.get_serializer(item)
-        return Response(serializer.data)
+
+        context = self.get_serializer_context()
+        return Response({
+            'results': [
+                {'score': score, 'reasons': reasons, 'item': LostFoundItemSerializer(match, context=context).data}
+                for score, reasons, match in find_matches(item, limit)
+            ],
+        })
@@ -13,6 +13,7 @@ class EventAdmin(admin.ModelAdmin):
     )
     search_fields = ('title', 'description', 'location', 'organizer__email', 'organizer__name')
     ordering = ('-start_datetime',)
+    readonly_fields = ('primary_image',)
 
 
 @admin.register(EventImage)
@@ -13,9 +13,10 @@ from .admin_serializers import (
     AdminEventRegistrationSerializer
 )
 from accounts.permissions import IsAdminOrReadOnly
+from core.conditional import ConditionalGetMixin
 from .permissions import IsAdminOrganizerOrReadOnly
 
-class AdminEventViewSet(viewsets.ModelViewSet):
+class AdminEventViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Admin-only viewset for managing events with additional admin features.
     """
@@ -29,13 +30,17 @@ class AdminEventViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'location', 'organizer__name', 'organizer__email']
     ordering_fields = ['start_datetime', 'end_datetime', 'created_at', 'updated_at']
     ordering = ['-start_datetime']
+    cache_dependencies = [
+        'noticeboard.Event', 'noticeboard.EventImage', 'noticeboard.EventComment',
+        'noticeboard.EventRegistration', 'accounts.User',
+    ]
 
     def get_queryset(self):
-        queryset = Event.objects.all().prefetch_related(
-            'images', 'comments', 'registrations'
-        ).annotate(
-            registration_count=Count('registrations')
-        )
+        queryset = Event.objects.select_related('organizer')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(
+                'images', 'comments__user', 'registrations__user'
+            )
 
         # Filter by approval status
         is_approved = self.request.query_params.get('is_approved')
@@ -83,19 +88,23 @@ class AdminEventViewSet(viewsets.ModelViewSet):
     def statistics(self, request, pk=None):
         """Get statistics for an event."""
         event = self.get_object()
+        registrations = event.registrations.aggregate(
+            total=Count('id'),
+            attended=Count('id', filter=Q(attended=True))
+        )
         return Response({
-            'total_registrations': event.registrations.count(),
-            'attended_registrations': event.registrations.filter(attended=True).count(),
+            'total_registrations': registrations['total'],
+            'attended_registrations': registrations['attended'],
             'attendance_rate': (
-                event.registrations.filter(attended=True).count() / 
-                event.registrations.count() * 100 if event.registrations.exists() else 0
+                registrations['attended'] / registrations['total'] * 100
+                if registrations['total'] else 0
             ),
             'comments_count': event.comments.count(),
             'images_count': event.images.count(),
         })
 
 
-class AdminEventCommentViewSet(viewsets.ModelViewSet):
+class AdminEventCommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Admin-only viewset for managing event comments.
     """
@@ -105,12 +114,13 @@ class AdminEventCommentViewSet(viewsets.ModelViewSet):
     search_fields = ['content', 'user__name', 'user__email']
     ordering_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
+    cache_dependencies = ['noticeboard.EventComment', 'noticeboard.Event', 'accounts.User']
 
     def get_queryset(self):
         return EventComment.objects.all().select_related('user', 'event')
 
 
-class AdminEventRegistrationViewSet(viewsets.ModelViewSet):
+class AdminEventRegistrationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Admin-only viewset for managing event registrations.
     """
@@ -121,6 +131,8 @@ class AdminEventRegistrationViewSet(viewsets.ModelViewSet):
     search_fields = ['user__name', 'user__email', 'notes']
     ordering_fields = ['registration_date', 'user__name']
     ordering = ['-registration_date']
+    last_modified_field = 'registration_date'
+    cache_dependencies = ['noticeboard.EventRegistration', 'noticeboard.Event', 'accounts.User']
 
     def get_queryset(self):
         return EventRegistration.objects.all().select_related('user', 'event')
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_primary_image(apps, schema_editor):
+    """Point every Event at its primary image, picking the oldest image when none is flagged."""
+    Event = apps.get_model('noticeboard', 'Event')
+    EventImage = apps.get_model('noticeboard', 'EventImage')
+    images = EventImage.objects.order_by('event_id', '-is_primary', 'uploaded_at', 'pk')
+    current = None
+    for image_id, event_id in images.values_list('pk', 'event_id'):
+        if event_id == current:
+            continue
+        current = event_id
+        Event.objects.filter(pk=event_id).update(primary_image_id=image_id)
+        EventImage.objects.filter(event_id=event_id).exclude(pk=image_id).update(is_primary=False)
+        EventImage.objects.filter(pk=image_id).update(is_primary=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('noticeboard', '0002_alter_eventimage_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='noticeboard.eventimage'),
+        ),
+        migrations.RunPython(backfill_primary_image, migrations.RunPython.noop),
+    ]
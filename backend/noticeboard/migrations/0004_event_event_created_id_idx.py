@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('noticeboard', '0003_event_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['created_at', 'id'], name='event_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('noticeboard', '0004_event_event_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['start_datetime'], name='event_approved_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['start_datetime'], name='event_pending_start_idx'),
+        ),
+    ]
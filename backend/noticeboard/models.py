@@ -2,6 +2,7 @@ import uuid
 from django.db import models
 from django.utils import timezone
 from accounts.models import User
+from core.models import ImageDerivativesMixin, PrimaryImageMixin
 
 class Event(models.Model):
     EVENT_TYPES = [
@@ -21,6 +22,11 @@ class Event(models.Model):
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
     location = models.CharField(max_length=200)
+    # The gazetteer place the location text resolves to (see locations/gazetteer.py)
+    location_place = models.ForeignKey(
+        'locations.Place', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='events'
+    )
     location_url = models.URLField(blank=True, null=True)
     organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='organized_events')
     is_online = models.BooleanField(default=False)
@@ -31,6 +37,13 @@ class Event(models.Model):
     registration_required = models.BooleanField(default=False)
     registration_deadline = models.DateTimeField(null=True, blank=True)
     is_approved = models.BooleanField(default=False)
+    primary_image = models.ForeignKey(
+        'EventImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -38,6 +51,19 @@ class Event(models.Model):
         ordering = ['start_datetime']
         verbose_name = 'Event'
         verbose_name_plural = 'Events'
+        indexes = [
+            # Keyset pagination walks (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='event_created_id_idx'),
+            # Approved and pending events by start time (see advise_indexes)
+            models.Index(
+                fields=['start_datetime'], name='event_approved_start_idx',
+                condition=models.Q(is_approved=True)
+            ),
+            models.Index(
+                fields=['start_datetime'], name='event_pending_start_idx',
+                condition=models.Q(is_approved=False)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.get_event_type_display()} ({self.start_datetime.strftime('%b %d, %Y')})"
@@ -51,7 +77,9 @@ class Event(models.Model):
         now = timezone.now()
         return self.start_datetime <= now <= self.end_datetime
 
-class EventImage(models.Model):
+class EventImage(PrimaryImageMixin, ImageDerivativesMixin):
+    parent_field = 'event'
+
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='events/')
     is_primary = models.BooleanField(default=False)
@@ -62,12 +90,6 @@ class EventImage(models.Model):
     
     def __str__(self):
         return f"Image for {self.event.title}"
-    
-    def save(self, *args, **kwargs):
-        # If this is the first image for the event, set it as primary
-        if not self.pk and not self.event.images.exists():
-            self.is_primary = True
-        super().save(*args, **kwargs)
 
 class EventRegistration(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
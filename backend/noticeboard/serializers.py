@@ -1,13 +1,16 @@
 from rest_framework import serializers
 from .models import Event, EventComment, EventRegistration, EventImage
 from accounts.serializers import UserSerializer
+from core.images import ImageSizesField, ImageSrcsetField
 
 class EventImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    sizes = ImageSizesField()
+    srcset = ImageSrcsetField()
     
     class Meta:
         model = EventImage
-        fields = ['id', 'image', 'is_primary', 'uploaded_at']
+        fields = ['id', 'image', 'sizes', 'srcset', 'is_primary', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at']
     
     def get_image(self, obj):
@@ -57,7 +60,7 @@ class EventSerializer(serializers.ModelSerializer):
         model = Event
         fields = [
             'id', 'title', 'description', 'event_type', 'start_datetime', 'end_datetime',
-            'location', 'location_url', 'organizer', 'is_online', 'meeting_link',
+            'location', 'location_place', 'location_url', 'organizer', 'is_online', 'meeting_link',
             'max_participants', 'is_free', 'price', 'registration_required',
             'registration_deadline', 'is_approved', 'created_at', 'updated_at',
             'images', 'comments', 'registrations', 'registrations_count',
@@ -73,11 +76,15 @@ class EventSerializer(serializers.ModelSerializer):
     
     def get_registrations_count(self, obj):
         """Get the count of registrations for this event."""
+        # Use the annotated count from EventViewSet.get_queryset when available
+        count = getattr(obj, 'registrations_count', None)
+        if count is not None:
+            return count
         return obj.registrations.count()
     
     def get_primary_image(self, obj):
         """Get the URL of the primary image if it exists."""
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = obj.primary_image
         if primary_image and primary_image.image:
             request = self.context.get('request')
             if request is not None:
@@ -111,12 +118,22 @@ class EventSerializer(serializers.ModelSerializer):
         # Update the event
         event = super().update(instance, validated_data)
         
-        # Add new image if provided
+        # Add new image if provided; it replaces the current primary image
         if image_file:
             from .models import EventImage
-            # Mark existing primary image as not primary
-            event.images.filter(is_primary=True).update(is_primary=False)
-            # Create new primary image
             EventImage.objects.create(event=event, image=image_file, is_primary=True)
             
         return event
+
+
+class EventListSerializer(EventSerializer):
+    """
+    Serializer for event listings.
+    Leaves out the nested comments and registrations, which are only
+    rendered on the event detail page.
+    """
+    class Meta(EventSerializer.Meta):
+        fields = [
+            field for field in EventSerializer.Meta.fields
+            if field not in ('comments', 'registrations')
+        ]
@@ -1,3 +1,73 @@
-from django.test import TestCase
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from .models import Event, EventComment, EventRegistration
 
-# Create your tests here.
+User = get_user_model()
+
+class EventListTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            email='organizer@example.com',
+            name='Organizer',
+            mobile='1234567890',
+            password='testpass123',
+            is_staff=True
+        )
+        self.attendee = User.objects.create_user(
+            email='attendee@example.com',
+            name='Attendee',
+            mobile='0987654321',
+            password='testpass123'
+        )
+        self.client = APIClient()
+
+    def create_events(self, count):
+        start = timezone.now() + timedelta(days=7)
+        for i in range(count):
+            event = Event.objects.create(
+                title=f'Event {i}',
+                description='Test Description',
+                start_datetime=start,
+                end_datetime=start + timedelta(hours=2),
+                location='Main Hall',
+                organizer=self.organizer,
+                is_approved=True
+            )
+            EventRegistration.objects.create(event=event, user=self.attendee)
+            EventComment.objects.create(event=event, user=self.attendee, content='See you there')
+
+    def test_list_query_count_does_not_grow_with_page(self):
+        url = reverse('event-list')
+        # Page count, page rows and images; the ETag comes from the rows served
+        self.create_events(2)
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+        self.create_events(8)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_list_omits_comments_and_registrations(self):
+        self.create_events(1)
+        response = self.client.get(reverse('event-list'))
+        event = response.data['results'][0]
+        self.assertNotIn('comments', event)
+        self.assertNotIn('registrations', event)
+        self.assertEqual(event['registrations_count'], 1)
+        self.assertEqual(event['organizer']['email'], 'organizer@example.com')
+        self.assertIsNone(event['primary_image'])
+
+    def test_detail_includes_comments_and_registrations(self):
+        self.create_events(1)
+        event = Event.objects.get()
+        response = self.client.get(reverse('event-detail', args=[event.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['comments']), 1)
+        self.assertEqual(len(response.data['registrations']), 1)
+        self.assertEqual(response.data['registrations_count'], 1)
@@ -1,23 +1,57 @@
 from rest_framework import viewsets, permissions
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db import models
-from .models import Event, EventComment, EventRegistration
-from .serializers import EventSerializer, EventCommentSerializer, EventRegistrationSerializer
+from .models import Event, EventComment, EventImage, EventRegistration
+from .serializers import (
+    EventSerializer,
+    EventListSerializer,
+    EventCommentSerializer,
+    EventImageSerializer,
+    EventRegistrationSerializer
+)
 from accounts.permissions import IsOwnerOrReadOnly
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.galleries import GalleryUploadMixin
+from core.pagination import KeysetPagination
+from search.index import match_filter
 from .permissions import IsAdminOrganizerOrReadOnly
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(CachedResponseMixin, ConditionalGetMixin, GalleryUploadMixin, viewsets.ModelViewSet):
     serializer_class = EventSerializer
     # Read is open to everyone. Writes are limited to staff organizers (or superuser)
     permission_classes = [IsAdminOrganizerOrReadOnly]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
+    cursor_ordering = '-created_at'
+    cache_dependencies = [
+        'noticeboard.Event', 'noticeboard.EventImage', 'noticeboard.EventComment',
+        'noticeboard.EventRegistration', 'accounts.User',
+    ]
+    gallery_image_model = EventImage
+    gallery_image_serializer = EventImageSerializer
     
     def get_queryset(self):
-        queryset = Event.objects.all()
+        # Load the organizer and gallery up front and count registrations in SQL
+        # so a page of events costs the same number of queries at any size
+        queryset = Event.objects.select_related('organizer', 'primary_image').prefetch_related(
+            'images'
+        ).annotate(
+            registrations_count=models.Count('registrations')
+        )
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('comments__user', 'registrations__user')
+        return self.filter_events(queryset)
 
+    def get_conditional_queryset(self):
+        # Without the registrations_count annotation, so revalidating needs no GROUP BY
+        return self.filter_events(Event.objects.all())
+
+    def filter_events(self, queryset):
         # Filter by approval status - show approved events by default
         # Staff users can see all events
         # Regular users (non-staff) and anonymous users can only see APPROVED events created by STAFF
@@ -31,6 +65,7 @@ class EventViewSet(viewsets.ModelViewSet):
         event_type = self.request.query_params.get('event_type')
         is_online = self.request.query_params.get('is_online')
         search = self.request.query_params.get('search')
+        location_place = self.request.query_params.get('location_place')
         
         if is_upcoming == 'true':
             queryset = queryset.filter(start_datetime__gt=timezone.now())
@@ -39,17 +74,30 @@ class EventViewSet(viewsets.ModelViewSet):
             
         if event_type:
             queryset = queryset.filter(event_type=event_type)
+
+        if location_place:
+            if not location_place.isdigit():
+                # The same answer the lost & found and roommate filtersets give
+                raise ValidationError({'location_place': [
+                    'Select a valid choice. That choice is not one of the available choices.'
+                ]})
+            # Indexed equality on the gazetteer place instead of LIKE on the text
+            queryset = queryset.filter(location_place_id=location_place)
             
         if is_online is not None:
             queryset = queryset.filter(is_online=is_online.lower() == 'true')
             
         if search:
-            queryset = queryset.filter(
-                models.Q(title__icontains=search) |
-                models.Q(description__icontains=search)
-            )
+            # Words of the title or description, matched by prefix through the
+            # full-text index instead of LIKE scans
+            queryset = queryset.filter(match_filter('event', search, columns=['title', 'body']))
         
         return queryset.order_by('-created_at')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return EventListSerializer
+        return EventSerializer
     
     def get_serializer_context(self):
         """
@@ -85,7 +133,7 @@ class EventViewSet(viewsets.ModelViewSet):
         """List or add comments for this event."""
         event = self.get_object()
         if request.method.lower() == 'get':
-            qs = event.comments.all().order_by('created_at')
+            qs = event.comments.select_related('user').order_by('created_at')
             serializer = EventCommentSerializer(qs, many=True, context={'request': request})
             return Response(serializer.data)
 
@@ -98,18 +146,21 @@ class EventViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
-class EventCommentViewSet(viewsets.ModelViewSet):
-    queryset = EventComment.objects.all()
+class EventCommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = EventComment.objects.select_related('user')
     serializer_class = EventCommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    cache_dependencies = ['noticeboard.EventComment', 'accounts.User']
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class EventRegistrationViewSet(viewsets.ModelViewSet):
-    queryset = EventRegistration.objects.all()
+class EventRegistrationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = EventRegistration.objects.select_related('user')
     serializer_class = EventRegistrationSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    last_modified_field = 'registration_date'
+    cache_dependencies = ['noticeboard.EventRegistration', 'accounts.User']
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -10,6 +10,7 @@ class RoommatePostAdmin(admin.ModelAdmin):
     list_filter = ('is_active', 'available_from', 'room_type', 'preferred_gender')
     search_fields = ('title', 'description', 'location', 'user__email', 'user__name')
     ordering = ('-created_at',)
+    readonly_fields = ('primary_image',)
 
 
 @admin.register(RoommateImage)
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_primary_image(apps, schema_editor):
+    """Point every RoommatePost at its primary image, picking the oldest image when none is flagged."""
+    RoommatePost = apps.get_model('roommate', 'RoommatePost')
+    RoommateImage = apps.get_model('roommate', 'RoommateImage')
+    images = RoommateImage.objects.order_by('post_id', '-is_primary', 'uploaded_at', 'pk')
+    current = None
+    for image_id, post_id in images.values_list('pk', 'post_id'):
+        if post_id == current:
+            continue
+        current = post_id
+        RoommatePost.objects.filter(pk=post_id).update(primary_image_id=image_id)
+        RoommateImage.objects.filter(post_id=post_id).exclude(pk=image_id).update(is_primary=False)
+        RoommateImage.objects.filter(pk=image_id).update(is_primary=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roommate', '0002_alter_roommateimage_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roommatepost',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='roommate.roommateimage'),
+        ),
+        migrations.RunPython(backfill_primary_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roommate', '0003_roommatepost_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roommatepost',
+            index=models.Index(fields=['created_at', 'id'], name='roommatepost_created_id_idx'),
+        ),
+    ]
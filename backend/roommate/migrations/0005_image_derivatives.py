@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-17 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roommate', '0004_roommatepost_roommatepost_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roommateimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-17 05:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+        ('roommate', '0005_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roommatepost',
+            name='location_place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='roommate_posts', to='locations.place'),
+        ),
+    ]
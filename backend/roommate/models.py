@@ -2,6 +2,7 @@ import uuid
 from django.db import models
 from django.utils import timezone
 from accounts.models import User
+from core.models import ImageDerivativesMixin, PrimaryImageMixin
 
 class RoommatePost(models.Model):
     GENDER_CHOICES = [
@@ -22,6 +23,11 @@ class RoommatePost(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     location = models.CharField(max_length=200)
+    # The gazetteer place the location text resolves to (see locations/gazetteer.py)
+    location_place = models.ForeignKey(
+        'locations.Place', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='roommate_posts'
+    )
     rent = models.DecimalField(max_digits=10, decimal_places=2)
     available_from = models.DateField()
     lease_duration = models.PositiveIntegerField(help_text="Lease duration in months")
@@ -45,6 +51,13 @@ class RoommatePost(models.Model):
     contact_number = models.CharField(max_length=15)
     contact_email = models.EmailField()
     is_active = models.BooleanField(default=True)
+    primary_image = models.ForeignKey(
+        'RoommateImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -52,6 +65,10 @@ class RoommatePost(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Roommate Post'
         verbose_name_plural = 'Roommate Posts'
+        indexes = [
+            # Keyset pagination walks (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='roommatepost_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.location} (${self.rent}/month)"
@@ -61,7 +78,9 @@ class RoommatePost(models.Model):
             self.contact_email = self.user.email
         super().save(*args, **kwargs)
 
-class RoommateImage(models.Model):
+class RoommateImage(PrimaryImageMixin, ImageDerivativesMixin):
+    parent_field = 'post'
+
     post = models.ForeignKey(RoommatePost, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='roommate/')
     is_primary = models.BooleanField(default=False)
@@ -72,9 +91,3 @@ class RoommateImage(models.Model):
 
     def __str__(self):
         return f"Image for {self.post.title}"
-    
-    def save(self, *args, **kwargs):
-        # If this is the first image for the post, set it as primary
-        if not self.pk and not self.post.images.exists():
-            self.is_primary = True
-        super().save(*args, **kwargs)
@@ -1,11 +1,15 @@
 from rest_framework import serializers
 from .models import RoommatePost, RoommateImage
 from accounts.serializers import UserSerializer
+from core.images import ImageSizesField, ImageSrcsetField
 
 class RoommateImageSerializer(serializers.ModelSerializer):
+    sizes = ImageSizesField()
+    srcset = ImageSrcsetField()
+
     class Meta:
         model = RoommateImage
-        fields = ['id', 'image', 'is_primary', 'uploaded_at']
+        fields = ['id', 'image', 'sizes', 'srcset', 'is_primary', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at', 'is_primary']
 
 class RoommatePostSerializer(serializers.ModelSerializer):
@@ -25,7 +29,7 @@ class RoommatePostSerializer(serializers.ModelSerializer):
     class Meta:
         model = RoommatePost
         fields = [
-            'id', 'user', 'title', 'description', 'location', 'rent', 'available_from',
+            'id', 'user', 'title', 'description', 'location', 'location_place', 'rent', 'available_from',
             'lease_duration', 'room_type', 'preferred_gender', 'current_occupants',
             'total_occupants', 'has_furniture', 'has_parking', 'has_laundry',
             'has_kitchen', 'has_wifi', 'is_pets_allowed', 'is_smoking_allowed',
@@ -40,7 +44,7 @@ class RoommatePostSerializer(serializers.ModelSerializer):
     
     def get_primary_image(self, obj):
         """Get the URL of the primary image if it exists."""
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = obj.primary_image
         if primary_image and primary_image.image:
             request = self.context.get('request')
             if request is not None:
@@ -72,11 +76,8 @@ class RoommatePostSerializer(serializers.ModelSerializer):
         # Update the post
         post = super().update(instance, validated_data)
         
-        # Add new image if provided
+        # Add new image if provided; it replaces the current primary image
         if image_file:
-            # Mark existing primary image as not primary
-            post.images.filter(is_primary=True).update(is_primary=False)
-            # Create new primary image
             RoommateImage.objects.create(post=post, image=image_file, is_primary=True)
             
         return post
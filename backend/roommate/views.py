@@ -1,14 +1,28 @@
 from rest_framework import viewsets, permissions
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import RoommatePost
-from .serializers import RoommatePostSerializer
+from django_filters.rest_framework import DjangoFilterBackend
+from .models import RoommatePost, RoommateImage
+from .serializers import RoommatePostSerializer, RoommateImageSerializer
 from accounts.permissions import IsOwnerOrReadOnly
+from core.cache import CachedResponseMixin
+from core.conditional import ConditionalGetMixin
+from core.galleries import GalleryUploadMixin
+from core.pagination import KeysetPagination
 
-class RoommatePostViewSet(viewsets.ModelViewSet):
-    queryset = RoommatePost.objects.all()
+class RoommatePostViewSet(CachedResponseMixin, ConditionalGetMixin, GalleryUploadMixin, viewsets.ModelViewSet):
+    queryset = RoommatePost.objects.select_related(
+        'user', 'primary_image'
+    ).prefetch_related('images')
     serializer_class = RoommatePostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['is_active', 'location_place']
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
+    cursor_ordering = '-created_at'
+    cache_dependencies = ['roommate.RoommatePost', 'roommate.RoommateImage', 'accounts.User']
+    gallery_image_model = RoommateImage
+    gallery_image_serializer = RoommateImageSerializer
     
     def get_serializer_context(self):
         """
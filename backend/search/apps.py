@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from .index import SEARCHABLE_TYPES
+        from .signals import refresh_event_visibility, remove_from_index, update_index
+
+        for doc_type, searchable in SEARCHABLE_TYPES.items():
+            post_save.connect(update_index, sender=searchable.model, dispatch_uid=f'search_update_{doc_type}')
+            post_delete.connect(remove_from_index, sender=searchable.model, dispatch_uid=f'search_remove_{doc_type}')
+        # Whether non-staff may see an event depends on its organizer being staff
+        post_save.connect(refresh_event_visibility, sender=get_user_model(), dispatch_uid='search_event_visibility')
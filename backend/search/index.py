@@ -0,0 +1,258 @@
+"""
+Cross-module full-text search on an SQLite FTS5 index.
+
+Every searchable object has a SearchDocument row and an FTS5 row with the
+same rowid holding three weighted columns: title, meta (author, ISBN,
+location, brand...) and body (the free-text description). Signals keep
+both in sync on save/delete; rebuild_index() repopulates them from scratch
+for rows written without signals (bulk_create, queryset.update()).
+"""
+import html
+import re
+from django.apps import apps
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from .models import SearchDocument
+
+FTS_TABLE = 'search_fts'
+DOCUMENT_TABLE = SearchDocument._meta.db_table
+
+# bm25 weights for the title, meta and body columns
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0)
+MAX_TERMS = 8
+
+# Markers FTS5 wraps around matches; swapped for <mark> after HTML escaping
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+TERM_RE = re.compile(r'\w+')
+
+
+class SearchableType:
+    """How one model is turned into a search document."""
+    def __init__(self, model, title, meta, body, detail_url_name, related=(), is_public=None):
+        self.model_label = model
+        self.title = title
+        self.meta = meta
+        self.body = body
+        self.detail_url_name = detail_url_name
+        self.related = related
+        self._is_public = is_public
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def queryset(self):
+        return self.model._default_manager.select_related(*self.related).order_by()
+
+    def columns(self, instance):
+        def join(fields):
+            return ' '.join(str(value) for value in (getattr(instance, f) for f in fields) if value)
+        return getattr(instance, self.title) or '', join(self.meta), join(self.body)
+
+    def is_public(self, instance):
+        return self._is_public(instance) if self._is_public else True
+
+
+SEARCHABLE_TYPES = {
+    'book': SearchableType(
+        'bookbank.BookPost', title='title',
+        meta=('author', 'isbn', 'course_code', 'department'), body=('description',),
+        detail_url_name='book-detail',
+    ),
+    'event': SearchableType(
+        'noticeboard.Event', title='title',
+        meta=('location', 'event_type'), body=('description',),
+        detail_url_name='event-detail', related=('organizer',),
+        # Mirrors EventViewSet: non-staff only see approved events by staff organizers
+        is_public=lambda event: event.is_approved and event.organizer.is_staff,
+    ),
+    'lostfound': SearchableType(
+        'lostfound.LostFoundItem', title='item_name',
+        meta=('brand', 'color', 'location', 'category'), body=('description',),
+        detail_url_name='lostfounditem-detail',
+    ),
+    'roommate': SearchableType(
+        'roommate.RoommatePost', title='title',
+        meta=('location', 'room_type', 'university'), body=('description',),
+        detail_url_name='roommate-post-detail',
+    ),
+}
+
+
+def index_available():
+    """FTS5 is SQLite-only; elsewhere the search migration creates no index."""
+    return connection.vendor == 'sqlite'
+
+
+def doc_type_for_model(model):
+    for doc_type, searchable in SEARCHABLE_TYPES.items():
+        if searchable.model is model:
+            return doc_type
+    return None
+
+
+def index_instance(instance):
+    doc_type = doc_type_for_model(type(instance))
+    searchable = SEARCHABLE_TYPES[doc_type]
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            doc_type=doc_type, object_id=str(instance.pk),
+            defaults={'is_public': searchable.is_public(instance)}
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, title, meta, body) VALUES (%s, %s, %s, %s)',
+                [document.pk, *searchable.columns(instance)]
+            )
+
+
+def remove_instance(instance):
+    doc_type = doc_type_for_model(type(instance))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                f'(SELECT id FROM {DOCUMENT_TABLE} WHERE doc_type = %s AND object_id = %s)',
+                [doc_type, str(instance.pk)]
+            )
+        SearchDocument.objects.filter(doc_type=doc_type, object_id=str(instance.pk)).delete()
+
+
+def index_created(instances):
+    """Index objects of one type that were just bulk inserted, without signals."""
+    if not instances or not index_available():
+        return
+    doc_type = doc_type_for_model(type(instances[0]))
+    with transaction.atomic(), connection.cursor() as cursor:
+        _insert_batch(cursor, doc_type, SEARCHABLE_TYPES[doc_type], instances)
+
+
+def rebuild_index(doc_types=None, batch_size=2000, log=None):
+    """Drop and re-create the documents of the given types (all by default)."""
+    doc_types = doc_types or list(SEARCHABLE_TYPES)
+    counts = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+            f'(SELECT id FROM {DOCUMENT_TABLE} WHERE doc_type IN ({", ".join(["%s"] * len(doc_types))}))',
+            doc_types
+        )
+        SearchDocument.objects.filter(doc_type__in=doc_types).delete()
+
+        for doc_type in doc_types:
+            searchable = SEARCHABLE_TYPES[doc_type]
+            counts[doc_type] = 0
+            batch = []
+            for instance in searchable.queryset().iterator(chunk_size=batch_size):
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    counts[doc_type] += _insert_batch(cursor, doc_type, searchable, batch)
+                    batch = []
+            if batch:
+                counts[doc_type] += _insert_batch(cursor, doc_type, searchable, batch)
+            if log:
+                log(f'Indexed {counts[doc_type]} {doc_type} documents')
+
+        # Merge the b-tree segments the bulk load left behind
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def _insert_batch(cursor, doc_type, searchable, instances):
+    documents = SearchDocument.objects.bulk_create([
+        SearchDocument(doc_type=doc_type, object_id=str(instance.pk), is_public=searchable.is_public(instance))
+        for instance in instances
+    ])
+    cursor.executemany(
+        f'INSERT INTO {FTS_TABLE}(rowid, title, meta, body) VALUES (%s, %s, %s, %s)',
+        [(document.pk, *searchable.columns(instance)) for document, instance in zip(documents, instances)]
+    )
+    return len(documents)
+
+
+def build_match_expression(query, columns=None):
+    """
+    Turn free text into a safe FTS5 query: every word becomes a quoted
+    prefix term and all of them must match, in one of columns if given.
+    Returns '' when there is nothing to search for.
+    """
+    terms = TERM_RE.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return ''
+    match = ' '.join(f'"{term}"*' for term in terms)
+    return f'{{{" ".join(columns)}}} : ({match})' if columns else match
+
+
+def _where(match, doc_types, include_private):
+    clauses, params = [f'{FTS_TABLE} MATCH %s'], [match]
+    if doc_types:
+        clauses.append(f'd.doc_type IN ({", ".join(["%s"] * len(doc_types))})')
+        params.extend(doc_types)
+    if not include_private:
+        clauses.append('d.is_public')
+    return (
+        f'FROM {FTS_TABLE} JOIN {DOCUMENT_TABLE} d ON d.id = {FTS_TABLE}.rowid '
+        f'WHERE {" AND ".join(clauses)}'
+    ), params
+
+
+def _highlighted(text):
+    return html.escape(text).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def search(query, doc_types=None, include_private=False, limit=10, offset=0):
+    """
+    Return (counts per type, hits) for a free-text query, best match first.
+    Each hit is a dict with type, id, title, highlighted title, snippet and
+    score (higher is better). Highlights are HTML-escaped with matches
+    wrapped in <mark>.
+    """
+    match = build_match_expression(query)
+    if not match or not index_available():
+        return {}, []
+    where, params = _where(match, doc_types, include_private)
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT d.doc_type, COUNT(*) {where} GROUP BY d.doc_type', params)
+        counts = dict(cursor.fetchall())
+        if not counts:
+            return {}, []
+        cursor.execute(
+            f'SELECT d.doc_type, d.object_id, {FTS_TABLE}.title, bm25({FTS_TABLE}, {weights}) AS score, '
+            f"highlight({FTS_TABLE}, 0, %s, %s), snippet({FTS_TABLE}, -1, %s, %s, '…', 16) "
+            f'{where} ORDER BY score LIMIT %s OFFSET %s',
+            [MATCH_START, MATCH_END, MATCH_START, MATCH_END, *params, limit, offset]
+        )
+        hits = [
+            {
+                'type': doc_type,
+                'id': object_id,
+                'title': title,
+                'highlighted_title': _highlighted(highlighted_title),
+                'snippet': _highlighted(snippet),
+                # bm25() is lower-is-better; flip it so clients can sort descending
+                'score': -score,
+            }
+            for doc_type, object_id, title, score, highlighted_title, snippet in cursor.fetchall()
+        ]
+    return counts, hits
+
+
+def match_filter(doc_type, query, columns=None):
+    """
+    A filter on the primary key keeping the objects of doc_type that match
+    query (in columns, if given). The match is a subquery of the filtered
+    queryset's own SQL, so no list of ids is loaded. Visibility is left to
+    the queryset.
+    """
+    match = build_match_expression(query, columns)
+    if not match or not index_available():
+        return Q(pk__in=[])
+    where, params = _where(match, [doc_type], include_private=True)
+    # object_id is str(pk), and SQLite stores UUIDs as bare hex
+    object_id = 'd.object_id'
+    if isinstance(SEARCHABLE_TYPES[doc_type].model._meta.pk, models.UUIDField):
+        object_id = "REPLACE(d.object_id, '-', '')"
+    return Q(pk__in=RawSQL(f'SELECT {object_id} {where}', params))
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from search.index import SEARCHABLE_TYPES, index_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from the books, events, lost & found items and roommate posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', dest='doc_types', nargs='+', choices=list(SEARCHABLE_TYPES),
+            help='Only rebuild these document types'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not index_available():
+            raise CommandError('Full-text search needs SQLite with FTS5.')
+        started = time.perf_counter()
+        counts = rebuild_index(options['doc_types'], options['batch_size'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {sum(counts.values())} documents in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def create_fts_table(apps, schema_editor):
+    # FTS5 is an SQLite feature; on other backends search stays disabled
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE search_fts USING fts5("
+        "title, meta, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS search_fts')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(max_length=20)),
+                ('object_id', models.CharField(max_length=36)),
+                ('is_public', models.BooleanField(default=True)),
+            ],
+            options={
+                'unique_together': {('doc_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
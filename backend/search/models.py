@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One row per indexed object. The row's id doubles as the rowid of the
+    object's entry in the search_fts FTS5 table, so re-indexing or removing
+    an object touches a single FTS row instead of scanning the index.
+    """
+    doc_type = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=36)
+    # False for objects only staff may see (e.g. unapproved events)
+    is_public = models.BooleanField(default=True)
+
+    class Meta:
+        unique_together = ['doc_type', 'object_id']
+
+    def __str__(self):
+        return f'{self.doc_type}:{self.object_id}'
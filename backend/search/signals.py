@@ -0,0 +1,29 @@
+from .index import SEARCHABLE_TYPES, index_available, index_instance, remove_instance
+from .models import SearchDocument
+
+
+def update_index(sender, instance, raw=False, **kwargs):
+    # Fixtures are loaded raw; run rebuild_search_index after loaddata
+    if raw or not index_available():
+        return
+    index_instance(instance)
+
+
+def remove_from_index(sender, instance, **kwargs):
+    if index_available():
+        remove_instance(instance)
+
+
+def refresh_event_visibility(sender, instance, raw=False, update_fields=None, **kwargs):
+    """An organizer joining or leaving staff changes who may see their events."""
+    if raw or (update_fields is not None and 'is_staff' not in update_fields) or not index_available():
+        return
+    searchable = SEARCHABLE_TYPES['event']
+    visible = {True: [], False: []}
+    for event in searchable.queryset().filter(organizer=instance):
+        visible[searchable.is_public(event)].append(str(event.pk))
+    for is_public, object_ids in visible.items():
+        if object_ids:
+            SearchDocument.objects.filter(doc_type='event', object_id__in=object_ids).exclude(
+                is_public=is_public
+            ).update(is_public=is_public)
@@ -0,0 +1,136 @@
+from io import StringIO
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from bookbank.models import BookPost
+from lostfound.models import LostFoundItem
+from noticeboard.models import Event
+from .index import build_match_expression, search
+
+User = get_user_model()
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            email='staff@example.com',
+            name='Staff',
+            mobile='1234567890',
+            password='testpass123',
+            is_staff=True
+        )
+        self.book = BookPost.objects.create(
+            title='Engineering Calculus',
+            author='Thomas',
+            isbn='9780321884077',
+            department='Mathematics',
+            posted_by=self.staff,
+            contact_email='staff@example.com'
+        )
+        self.item = LostFoundItem.objects.create(
+            item_name='Casio calculator',
+            description='Left in the calculus lecture hall',
+            brand='Casio',
+            status='lost',
+            reporter=self.staff
+        )
+        start = timezone.now() + timedelta(days=3)
+        self.event = Event.objects.create(
+            title='Calculus revision workshop',
+            description='Bring your calculator',
+            start_datetime=start,
+            end_datetime=start + timedelta(hours=2),
+            location='Main Hall',
+            organizer=self.staff,
+            is_approved=False
+        )
+        self.url = reverse('search')
+
+    def test_results_are_ranked_and_type_tagged(self):
+        response = self.client.get(self.url, {'q': 'calculus'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['counts'], {'book': 1, 'lostfound': 1})
+        first, second = response.data['results']
+        # A title match outranks a description match
+        self.assertEqual((first['type'], first['id']), ('book', str(self.book.pk)))
+        self.assertEqual(first['highlighted_title'], 'Engineering <mark>Calculus</mark>')
+        self.assertEqual(first['url'], reverse('book-detail', args=[self.book.pk]))
+        self.assertEqual(second['type'], 'lostfound')
+        self.assertIn('<mark>calculus</mark>', second['snippet'])
+
+    def test_prefix_and_meta_fields_match(self):
+        self.assertEqual(search('casi')[0], {'lostfound': 1})
+        self.assertEqual(search('9780321884077')[0], {'book': 1})
+        self.assertEqual(search('" OR *')[0], {})
+
+    def test_unapproved_events_are_staff_only(self):
+        response = self.client.get(self.url, {'q': 'revision'})
+        self.assertEqual(response.data['count'], 0)
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(self.url, {'q': 'revision'})
+        self.assertEqual(response.data['counts'], {'event': 1})
+
+        self.client.force_authenticate(user=None)
+        self.event.is_approved = True
+        self.event.save(update_fields=['is_approved'])
+        response = self.client.get(self.url, {'q': 'revision'})
+        self.assertEqual(response.data['counts'], {'event': 1})
+
+    def test_organizer_staff_changes_reach_the_index(self):
+        self.event.is_approved = True
+        self.event.save(update_fields=['is_approved'])
+        self.staff.is_staff = False
+        self.staff.save()
+        self.assertEqual(search('revision')[0], {})
+        self.staff.is_staff = True
+        self.staff.save(update_fields=['is_staff'])
+        self.assertEqual(search('revision')[0], {'event': 1})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.book.title = 'Linear Algebra'
+        self.book.save()
+        self.assertEqual(search('algebra')[0], {'book': 1})
+        self.assertEqual(search('engineering')[0], {})
+        self.book.delete()
+        self.assertEqual(search('algebra')[0], {})
+
+    def test_type_filter_and_pagination(self):
+        response = self.client.get(self.url, {'q': 'calc', 'type': 'lostfound,book', 'page_size': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn('page=2', response.data['next'])
+        response = self.client.get(self.url, {'q': 'calc', 'type': 'news'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_titles_are_html_escaped(self):
+        self.book.title = '<script>calculus</script>'
+        self.book.save()
+        hit = search('calculus', doc_types=['book'])[1][0]
+        self.assertEqual(hit['highlighted_title'], '&lt;script&gt;<mark>calculus</mark>&lt;/script&gt;')
+
+    def test_rebuild_command_indexes_bulk_created_rows(self):
+        BookPost.objects.bulk_create([
+            BookPost(title='Organic Chemistry', author='Clayden', department='Chemistry',
+                     posted_by=self.staff, contact_email='staff@example.com')
+        ])
+        self.assertEqual(search('organic')[0], {})
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search('organic')[0], {'book': 1})
+        self.assertEqual(search('calculus')[0], {'book': 1, 'lostfound': 1})
+
+    def test_event_search_parameter_uses_index(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(reverse('event-list'), {'search': 'revis'})
+        self.assertEqual([event['id'] for event in response.data['results']], [str(self.event.pk)])
+        self.assertEqual(self.client.get(reverse('event-list'), {'search': 'calculator'}).data['count'], 1)
+        # Like the LIKE filter it replaced, only the title and description are searched
+        self.assertEqual(self.client.get(reverse('event-list'), {'search': 'main hall'}).data['count'], 0)
+
+    def test_match_expression_quotes_every_term(self):
+        self.assertEqual(build_match_expression('Casio "fx-991" OR'), '"casio"* "fx"* "991"* "or"*')
+        self.assertEqual(build_match_expression('  !! '), '')
+        self.assertEqual(build_match_expression('fx 991', ['title', 'body']), '{title body} : ("fx"* "991"*)')
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+from .index import SEARCHABLE_TYPES, search
+
+MAX_PAGE_SIZE = 50
+
+
+class SearchView(APIView):
+    """
+    GET /api/search/?q=calculator&type=lostfound,book&page=2
+
+    Ranked results across books, events, lost & found items and roommate
+    posts. Staff also see unapproved events.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        doc_types = [t for t in request.query_params.get('type', '').split(',') if t]
+        unknown = sorted(set(doc_types) - set(SEARCHABLE_TYPES))
+        if unknown:
+            raise ValidationError({'type': f"Unknown type(s): {', '.join(unknown)}. "
+                                           f"Choose from {', '.join(SEARCHABLE_TYPES)}."})
+        page = self._positive_int('page', 1)
+        page_size = min(self._positive_int('page_size', settings.REST_FRAMEWORK['PAGE_SIZE']), MAX_PAGE_SIZE)
+
+        counts, hits = search(
+            query, doc_types=doc_types,
+            include_private=request.user.is_authenticated and request.user.is_staff,
+            limit=page_size, offset=(page - 1) * page_size
+        )
+        for hit in hits:
+            hit['url'] = reverse(SEARCHABLE_TYPES[hit['type']].detail_url_name, args=[hit['id']])
+
+        total = sum(counts.values())
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if page * page_size < total else None
+        previous_url = None
+        if page > 1:
+            previous_url = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+        return Response({
+            'count': total,
+            'counts': counts,
+            'next': next_url,
+            'previous': previous_url,
+            'results': hits,
+        })
+
+    def _positive_int(self, name, default):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except (TypeError, ValueError):
+            raise ValidationError({name: 'Must be a positive integer.'})
+        if value < 1:
+            raise ValidationError({name: 'Must be a positive integer.'})
+        return value